@@ -15,6 +15,19 @@ class DBConfig(BaseSettings):
     password: str = "1234567"
     migrate: bool = True
     file: Optional[str] = None  # For SQLite
+    pool_size: int = 5  # Connections kept open per worker
+    max_overflow: int = 10  # Extra connections allowed above pool_size
+    pool_timeout: float = 30  # Seconds to wait for a free connection
+    pool_recycle: int = 3600  # Reconnect connections older than this
+    pool_pre_ping: bool = True  # Test connections on checkout (one extra round trip)
+    replicas: List[str] = []  # Read replica URLs; GET requests read from these
+    replica_check_interval: float = 5  # Seconds between replica health checks
+    read_your_writes_seconds: float = 2  # Reads stay on the primary this long after a commit
+    # SQLite performance profile: WAL, synchronous=NORMAL, single writer connection
+    sqlite_performance: bool = False
+    sqlite_mmap_size: int = 268435456  # Bytes of the database file to memory-map
+    sqlite_cache_size: int = -64000  # Page cache size; negative values are KiB
+    sqlite_busy_timeout: int = 5000  # Milliseconds to wait on a locked database
 
 
 class RedisConfig(BaseSettings):
@@ -23,6 +36,45 @@ class RedisConfig(BaseSettings):
     host: str = "localhost"
     port: int = 6379
     password: str = "123456"
+    # Connection pool of the async client; callers wait up to pool_timeout for
+    # a free connection (including opening a new one) instead of exceeding
+    # max_connections
+    max_connections: int = 50
+    pool_timeout: float = 1.0
+    socket_timeout: float = 1.0
+    socket_connect_timeout: float = 1.0
+    health_check_interval: int = 30
+    # In-process L1 cache in front of Redis; 0 disables it
+    local_cache_bytes: int = 16 * 1024 * 1024
+    local_cache_ttl: float = 30  # Upper bound on staleness if an invalidation is missed
+    invalidation_channel: str = "cache:invalidate"
+    # Cached value encoding: json, orjson or msgpack; values of at least
+    # compress_threshold bytes are compressed with zstd or lz4 ("none" disables)
+    serializer: str = "orjson"
+    compression: str = "zstd"
+    compress_threshold: int = 1024
+    # Cache stampede protection in CacheManager.get_or_load: misses take a
+    # load_lock_ttl (ms) Redis lock, other processes wait up to load_lock_wait
+    # seconds for it; higher early_refresh_beta refreshes hot keys earlier
+    load_lock_ttl: int = 5000
+    load_lock_wait: float = 2.0
+    early_refresh_beta: float = 1.0
+    # Seconds a "does not exist" entry is cached for a missing user or post;
+    # bloom_filter additionally keeps the IDs of existing ones in memory, with
+    # Redis enabled only, since it learns of new IDs through invalidations
+    negative_ttl: int = 60
+    bloom_filter: bool = False
+    bloom_capacity: int = 1000000
+    bloom_error_rate: float = 0.01
+    # Circuit breaker: over the last breaker_window commands (at least
+    # breaker_min_calls), open on this share of failures or of commands
+    # slower than breaker_slow_call seconds; probe every retry interval
+    breaker_window: int = 50
+    breaker_min_calls: int = 10
+    breaker_error_rate: float = 0.5
+    breaker_slow_call: float = 0.25
+    breaker_slow_rate: float = 0.5
+    breaker_retry_interval: float = 2.0
 
 
 class RateLimitConfig(BaseSettings):
@@ -31,6 +83,7 @@ class RateLimitConfig(BaseSettings):
     burst: int
     qps: int
     cache_size: int
+    distributed: bool = False  # Share the limit across workers through Redis
 
 
 class ServerConfig(BaseSettings):
@@ -42,6 +95,12 @@ class ServerConfig(BaseSettings):
     rate_limits: List[RateLimitConfig] = []
     jwt_secret: str = "weaveserver"
     db_type: str = "mysql"
+    token_cache_size: int = 10000  # Verified JWTs kept in memory, 0 disables
+    password_hash_workers: int = 2  # bcrypt worker processes
+    password_hash_concurrency: int = 16  # Max bcrypt calls submitted at once
+    view_flush_interval: float = 5.0  # Seconds between batched post view count writes
+    permission_cache_size: int = 10000  # Users' compiled RBAC permission sets kept in memory, 0 disables
+    permission_cache_ttl: float = 30  # Upper bound on staleness if a permission change is missed
 
 
 class DockerConfig(BaseSettings):
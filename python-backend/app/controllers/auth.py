@@ -3,12 +3,13 @@
 import json
 import logging
 from fastapi import APIRouter, Depends, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.database import get_db
+from app.database import get_async_db, get_db
 from app.services.auth_service import AuthService
 from app.schemas import LoginRequest, LoginResponse, RegisterRequest, RegisterResponse, UserResponse, StandardResponse
 from app.utils.errors import UnauthorizedException, BadRequestException, success_response, error_response
-from app.models import User
+from app.repositories import AsyncUserRepository
 
 logger = logging.getLogger(__name__)
 
@@ -20,7 +21,7 @@ async def register(request: RegisterRequest, db: Session = Depends(get_db)):
     """Register a new user"""
     auth_service = AuthService(db)
     
-    success, user, message = auth_service.register(
+    success, user, message = await auth_service.register(
         username=request.name,
         email=request.email,
         password=request.password
@@ -40,7 +41,7 @@ async def login(request: LoginRequest, response: Response, db: Session = Depends
     """Login user and get access token"""
     auth_service = AuthService(db)
     
-    success, user, token, message = auth_service.login(
+    success, user, token, message = await auth_service.login(
         username=request.name,
         password=request.password
     )
@@ -108,12 +109,12 @@ async def refresh_token(request: Request, db: Session = Depends(get_db)):
 
 
 @router.get("/me", response_model=UserResponse)
-async def get_current_user(request: Request, db: Session = Depends(get_db)):
+async def get_current_user(request: Request, db: AsyncSession = Depends(get_async_db)):
     """Get current user info"""
     user_id = request.state.user_id
     
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await AsyncUserRepository(db).get_view(user_id)
     if not user:
         raise UnauthorizedException("User not found")
     
-    return UserResponse.model_validate(user)
+    return user
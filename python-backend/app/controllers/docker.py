@@ -5,7 +5,7 @@ from typing import Optional
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
 from app.database import get_db
-from app.services.rbac_service import RBACService
+from app.services.rbac_service import require_permission
 from app.utils.errors import NotFoundException, BadRequestException
 
 logger = logging.getLogger(__name__)
@@ -31,7 +31,7 @@ def get_docker_client():
         raise BadRequestException(f"Failed to connect to Docker: {str(e)}")
 
 
-@router.get("/containers")
+@router.get("/containers", dependencies=[Depends(require_permission("docker/containers", "read"))])
 async def list_containers(filters: Optional[str] = None):
     """List Docker containers"""
     if not docker_available:
@@ -59,7 +59,8 @@ async def list_containers(filters: Optional[str] = None):
         raise BadRequestException(f"Failed to list containers: {str(e)}")
 
 
-@router.get("/containers/{container_id}")
+@router.get("/containers/{container_id}",
+            dependencies=[Depends(require_permission("docker/containers/{container_id}", "read"))])
 async def get_container(container_id: str):
     """Get container details"""
     if not docker_available:
@@ -88,7 +89,8 @@ async def get_container(container_id: str):
         raise BadRequestException(f"Failed to get container: {str(e)}")
 
 
-@router.post("/containers/{container_id}/start")
+@router.post("/containers/{container_id}/start",
+             dependencies=[Depends(require_permission("docker/containers/{container_id}", "start"))])
 async def start_container(container_id: str):
     """Start a container"""
     if not docker_available:
@@ -107,7 +109,8 @@ async def start_container(container_id: str):
         raise BadRequestException(f"Failed to start container: {str(e)}")
 
 
-@router.post("/containers/{container_id}/stop")
+@router.post("/containers/{container_id}/stop",
+             dependencies=[Depends(require_permission("docker/containers/{container_id}", "stop"))])
 async def stop_container(container_id: str):
     """Stop a container"""
     if not docker_available:
@@ -126,7 +129,8 @@ async def stop_container(container_id: str):
         raise BadRequestException(f"Failed to stop container: {str(e)}")
 
 
-@router.delete("/containers/{container_id}")
+@router.delete("/containers/{container_id}",
+               dependencies=[Depends(require_permission("docker/containers/{container_id}", "delete"))])
 async def delete_container(container_id: str):
     """Delete a container"""
     if not docker_available:
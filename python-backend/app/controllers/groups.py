@@ -1,12 +1,14 @@
 """Group API endpoints"""
 
 import logging
+from typing import Optional, Union
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app.models import Group
-from app.schemas import GroupCreate, GroupUpdate, GroupResponse
+from app.schemas import GroupCreate, GroupUpdate, GroupResponse, PaginatedResponse
 from app.repositories import GroupRepository
+from app.utils.pagination import cursor_response
 from app.utils.errors import NotFoundException, BadRequestException, success_response
 
 logger = logging.getLogger(__name__)
@@ -41,10 +43,19 @@ async def get_group(group_id: int, db: Session = Depends(get_db)):
     return GroupResponse.model_validate(group)
 
 
-@router.get("", response_model=list[GroupResponse])
-async def list_groups(skip: int = Query(0, ge=0), limit: int = Query(100, ge=1, le=1000), db: Session = Depends(get_db)):
-    """List all groups"""
+@router.get("", response_model=Union[list[GroupResponse], PaginatedResponse])
+async def list_groups(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="Keyset cursor; pass an empty value for the first page"),
+    db: Session = Depends(get_db)
+):
+    """List all groups, by offset or, when ``cursor`` is given, by keyset"""
     repo = GroupRepository(db)
+    if cursor is not None:
+        groups, next_cursor = repo.list_page(cursor=cursor, limit=limit)
+        return cursor_response([GroupResponse.model_validate(item) for item in groups], limit, next_cursor)
+    
     groups = repo.list(skip=skip, limit=limit)
     return [GroupResponse.model_validate(g) for g in groups]
 
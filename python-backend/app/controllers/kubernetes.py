@@ -5,6 +5,7 @@ from typing import Optional
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
 from app.database import get_db
+from app.services.rbac_service import require_permission
 from app.utils.errors import NotFoundException, BadRequestException
 
 logger = logging.getLogger(__name__)
@@ -35,7 +36,7 @@ def get_kubernetes_client():
     return client.CoreV1Api(), client.AppsV1Api()
 
 
-@router.get("/namespaces")
+@router.get("/namespaces", dependencies=[Depends(require_permission("kubernetes/namespaces", "read"))])
 async def list_namespaces():
     """List Kubernetes namespaces"""
     if not kubernetes_available:
@@ -61,7 +62,7 @@ async def list_namespaces():
         raise BadRequestException(f"Failed to list namespaces: {str(e)}")
 
 
-@router.get("/pods")
+@router.get("/pods", dependencies=[Depends(require_permission("kubernetes/pods", "read"))])
 async def list_pods(namespace: str = "default"):
     """List pods in namespace"""
     if not kubernetes_available:
@@ -88,7 +89,7 @@ async def list_pods(namespace: str = "default"):
         raise BadRequestException(f"Failed to list pods: {str(e)}")
 
 
-@router.get("/deployments")
+@router.get("/deployments", dependencies=[Depends(require_permission("kubernetes/deployments", "read"))])
 async def list_deployments(namespace: str = "default"):
     """List deployments in namespace"""
     if not kubernetes_available:
@@ -115,7 +116,7 @@ async def list_deployments(namespace: str = "default"):
         raise BadRequestException(f"Failed to list deployments: {str(e)}")
 
 
-@router.get("/pods/{pod_id}")
+@router.get("/pods/{pod_id}", dependencies=[Depends(require_permission("kubernetes/pods/{pod_id}", "read"))])
 async def get_pod(pod_id: str, namespace: str = "default"):
     """Get pod details"""
     if not kubernetes_available:
@@ -146,7 +147,7 @@ async def get_pod(pod_id: str, namespace: str = "default"):
         raise NotFoundException(f"Pod {pod_id} not found")
 
 
-@router.delete("/pods/{pod_id}")
+@router.delete("/pods/{pod_id}", dependencies=[Depends(require_permission("kubernetes/pods/{pod_id}", "delete"))])
 async def delete_pod(pod_id: str, namespace: str = "default"):
     """Delete a pod"""
     if not kubernetes_available:
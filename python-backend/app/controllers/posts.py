@@ -1,12 +1,16 @@
 """Post API endpoints"""
 
 import logging
+from typing import Optional, Union
 from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.database import get_db
+from app.database import get_async_db, get_db
 from app.models import Post
-from app.schemas import PostCreate, PostUpdate, PostResponse
-from app.repositories import PostRepository
+from app.schemas import PostCreate, PostUpdate, PostResponse, PaginatedResponse
+from app.repositories import AsyncPostRepository, PostRepository
+from app.services.view_counter import get_view_counter
+from app.utils.pagination import cursor_response
 from app.utils.errors import NotFoundException, success_response
 
 logger = logging.getLogger(__name__)
@@ -34,27 +38,33 @@ async def create_post(request: PostCreate, db: Session = Depends(get_db)):
 
 
 @router.get("/{post_id}", response_model=PostResponse)
-async def get_post(post_id: int, db: Session = Depends(get_db)):
+async def get_post(post_id: int, db: AsyncSession = Depends(get_async_db)):
     """Get post by ID"""
-    repo = PostRepository(db)
-    post = repo.get_by_id(post_id)
+    post = await AsyncPostRepository(db).get_view(post_id)
     
     if not post:
         raise NotFoundException(f"Post {post_id} not found")
     
-    # Increment view count
-    post.view_count = (post.view_count or 0) + 1
-    db.commit()
-    
-    return PostResponse.model_validate(post)
+    # Views are buffered and written to the database in batches
+    pending = await get_view_counter().incr_async(post_id)
+    return post.model_copy(update={"view_count": post.view_count + pending})
 
 
-@router.get("", response_model=list[PostResponse])
-async def list_posts(skip: int = Query(0, ge=0), limit: int = Query(100, ge=1, le=1000), db: Session = Depends(get_db)):
-    """List all posts"""
+@router.get("", response_model=Union[list[PostResponse], PaginatedResponse])
+async def list_posts(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="Keyset cursor; pass an empty value for the first page"),
+    db: Session = Depends(get_db)
+):
+    """List all posts, by offset or, when ``cursor`` is given, by keyset"""
     repo = PostRepository(db)
-    posts = repo.list(skip=skip, limit=limit)
-    return [PostResponse.model_validate(p) for p in posts]
+    counter = get_view_counter()
+    if cursor is not None:
+        posts, next_cursor = repo.list_page_views(cursor=cursor, limit=limit)
+        return cursor_response(counter.add_pending(posts), limit, next_cursor)
+    
+    return counter.add_pending(repo.list_views(skip=skip, limit=limit))
 
 
 @router.put("/{post_id}", response_model=PostResponse)
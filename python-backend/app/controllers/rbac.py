@@ -1,11 +1,13 @@
 """RBAC API endpoints"""
 
 import logging
+from typing import Optional
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
-from app.database import get_db
-from app.schemas import RoleCreate, RoleUpdate, RoleResponse, RuleCreate, RuleResponse
-from app.services.rbac_service import RBACService
+from app.database import get_db, get_read_db
+from app.schemas import RoleCreate, RoleUpdate, RoleResponse, RuleCreate, RuleResponse, BatchPermissionCheck
+from app.services.rbac_service import RBACService, require_permission
+from app.utils.pagination import cursor_response
 from app.utils.errors import NotFoundException, BadRequestException, success_response
 
 logger = logging.getLogger(__name__)
@@ -14,7 +16,8 @@ router = APIRouter(prefix="/api/rbac", tags=["rbac"])
 
 
 # Role endpoints
-@router.post("/roles", response_model=RoleResponse, status_code=201)
+@router.post("/roles", response_model=RoleResponse, status_code=201,
+             dependencies=[Depends(require_permission("rbac/roles", "create"))])
 async def create_role(request: RoleCreate, db: Session = Depends(get_db)):
     """Create a new role"""
     rbac_service = RBACService(db)
@@ -27,10 +30,19 @@ async def create_role(request: RoleCreate, db: Session = Depends(get_db)):
 
 
 @router.get("/roles")
-async def list_roles(skip: int = Query(0, ge=0), limit: int = Query(100), db: Session = Depends(get_db)):
-    """List all roles"""
-    from app.models import Role
-    roles = db.query(Role).offset(skip).limit(limit).all()
+async def list_roles(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="Keyset cursor; pass an empty value for the first page"),
+    db: Session = Depends(get_db)
+):
+    """List all roles, by offset or, when ``cursor`` is given, by keyset"""
+    rbac_service = RBACService(db)
+    if cursor is not None:
+        roles, next_cursor = rbac_service.list_roles_page(cursor=cursor, limit=limit)
+        return cursor_response([RoleResponse.model_validate(r).model_dump() for r in roles], limit, next_cursor)
+    
+    roles = rbac_service.list_roles(skip=skip, limit=limit)
     return {"data": [RoleResponse.model_validate(r).model_dump() for r in roles]}
 
 
@@ -47,7 +59,8 @@ async def get_role(role_id: int, db: Session = Depends(get_db)):
 
 
 # Rule endpoints
-@router.post("/rules", response_model=RuleResponse, status_code=201)
+@router.post("/rules", response_model=RuleResponse, status_code=201,
+             dependencies=[Depends(require_permission("rbac/rules", "create"))])
 async def create_rule(request: RuleCreate, db: Session = Depends(get_db)):
     """Create a new authorization rule"""
     rbac_service = RBACService(db)
@@ -65,10 +78,19 @@ async def create_rule(request: RuleCreate, db: Session = Depends(get_db)):
 
 
 @router.get("/rules")
-async def list_rules(skip: int = Query(0, ge=0), limit: int = Query(100), db: Session = Depends(get_db)):
-    """List all rules"""
-    from app.models import Rule
-    rules = db.query(Rule).offset(skip).limit(limit).all()
+async def list_rules(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="Keyset cursor; pass an empty value for the first page"),
+    db: Session = Depends(get_db)
+):
+    """List all rules, by offset or, when ``cursor`` is given, by keyset"""
+    rbac_service = RBACService(db)
+    if cursor is not None:
+        rules, next_cursor = rbac_service.list_rules_page(cursor=cursor, limit=limit)
+        return cursor_response([RuleResponse.model_validate(r).model_dump() for r in rules], limit, next_cursor)
+    
+    rules = rbac_service.list_rules(skip=skip, limit=limit)
     return {"data": [RuleResponse.model_validate(r).model_dump() for r in rules]}
 
 
@@ -85,7 +107,8 @@ async def get_rule(rule_id: int, db: Session = Depends(get_db)):
 
 
 # Permission endpoints
-@router.post("/users/{user_id}/roles/{role_id}")
+@router.post("/users/{user_id}/roles/{role_id}",
+             dependencies=[Depends(require_permission("rbac/users/{user_id}/roles", "assign"))])
 async def assign_role_to_user(user_id: int, role_id: int, db: Session = Depends(get_db)):
     """Assign role to user"""
     rbac_service = RBACService(db)
@@ -97,7 +120,8 @@ async def assign_role_to_user(user_id: int, role_id: int, db: Session = Depends(
     return success_response(message)
 
 
-@router.delete("/users/{user_id}/roles/{role_id}", status_code=204)
+@router.delete("/users/{user_id}/roles/{role_id}", status_code=204,
+               dependencies=[Depends(require_permission("rbac/users/{user_id}/roles", "remove"))])
 async def remove_role_from_user(user_id: int, role_id: int, db: Session = Depends(get_db)):
     """Remove role from user"""
     rbac_service = RBACService(db)
@@ -109,7 +133,8 @@ async def remove_role_from_user(user_id: int, role_id: int, db: Session = Depend
     return None
 
 
-@router.post("/roles/{role_id}/rules/{rule_id}")
+@router.post("/roles/{role_id}/rules/{rule_id}",
+             dependencies=[Depends(require_permission("rbac/roles/{role_id}/rules", "assign"))])
 async def assign_rule_to_role(role_id: int, rule_id: int, db: Session = Depends(get_db)):
     """Assign rule to role"""
     rbac_service = RBACService(db)
@@ -121,7 +146,8 @@ async def assign_rule_to_role(role_id: int, rule_id: int, db: Session = Depends(
     return success_response(message)
 
 
-@router.get("/users/{user_id}/permissions")
+@router.get("/users/{user_id}/permissions",
+            dependencies=[Depends(require_permission("rbac/users/{user_id}/permissions", "read"))])
 async def get_user_permissions(user_id: int, db: Session = Depends(get_db)):
     """Get user permissions"""
     rbac_service = RBACService(db)
@@ -133,8 +159,8 @@ async def get_user_permissions(user_id: int, db: Session = Depends(get_db)):
     }
 
 
-@router.post("/check")
-async def check_permission(user_id: int, resource: str, operation: str, db: Session = Depends(get_db)):
+@router.post("/check", dependencies=[Depends(require_permission("rbac/permissions", "read"))])
+async def check_permission(user_id: int, resource: str, operation: str, db: Session = Depends(get_read_db)):
     """Check if user has permission"""
     rbac_service = RBACService(db)
     has_permission = rbac_service.check_permission(user_id, resource, operation)
@@ -143,3 +169,22 @@ async def check_permission(user_id: int, resource: str, operation: str, db: Sess
         "success": True,
         "has_permission": has_permission
     }
+
+
+@router.post("/check/batch", dependencies=[Depends(require_permission("rbac/permissions", "read"))])
+async def check_permissions(request: BatchPermissionCheck, db: Session = Depends(get_db)):
+    """Check several permissions of a user, as ``data[resource][operation]``.
+
+    Uses a primary session: the set compiled on a miss is shared with other
+    requests and workers, so it must not come from a lagging replica.
+    """
+    rbac_service = RBACService(db)
+    pairs = [(check.resource, check.operation) for check in request.checks]
+    results = {}
+    for (resource, operation), allowed in zip(pairs, rbac_service.check_permissions(request.user_id, pairs)):
+        results.setdefault(resource, {})[operation] = allowed
+    
+    return {
+        "success": True,
+        "data": results
+    }
@@ -1,14 +1,18 @@
 """User API endpoints"""
 
 import logging
+from typing import Optional, Union
 from fastapi import APIRouter, Depends, Request, Query
-from sqlalchemy.orm import Session
-from app.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
+from app.database import get_async_db, get_db
 from app.models import User
-from app.schemas import UserCreate, UserUpdate, UserResponse, StandardResponse
-from app.repositories import UserRepository
+from app.schemas import UserCreate, UserUpdate, UserResponse, StandardResponse, PaginatedResponse
+from app.repositories import AsyncUserRepository, UserRepository
+from app.utils.pagination import cursor_response
 from app.utils.errors import NotFoundException, BadRequestException, success_response
-from app.utils.auth import hash_password
+from app.services.password_service import get_password_service
+from app.services.rbac_service import require_permission
 
 logger = logging.getLogger(__name__)
 
@@ -28,7 +32,7 @@ async def create_user(request: UserCreate, db: Session = Depends(get_db)):
     user = User(
         name=request.name,
         email=request.email,
-        password=hash_password(request.password),
+        password=await get_password_service().hash(request.password),
         avatar=request.avatar
     )
     
@@ -37,23 +41,31 @@ async def create_user(request: UserCreate, db: Session = Depends(get_db)):
 
 
 @router.get("/{user_id}", response_model=UserResponse)
-async def get_user(user_id: int, db: Session = Depends(get_db)):
+async def get_user(user_id: int, db: AsyncSession = Depends(get_async_db)):
     """Get user by ID"""
-    repo = UserRepository(db)
-    user = repo.get_by_id(user_id)
+    repo = AsyncUserRepository(db)
+    user = await repo.get_view(user_id)
     
     if not user:
         raise NotFoundException(f"User {user_id} not found")
     
-    return UserResponse.model_validate(user)
+    return user
 
 
-@router.get("", response_model=list[UserResponse])
-async def list_users(skip: int = Query(0, ge=0), limit: int = Query(100, ge=1, le=1000), db: Session = Depends(get_db)):
-    """List all users"""
+@router.get("", response_model=Union[list[UserResponse], PaginatedResponse])
+async def list_users(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="Keyset cursor; pass an empty value for the first page"),
+    db: Session = Depends(get_db)
+):
+    """List all users, by offset or, when ``cursor`` is given, by keyset"""
     repo = UserRepository(db)
-    users = repo.list(skip=skip, limit=limit)
-    return [UserResponse.model_validate(u) for u in users]
+    if cursor is not None:
+        users, next_cursor = repo.list_page_views(cursor=cursor, limit=limit)
+        return cursor_response(users, limit, next_cursor)
+    
+    return repo.list_views(skip=skip, limit=limit)
 
 
 @router.put("/{user_id}", response_model=UserResponse)
@@ -71,7 +83,7 @@ async def update_user(user_id: int, request: UserUpdate, db: Session = Depends(g
     if request.avatar is not None:
         user.avatar = request.avatar
     if request.password is not None:
-        user.password = hash_password(request.password)
+        user.password = await get_password_service().hash(request.password)
     
     user = repo.update(user)
     return UserResponse.model_validate(user)
@@ -88,7 +100,8 @@ async def delete_user(user_id: int, db: Session = Depends(get_db)):
     return None
 
 
-@router.post("/{user_id}/groups/{group_id}")
+@router.post("/{user_id}/groups/{group_id}",
+             dependencies=[Depends(require_permission("groups/{group_id}/users", "assign"))])
 async def add_user_to_group(user_id: int, group_id: int, db: Session = Depends(get_db)):
     """Add user to group"""
     from app.repositories import GroupRepository
@@ -106,7 +119,8 @@ async def add_user_to_group(user_id: int, group_id: int, db: Session = Depends(g
     return success_response("User added to group")
 
 
-@router.delete("/{user_id}/groups/{group_id}", status_code=204)
+@router.delete("/{user_id}/groups/{group_id}", status_code=204,
+               dependencies=[Depends(require_permission("groups/{group_id}/users", "remove"))])
 async def remove_user_from_group(user_id: int, group_id: int, db: Session = Depends(get_db)):
     """Remove user from group"""
     from app.repositories import GroupRepository
@@ -127,7 +141,7 @@ async def remove_user_from_group(user_id: int, group_id: int, db: Session = Depe
 @router.get("/{user_id}/groups")
 async def get_user_groups(user_id: int, db: Session = Depends(get_db)):
     """Get user's groups"""
-    user = db.query(User).filter(User.id == user_id).first()
+    user = db.query(User).options(selectinload(User.groups)).filter(User.id == user_id).first()
     
     if not user:
         raise NotFoundException(f"User {user_id} not found")
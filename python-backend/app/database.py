@@ -1,13 +1,20 @@
 """Database connection and session management"""
 
+import itertools
 import os
+import threading
 import time
 import logging
-from typing import Generator, Optional
-from sqlalchemy import create_engine, inspect, event, text
+from typing import AsyncGenerator, Generator, List, Optional, Tuple
+from starlette.requests import Request
+from sqlalchemy import Select, create_engine, inspect, event, text
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, Session, DeclarativeBase
 from sqlalchemy.exc import OperationalError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from app.config import get_config, DBConfig
+from app.utils.metrics import register_stats
 
 logger = logging.getLogger(__name__)
 
@@ -17,56 +24,537 @@ class Base(DeclarativeBase):
     pass
 
 
+# Async DBAPI driver for each backend
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "mysql": "mysql+aiomysql",
+}
+
+
+def to_async_url(db_url: str) -> str:
+    """Convert a sync database URL to the matching async driver URL"""
+    url = make_url(db_url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver for database backend: {backend}")
+    return url.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
+
+
+class PoolStats:
+    """Connection pool gauges fed by SQLAlchemy pool events.
+
+    Checkout/checkin/connect/invalidate counts come from pool events. Wait
+    time (blocking on an exhausted pool) and total checkout latency
+    (including pre-ping) are recorded by the instrumented pool classes below.
+    """
+    
+    def __init__(self):
+        self.pool = None
+        self.checked_out = 0
+        self.checkouts = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.wait_seconds_total = 0.0
+        self.checkout_seconds_total = 0.0
+    
+    def attach(self, engine) -> None:
+        """Start collecting stats for an engine's pool"""
+        self.pool = engine.pool
+        engine.pool.stats = self
+        event.listen(engine, "connect", self._on_connect)
+        event.listen(engine, "checkout", self._on_checkout)
+        event.listen(engine, "checkin", self._on_checkin)
+        event.listen(engine, "invalidate", self._on_invalidate)
+    
+    def _on_connect(self, dbapi_connection, connection_record):
+        self.connects += 1
+    
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        self.checked_out += 1
+        self.checkouts += 1
+    
+    def _on_checkin(self, dbapi_connection, connection_record):
+        self.checked_out -= 1
+    
+    def _on_invalidate(self, dbapi_connection, connection_record, exception):
+        self.invalidations += 1
+    
+    def record_wait(self, seconds: float) -> None:
+        self.wait_seconds_total += seconds
+    
+    def record_checkout(self, seconds: float) -> None:
+        self.checkout_seconds_total += seconds
+    
+    def stats(self) -> dict:
+        """Get current pool gauges and counters"""
+        pool = self.pool
+        return {
+            "size": pool.size() if hasattr(pool, "size") else 0,
+            "checked_out": self.checked_out,
+            "overflow": max(pool.overflow(), 0) if hasattr(pool, "overflow") else 0,
+            "checkouts": self.checkouts,
+            "connects": self.connects,
+            "invalidations": self.invalidations,
+            "wait_seconds_total": self.wait_seconds_total,
+            "checkout_seconds_total": self.checkout_seconds_total,
+            "wait_ms_avg": self.wait_seconds_total / self.checkouts * 1000 if self.checkouts else 0.0,
+            "checkout_ms_avg": self.checkout_seconds_total / self.checkouts * 1000 if self.checkouts else 0.0,
+        }
+
+
+class _TimedPoolMixin:
+    """Record queue wait and checkout latency on ``PoolStats``"""
+    
+    stats: Optional[PoolStats] = None
+    
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            if self.stats is not None:
+                self.stats.record_wait(time.perf_counter() - start)
+    
+    def connect(self):
+        start = time.perf_counter()
+        connection = super().connect()
+        if self.stats is not None:
+            self.stats.record_checkout(time.perf_counter() - start)
+        return connection
+    
+    def recreate(self):
+        pool = super().recreate()
+        pool.stats = self.stats
+        if self.stats is not None:
+            self.stats.pool = pool
+        return pool
+
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    """QueuePool recording wait and checkout latency"""
+
+
+class TimedAsyncAdaptedQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool recording wait and checkout latency"""
+
+
+def _is_memory_sqlite(db_url: str) -> bool:
+    url = make_url(db_url)
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+
+def pool_options(db_url: str, db_config: DBConfig, async_engine: bool = False) -> dict:
+    """Engine keyword arguments for the pool settings in ``db_config``"""
+    options = {
+        "pool_pre_ping": db_config.pool_pre_ping,
+        "pool_recycle": db_config.pool_recycle,
+    }
+    # In-memory SQLite uses a single shared connection, not a sized queue pool
+    if not _is_memory_sqlite(db_url):
+        options.update(
+            poolclass=TimedAsyncAdaptedQueuePool if async_engine else TimedQueuePool,
+            pool_size=db_config.pool_size,
+            max_overflow=db_config.max_overflow,
+            pool_timeout=db_config.pool_timeout,
+        )
+    return options
+
+
+def resolve_database_url(db_config: Optional[DBConfig] = None) -> Tuple[str, DBConfig]:
+    """Get the database URL and config for the configured ``db_type``"""
+    config = get_config()
+    
+    if db_config is None:
+        db_type = config.server.db_type
+        if db_type == "mysql":
+            db_config = config.mysql
+        elif db_type == "postgres":
+            db_config = config.postgres
+        elif db_type == "sqlite":
+            db_config = config.sqlite
+        else:
+            raise ValueError(f"Unsupported database type: {db_type}")
+    
+    # Prefer DATABASE_URL environment variable (used in Docker)
+    db_url = os.environ.get("DATABASE_URL")
+    
+    if db_url:
+        logger.info(f"Using DATABASE_URL from environment")
+    else:
+        # Build connection string
+        if config.server.db_type == "sqlite":
+            db_url = f"sqlite:///{db_config.file}"
+        elif config.server.db_type == "postgres":
+            db_url = f"postgresql://{db_config.user}:{db_config.password}@{db_config.host}:{db_config.port}/{db_config.name}"
+        else:  # mysql
+            db_url = f"mysql+pymysql://{db_config.user}:{db_config.password}@{db_config.host}:{db_config.port}/{db_config.name}"
+        
+        logger.info(f"Using database config from app.yaml")
+    
+    return db_url, db_config
+
+
+def is_sqlite(db_url: str) -> bool:
+    return make_url(db_url).get_backend_name() == "sqlite"
+
+
+def sqlite_pragmas(db_config: DBConfig) -> List[str]:
+    """PRAGMA statements of the SQLite performance profile"""
+    return [
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        f"PRAGMA mmap_size={int(db_config.sqlite_mmap_size)}",
+        f"PRAGMA cache_size={int(db_config.sqlite_cache_size)}",
+        f"PRAGMA busy_timeout={int(db_config.sqlite_busy_timeout)}",
+    ]
+
+
+def apply_sqlite_pragmas(engine: Engine, db_config: DBConfig) -> None:
+    """Run the performance profile PRAGMAs on every new connection"""
+    pragmas = sqlite_pragmas(db_config)
+    
+    @event.listens_for(engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+
+class ReplicaSet:
+    """Round-robin over read replicas, skipping unhealthy ones.
+
+    A replica is taken out of rotation as soon as it raises a connection
+    error, and a background thread probes every replica with ``SELECT 1``
+    to put recovered replicas back.
+    """
+    
+    def __init__(self, engines: List[Engine], check_interval: float = 5):
+        self.engines = engines
+        self.healthy = [True] * len(engines)
+        self.check_interval = check_interval
+        self._counter = itertools.count()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        
+        for index, engine in enumerate(engines):
+            event.listen(engine, "handle_error", self._error_handler(index))
+    
+    def _error_handler(self, index: int):
+        def on_error(context):
+            if context.is_disconnect or context.connection is None:
+                self.mark_down(index)
+        return on_error
+    
+    def pick(self) -> Optional[Engine]:
+        """Get the next healthy replica, or None if all are down"""
+        count = len(self.engines)
+        for _ in range(count):
+            index = next(self._counter) % count
+            if self.healthy[index]:
+                return self.engines[index]
+        return None
+    
+    def mark_down(self, index: int) -> None:
+        if self.healthy[index]:
+            logger.warning(f"Read replica {index} marked down")
+        self.healthy[index] = False
+    
+    def check(self) -> None:
+        """Probe every replica and update its health"""
+        for index, engine in enumerate(self.engines):
+            try:
+                with engine.connect() as conn:
+                    conn.execute(text("SELECT 1"))
+                if not self.healthy[index]:
+                    logger.info(f"Read replica {index} back in rotation")
+                self.healthy[index] = True
+            except Exception as e:
+                logger.debug(f"Read replica {index} health check failed: {e}")
+                self.mark_down(index)
+    
+    def start(self) -> None:
+        """Start the background health checker"""
+        if self._thread is None and self.engines:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="replica-health", daemon=True)
+            self._thread.start()
+    
+    def _run(self) -> None:
+        while not self._stop.wait(self.check_interval):
+            self.check()
+    
+    def stop(self) -> None:
+        """Stop the health checker and close replica connections"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.check_interval)
+            self._thread = None
+        for engine in self.engines:
+            engine.dispose()
+    
+    def stats(self) -> dict:
+        return {
+            "total": len(self.engines),
+            "healthy": sum(self.healthy),
+        }
+
+
+class RoutingSession(Session):
+    """Session sending reads to replicas and everything else to the primary.
+
+    Only plain SELECTs of a session opened with ``use_replica=True`` go to a
+    replica. While the session has pending or flushed writes, every read goes
+    to the primary until the transaction commits or rolls back, as no other
+    connection can see them yet. After a commit, reads stay pinned to the
+    primary for ``read_your_writes_seconds`` so replica lag does not hide the
+    session's own changes.
+
+    With the SQLite performance profile the "primary" is the single writer
+    connection and every session reads from the reader pool.
+    """
+    
+    def __init__(self, *args, manager: "DatabaseManager" = None, use_replica: bool = False, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.manager = manager
+        self.use_replica = use_replica
+        self.primary_until = 0.0
+        # Set by a write in the current transaction, cleared when it ends
+        self.has_writes = False
+    
+    def pin_to_primary(self) -> None:
+        """Route reads to the primary until the transaction ends and for the read-your-writes window after"""
+        self.has_writes = True
+        window = self.manager.db_config.read_your_writes_seconds if self.manager else 0
+        self.primary_until = time.monotonic() + window
+    
+    def writing(self) -> bool:
+        """Whether the session holds writes other connections cannot see yet"""
+        return self.has_writes or bool(self.new or self.deleted or self.dirty)
+    
+    def engines(self) -> Tuple[Engine, Optional[Engine], Optional[ReplicaSet]]:
+        """The primary, the SQLite reader pool and the replicas to route between"""
+        manager = self.manager
+        return manager.engine, manager.read_engine, manager.replicas
+    
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self.manager is None:
+            return super().get_bind(mapper=mapper, clause=clause, **kwargs)
+        primary, read_engine, replicas = self.engines()
+        if replicas is None and read_engine is None:
+            return super().get_bind(mapper=mapper, clause=clause, **kwargs)
+        
+        is_read = isinstance(clause, Select) and clause._for_update_arg is None
+        if not is_read or self._flushing:
+            if clause is not None and not is_read:
+                self.pin_to_primary()
+            return primary
+        
+        if self.writing() or time.monotonic() < self.primary_until:
+            return primary
+        if read_engine is not None:
+            return read_engine
+        if self.use_replica:
+            replica = replicas.pick()
+            if replica is not None:
+                return replica
+        return primary
+
+
+class AsyncRoutingSession(RoutingSession):
+    """Sync side of async sessions under the SQLite performance profile.
+
+    Routes between the async writer and reader engines the way
+    ``RoutingSession`` does between the sync ones.
+    """
+    
+    def engines(self) -> Tuple[Engine, Optional[Engine], Optional[ReplicaSet]]:
+        manager = self.manager
+        return manager.async_engine.sync_engine, manager.async_read_engine.sync_engine, None
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _pin_after_flush(session, flush_context):
+    session.pin_to_primary()
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _release_after_commit(session):
+    # The read-your-writes window covers replica lag from the commit on
+    if session.has_writes:
+        session.pin_to_primary()
+        session.has_writes = False
+
+
+@event.listens_for(RoutingSession, "after_rollback")
+def _release_after_rollback(session):
+    session.has_writes = False
+
+
 class DatabaseManager:
     """Manages database connections and sessions"""
     
     def __init__(self):
         self.engine = None
         self.SessionLocal = None
+        self.db_url = None
+        self.db_config = None
+        self.async_engine = None
+        self.async_read_engine = None
+        self.AsyncSessionLocal = None
+        self.pool_stats = PoolStats()
+        self.async_pool_stats = PoolStats()
+        self.replicas: Optional[ReplicaSet] = None
+        self.read_engine: Optional[Engine] = None
     
     def init_db(self, db_config: Optional[DBConfig] = None):
         """Initialize database connection"""
         config = get_config()
+        db_url, db_config = resolve_database_url(db_config)
         
-        # Prefer DATABASE_URL environment variable (used in Docker)
-        db_url = os.environ.get("DATABASE_URL")
+        self.db_url = db_url
+        self.db_config = db_config
         
-        if db_url:
-            logger.info(f"Using DATABASE_URL from environment")
+        if db_config.sqlite_performance and is_sqlite(db_url) and not _is_memory_sqlite(db_url):
+            self.init_sqlite_performance(db_url, db_config)
         else:
-            # Fall back to config file
-            if db_config is None:
-                db_type = config.server.db_type
-                if db_type == "mysql":
-                    db_config = config.mysql
-                elif db_type == "postgres":
-                    db_config = config.postgres
-                elif db_type == "sqlite":
-                    db_config = config.sqlite
-                else:
-                    raise ValueError(f"Unsupported database type: {db_type}")
-            
-            # Build connection string
-            if config.server.db_type == "sqlite":
-                db_url = f"sqlite:///{db_config.file}"
-            elif config.server.db_type == "postgres":
-                db_url = f"postgresql://{db_config.user}:{db_config.password}@{db_config.host}:{db_config.port}/{db_config.name}"
-            else:  # mysql
-                db_url = f"mysql+pymysql://{db_config.user}:{db_config.password}@{db_config.host}:{db_config.port}/{db_config.name}"
-            
-            logger.info(f"Using database config from app.yaml")
+            self.engine = create_engine(
+                db_url,
+                echo=config.server.env == "debug",
+                **pool_options(db_url, db_config)
+            )
+            self.pool_stats.attach(self.engine)
+            register_stats("db_pool", self.pool_stats.stats)
+        
+        if db_config.replicas:
+            self.init_replicas(db_config)
+        
+        self.SessionLocal = sessionmaker(
+            class_=RoutingSession,
+            autocommit=False,
+            autoflush=False,
+            bind=self.engine,
+            manager=self
+        )
+    
+    def init_sqlite_performance(self, db_url: str, db_config: DBConfig):
+        """Set up the SQLite performance profile.
+
+        Every connection runs in WAL mode with ``synchronous=NORMAL``, memory
+        mapping, a larger page cache and a busy timeout. Writes go through a
+        single writer connection, so they queue in the pool instead of
+        fighting over the database lock, while reads use a pool of reader
+        connections that WAL lets run alongside the writer.
+        """
+        config = get_config()
+        options = pool_options(db_url, db_config)
         
         self.engine = create_engine(
             db_url,
             echo=config.server.env == "debug",
-            pool_pre_ping=True,
-            pool_recycle=3600
+            **{**options, "pool_size": 1, "max_overflow": 0}
+        )
+        self.read_engine = create_engine(
+            db_url,
+            echo=config.server.env == "debug",
+            **options
         )
+        for engine in (self.engine, self.read_engine):
+            apply_sqlite_pragmas(engine, db_config)
         
-        self.SessionLocal = sessionmaker(
-            autocommit=False,
+        self.pool_stats.attach(self.engine)
+        register_stats("db_pool", self.pool_stats.stats)
+        read_stats = PoolStats()
+        read_stats.attach(self.read_engine)
+        register_stats("db_read_pool", read_stats.stats)
+        logger.info("Using SQLite performance profile (WAL, single writer connection)")
+    
+    def init_replicas(self, db_config: DBConfig):
+        """Create engines for the read replicas and start health checks"""
+        config = get_config()
+        engines = []
+        for index, replica_url in enumerate(db_config.replicas):
+            engine = create_engine(
+                replica_url,
+                echo=config.server.env == "debug",
+                **pool_options(replica_url, db_config)
+            )
+            stats = PoolStats()
+            stats.attach(engine)
+            register_stats(f"db_replica_{index}_pool", stats.stats)
+            engines.append(engine)
+        
+        self.replicas = ReplicaSet(engines, db_config.replica_check_interval)
+        self.replicas.start()
+        register_stats("db_replicas", self.replicas.stats)
+        logger.info(f"Using {len(engines)} read replicas")
+    
+    def init_async_db(self):
+        """Initialize the async engine for the configured database.
+
+        Uses aiosqlite, asyncpg or aiomysql depending on the backend, so
+        queries made through ``get_async_session`` never block the event loop.
+        """
+        if self.db_url is None:
+            raise RuntimeError("Database not initialized. Call init_db first.")
+        
+        config = get_config()
+        async_url = to_async_url(self.db_url)
+        if self.read_engine is not None:
+            self.init_async_sqlite_performance(async_url)
+            return
+        
+        self.async_engine = create_async_engine(
+            async_url,
+            echo=config.server.env == "debug",
+            **pool_options(async_url, self.db_config, async_engine=True)
+        )
+        self.async_pool_stats.attach(self.async_engine.sync_engine)
+        register_stats("db_async_pool", self.async_pool_stats.stats)
+        
+        self.AsyncSessionLocal = async_sessionmaker(
+            bind=self.async_engine,
+            autoflush=False,
+            expire_on_commit=False
+        )
+    
+    def init_async_sqlite_performance(self, async_url: str):
+        """Set up the async engines of the SQLite performance profile.
+
+        Async writes go through a one-connection writer engine of their own
+        and reads through a reader pool, routed by ``AsyncRoutingSession``.
+        """
+        config = get_config()
+        options = pool_options(async_url, self.db_config, async_engine=True)
+        
+        self.async_engine = create_async_engine(
+            async_url,
+            echo=config.server.env == "debug",
+            **{**options, "pool_size": 1, "max_overflow": 0}
+        )
+        self.async_read_engine = create_async_engine(
+            async_url,
+            echo=config.server.env == "debug",
+            **options
+        )
+        for engine in (self.async_engine, self.async_read_engine):
+            apply_sqlite_pragmas(engine.sync_engine, self.db_config)
+        
+        self.async_pool_stats.attach(self.async_engine.sync_engine)
+        register_stats("db_async_pool", self.async_pool_stats.stats)
+        read_stats = PoolStats()
+        read_stats.attach(self.async_read_engine.sync_engine)
+        register_stats("db_async_read_pool", read_stats.stats)
+        
+        self.AsyncSessionLocal = async_sessionmaker(
+            bind=self.async_engine,
+            sync_session_class=AsyncRoutingSession,
             autoflush=False,
-            bind=self.engine
+            expire_on_commit=False,
+            manager=self
         )
     
     def create_tables(self, max_retries: int = 30, retry_interval: int = 2):
@@ -94,20 +582,41 @@ class DatabaseManager:
                     logger.error(f"Failed to connect to database after {max_retries} attempts")
                     raise
     
-    def get_session(self) -> Generator[Session, None, None]:
-        """Get database session"""
+    def get_session(self, use_replica: bool = False) -> Generator[Session, None, None]:
+        """Get database session, optionally reading from replicas"""
         if self.SessionLocal is None:
             raise RuntimeError("Database not initialized. Call init_db first.")
-        session = self.SessionLocal()
+        session = self.SessionLocal(use_replica=use_replica)
         try:
             yield session
         finally:
             session.close()
     
+    async def get_async_session(self) -> AsyncGenerator[AsyncSession, None]:
+        """Get async database session, creating the async engine on first use"""
+        if self.AsyncSessionLocal is None:
+            self.init_async_db()
+        async with self.AsyncSessionLocal() as session:
+            yield session
+    
     def close(self):
         """Close database connection"""
+        if self.replicas:
+            self.replicas.stop()
+        if self.read_engine:
+            self.read_engine.dispose()
         if self.engine:
             self.engine.dispose()
+    
+    async def close_async(self):
+        """Close async database connections"""
+        if self.async_read_engine:
+            await self.async_read_engine.dispose()
+            self.async_read_engine = None
+        if self.async_engine:
+            await self.async_engine.dispose()
+            self.async_engine = None
+            self.AsyncSessionLocal = None
 
 
 # Global database manager instance
@@ -123,7 +632,28 @@ def get_db_manager() -> DatabaseManager:
     return _db_manager
 
 
-def get_db() -> Generator[Session, None, None]:
-    """Get database session for dependency injection"""
+# Requests that may read from replicas
+READ_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+def get_db(request: Request) -> Generator[Session, None, None]:
+    """Get database session for dependency injection.
+
+    Read-only requests get a session that reads from replicas when any are
+    configured; other requests use the primary only.
+    """
+    manager = get_db_manager()
+    yield from manager.get_session(use_replica=request.method in READ_METHODS)
+
+
+def get_read_db() -> Generator[Session, None, None]:
+    """Get a replica-reading session for read-only endpoints of any method"""
+    manager = get_db_manager()
+    yield from manager.get_session(use_replica=True)
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """Get async database session for dependency injection"""
     manager = get_db_manager()
-    yield from manager.get_session()
+    async for session in manager.get_async_session():
+        yield session
@@ -2,12 +2,18 @@
 
 import logging
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from fastapi.staticfiles import StaticFiles
 from app.config import get_config
 from app.database import get_db_manager
-from app.utils.redis_client import get_redis_client
+from app.utils.redis_client import get_redis_client, get_cache_manager, get_async_redis_client
+from app.services.password_service import get_password_service
+from app.services.permission_index import get_permission_index
+from app.services.rbac_service import require_permission
+from app.services.view_counter import get_view_counter
+from app.utils.metrics import render_prometheus
 from app.middleware import (
     RequestIDMiddleware,
     LoggingMiddleware,
@@ -48,20 +54,39 @@ async def lifespan(app: FastAPI):
         logger.info("Redis connected")
     else:
         logger.warning("Redis is disabled or not available")
+    cache_manager = get_cache_manager()
+    # Like the L1 tier, the filters learn of other workers' creations through
+    # Redis pub/sub, so without Redis they would wrongly rule out new IDs
+    if config.redis.bloom_filter and redis_client.enabled:
+        cache_manager.enable_bloom("user", lambda: load_ids("user"))
+        cache_manager.enable_bloom("post", lambda: load_ids("post"))
+    elif config.redis.bloom_filter:
+        logger.warning("Bloom filters need Redis for invalidations; leaving them off")
+    async_redis_client = get_async_redis_client()
+    await async_redis_client.connect()
+    view_counter = get_view_counter()
+    view_counter.start()
     
     yield
     
     # Shutdown
     logger.info("Application shutting down...")
+    # Before Redis and the database go away, so buffered views are written
+    view_counter.close()
+    get_permission_index().close()
+    cache_manager.close()
+    await async_redis_client.close()
     redis_client.close()
+    get_password_service().shutdown()
+    await db_manager.close_async()
     db_manager.close()
     logger.info("Application shutdown complete")
 
 
 def create_default_admin():
-    """Create default admin user if not exists"""
+    """Create default admin user if not exists, holding an admin role granting everything"""
     from app.database import get_db_manager
-    from app.models import User
+    from app.models import Role, Rule, User
     from app.utils.auth import hash_password
     
     db_manager = get_db_manager()
@@ -82,6 +107,13 @@ def create_default_admin():
             logger.info("Default admin user created (admin/123456)")
         else:
             logger.info("Admin user already exists")
+        
+        # RBAC routes are guarded too, so someone must be able to grant the first roles
+        if not db.query(Role).filter(Role.name == "admin").first():
+            rule = Rule(name="admin_all", resource="*", operation="*", description="Every operation on every resource")
+            db.add(Role(name="admin", description="Administrator role", rules=[rule], users=[admin]))
+            db.commit()
+            logger.info("Default admin role created")
     except Exception as e:
         logger.error(f"Failed to create admin user: {e}")
         db.rollback()
@@ -89,6 +121,19 @@ def create_default_admin():
         db.close()
 
 
+def load_ids(kind: str) -> list:
+    """Get the IDs of every user or post, for the cache's Bloom filters"""
+    from app.database import get_db_manager
+    from app.models import Post, User
+    
+    model = {"user": User, "post": Post}[kind]
+    db = next(get_db_manager().get_session())
+    try:
+        return [row.id for row in db.query(model.id)]
+    finally:
+        db.close()
+
+
 def create_app() -> FastAPI:
     """Create and configure FastAPI application"""
     config = get_config()
@@ -103,7 +148,7 @@ def create_app() -> FastAPI:
     # Add middleware in correct order
     app.add_middleware(ErrorHandlingMiddleware)
     app.add_middleware(AuthenticationMiddleware)
-    app.add_middleware(RateLimitMiddleware)
+    app.add_middleware(RateLimitMiddleware, configs=config.server.rate_limits)
     app.add_middleware(LoggingMiddleware)
     app.add_middleware(RequestIDMiddleware)
     app.add_middleware(
@@ -136,6 +181,12 @@ def create_app() -> FastAPI:
             "environment": config.server.env
         }
     
+    # Metrics endpoint (Prometheus text format), for authenticated scrapers only
+    @app.get("/metrics", response_class=PlainTextResponse,
+             dependencies=[Depends(require_permission("metrics", "read"))])
+    async def metrics():
+        return render_prometheus()
+    
     # Root endpoint
     @app.get("/")
     async def root():
@@ -1,56 +1,103 @@
-"""Middleware implementations"""
+"""Middleware implementations
 
+All middlewares are plain ASGI callables rather than ``BaseHTTPMiddleware``
+subclasses, so they add no extra task or body-stream wrapping per request and
+streaming responses pass through untouched. Non-HTTP scopes (lifespan,
+websocket) are forwarded as-is.
+"""
+
+import json
 import logging
 import time
 import uuid
-from typing import Callable
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
+from typing import List, Optional
+from starlette.datastructures import Headers, MutableHeaders
 from starlette.middleware.cors import CORSMiddleware
-from app.utils.auth import verify_token, extract_token_from_header
-from app.utils.errors import UnauthorizedException, ForbiddenException
-from app.config import get_config
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.utils.auth import verify_token_cached, extract_token_from_header
+from app.utils.errors import AppException, UnauthorizedException, ForbiddenException
+from app.config import get_config, RateLimitConfig
+from app.utils.ratelimit import REDIS_RETRY_INTERVAL, REDIS_SOCKET_TIMEOUT, create_rate_limiter
+from app.utils.redis_client import AsyncRedisClient
 
 logger = logging.getLogger(__name__)
 
 
-class RequestIDMiddleware(BaseHTTPMiddleware):
+def _request_path(scope: Scope) -> str:
+    """Get the request path the same way ``Request.url.path`` does"""
+    return scope.get("root_path", "") + scope["path"]
+
+
+def _json_response(content: dict, status_code: int) -> Response:
+    """Build a JSON error response"""
+    return Response(
+        content=json.dumps(content),
+        status_code=status_code,
+        media_type="application/json"
+    )
+
+
+class RequestIDMiddleware:
     """Add unique request ID to each request"""
-    
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
         request_id = str(uuid.uuid4())
-        request.state.request_id = request_id
-        
-        response = await call_next(request)
-        response.headers["X-Request-ID"] = request_id
-        
-        return response
+        scope.setdefault("state", {})["request_id"] = request_id
+
+        async def send_with_request_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers["X-Request-ID"] = request_id
+            await send(message)
 
+        await self.app(scope, receive, send_with_request_id)
 
-class LoggingMiddleware(BaseHTTPMiddleware):
+
+class LoggingMiddleware:
     """Log all requests and responses"""
-    
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        path = _request_path(scope)
+        status_code = 500
         start_time = time.time()
-        
-        logger.info(f"Request: {request.method} {request.url.path}")
-        
+
+        logger.info(f"Request: {method} {path}")
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
         try:
-            response = await call_next(request)
+            await self.app(scope, receive, send_with_status)
         except Exception as exc:
-            duration = time.time() - start_time
-            logger.error(f"Request failed: {request.method} {request.url.path} - {exc}")
+            logger.error(f"Request failed: {method} {path} - {exc}")
             raise
-        
+
         duration = time.time() - start_time
-        logger.info(f"Response: {request.method} {request.url.path} {response.status_code} ({duration:.2f}s)")
-        
-        return response
+        logger.info(f"Response: {method} {path} {status_code} ({duration:.2f}s)")
 
 
-class AuthenticationMiddleware(BaseHTTPMiddleware):
+class AuthenticationMiddleware:
     """Verify JWT token in requests"""
-    
+
     EXCLUDED_PATHS = {
         "/",
         "/healthz",
@@ -68,59 +115,61 @@ class AuthenticationMiddleware(BaseHTTPMiddleware):
         "/api/v1/auth/register",
         "/api/v1/auth/oauth",
     }
-    
+
     EXCLUDED_PREFIXES = (
         "/docs",
         "/static",
     )
-    
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        path = request.url.path
-        
-        # Skip authentication for excluded paths
-        if path in self.EXCLUDED_PATHS:
-            return await call_next(request)
-        
-        # Skip authentication for excluded prefixes
-        if path.startswith(self.EXCLUDED_PREFIXES):
-            return await call_next(request)
-        
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        path = _request_path(scope)
+
+        # Skip authentication for excluded paths and prefixes
+        if path in self.EXCLUDED_PATHS or path.startswith(self.EXCLUDED_PREFIXES):
+            await self.app(scope, receive, send)
+            return
+
         # Extract token from header
-        auth_header = request.headers.get("Authorization")
+        auth_header = Headers(scope=scope).get("Authorization")
         token = extract_token_from_header(auth_header)
-        
+
         if not token:
-            # Return JSON response instead of raising exception
-            return Response(
-                content='{"success": false, "message": "Missing or invalid authorization header"}',
-                status_code=401,
-                media_type="application/json"
+            response = _json_response(
+                {"success": False, "message": "Missing or invalid authorization header"}, 401
             )
-        
+            await response(scope, receive, send)
+            return
+
         # Verify token
-        token_data = verify_token(token)
+        token_data = verify_token_cached(token)
         if not token_data:
-            return Response(
-                content='{"success": false, "message": "Invalid or expired token"}',
-                status_code=401,
-                media_type="application/json"
-            )
-        
+            response = _json_response({"success": False, "message": "Invalid or expired token"}, 401)
+            await response(scope, receive, send)
+            return
+
         # Store token data in request state
-        request.state.user_id = token_data.user_id
-        request.state.username = token_data.username
-        
-        return await call_next(request)
+        state = scope.setdefault("state", {})
+        state["user_id"] = token_data.user_id
+        state["username"] = token_data.username
+
+        await self.app(scope, receive, send)
 
 
 class CORSMiddlewareConfig:
     """CORS configuration"""
-    
+
     @staticmethod
     def get_middleware(app):
         """Add CORS middleware to app"""
         config = get_config()
-        
+
         return CORSMiddleware(
             app=app,
             allow_origins=["*"],  # Configure based on environment
@@ -130,63 +179,98 @@ class CORSMiddlewareConfig:
         )
 
 
-class RateLimitMiddleware(BaseHTTPMiddleware):
-    """Simple rate limiting middleware"""
-    
-    def __init__(self, app, requests_per_minute: int = 60):
-        super().__init__(app)
-        self.requests_per_minute = requests_per_minute
-        self.requests = {}
-    
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+class RateLimitMiddleware:
+    """Token-bucket rate limiting driven by ``server.rate_limits``"""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        configs: Optional[List[RateLimitConfig]] = None,
+        redis_client: Optional[AsyncRedisClient] = None
+    ):
+        self.app = app
+        configs = configs or []
+
+        if redis_client is None and any(c.distributed for c in configs) and get_config().redis.enable:
+            # Connected from the event loop on the first request
+            redis_client = AsyncRedisClient(socket_timeout=REDIS_SOCKET_TIMEOUT)
+        self.redis_client = redis_client
+        self.connect_at = 0.0
+
+        self.limiters = [create_rate_limiter(c, redis_client) for c in configs]
+
+    async def _connect(self) -> None:
+        """Connect the limiters' Redis client, retrying after REDIS_RETRY_INTERVAL on failure"""
+        if self.redis_client is None or self.redis_client.enabled or time.monotonic() < self.connect_at:
+            return
+        self.connect_at = time.monotonic() + REDIS_RETRY_INTERVAL
+        await self.redis_client.connect()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.limiters:
+            await self.app(scope, receive, send)
+            return
+
+        await self._connect()
+
         # Get client IP
-        client_ip = request.client.host if request.client else "unknown"
-        
-        # Check rate limit (simplified - use Redis for production)
-        current_time = time.time()
-        if client_ip not in self.requests:
-            self.requests[client_ip] = []
-        
-        # Remove requests older than 1 minute
-        self.requests[client_ip] = [
-            req_time for req_time in self.requests[client_ip]
-            if current_time - req_time < 60
-        ]
-        
-        # Check if limit exceeded
-        if len(self.requests[client_ip]) >= self.requests_per_minute:
-            return Response("Rate limit exceeded", status_code=429)
-        
-        # Add current request
-        self.requests[client_ip].append(current_time)
-        
-        return await call_next(request)
-
-
-class ErrorHandlingMiddleware(BaseHTTPMiddleware):
+        client = scope.get("client")
+        client_ip = client[0] if client else "unknown"
+
+        for limiter in self.limiters:
+            allowed = await limiter.allow(client_ip) if limiter.distributed else limiter.allow(client_ip)
+            if not allowed:
+                logger.debug(f"Rate limit reached on {limiter.limit_type} for {client_ip}")
+                response = Response("Rate limit exceeded", status_code=429)
+                await response(scope, receive, send)
+                return
+
+        await self.app(scope, receive, send)
+
+
+class ErrorHandlingMiddleware:
     """Handle exceptions and return proper error responses"""
-    
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        response_started = False
+
+        async def send_tracking_start(message: Message) -> None:
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
         try:
-            return await call_next(request)
+            await self.app(scope, receive, send_tracking_start)
+            return
         except UnauthorizedException as e:
             logger.warning(f"Unauthorized: {e.message}")
-            return Response(
-                content=f'{{"success": false, "message": "{e.message}"}}',
-                status_code=401,
-                media_type="application/json"
-            )
+            if response_started:
+                raise
+            response = _json_response({"success": False, "message": e.message}, 401)
         except ForbiddenException as e:
             logger.warning(f"Forbidden: {e.message}")
-            return Response(
-                content=f'{{"success": false, "message": "{e.message}"}}',
-                status_code=403,
-                media_type="application/json"
-            )
+            if response_started:
+                raise
+            response = _json_response({"success": False, "message": e.message}, 403)
+        except AppException as e:
+            logger.warning(f"{type(e).__name__}: {e.message}")
+            if response_started:
+                raise
+            response = _json_response({"success": False, "message": e.message}, e.status_code)
         except Exception as e:
             logger.error(f"Unexpected error: {e}")
-            return Response(
-                content=f'{{"success": false, "message": "Internal server error", "error": "{str(e)}"}}',
-                status_code=500,
-                media_type="application/json"
+            if response_started:
+                raise
+            response = _json_response(
+                {"success": False, "message": "Internal server error", "error": str(e)}, 500
             )
+
+        await response(scope, receive, send)
@@ -2,7 +2,7 @@
 
 from datetime import datetime
 from typing import List, Optional, Dict, Any
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, Table, JSON
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, Table, JSON, Index
 from sqlalchemy.orm import relationship
 from app.database import Base
 
@@ -50,6 +50,15 @@ post_categories = Table(
     Column('category_id', Integer, ForeignKey('categories.id'), primary_key=True)
 )
 
+# View count batches already added to posts.view_count, so that a batch
+# replayed after a crash is not counted twice
+view_flushes = Table(
+    'view_flushes',
+    Base.metadata,
+    Column('batch_id', String(32), primary_key=True),
+    Column('flushed_at', DateTime, default=datetime.utcnow, nullable=False, index=True)
+)
+
 
 class BaseModel(Base):
     """Base model with common fields"""
@@ -64,9 +73,12 @@ class BaseModel(Base):
 class User(BaseModel):
     """User model"""
     __tablename__ = 'users'
+    __table_args__ = (
+        Index('ix_users_deleted_at', 'deleted_at'),
+    )
     
     name = Column(String(100), unique=True, nullable=False)
-    email = Column(String(256), nullable=True)
+    email = Column(String(256), nullable=True, index=True)
     password = Column(String(256), nullable=True)
     avatar = Column(String(256), nullable=True)
     
@@ -97,6 +109,9 @@ class User(BaseModel):
 class AuthInfo(BaseModel):
     """OAuth authentication information"""
     __tablename__ = 'auth_infos'
+    __table_args__ = (
+        Index('ix_auth_infos_auth_type_auth_id', 'auth_type', 'auth_id'),
+    )
     
     user_id = Column(Integer, ForeignKey('users.id'), nullable=False)
     url = Column(String(256), nullable=True)
@@ -150,11 +165,16 @@ class Rule(BaseModel):
 class Post(BaseModel):
     """Blog post model"""
     __tablename__ = 'posts'
+    __table_args__ = (
+        # Covers the (created_at, id) keyset ordering of the post list
+        Index('ix_posts_created_at_id', 'created_at', 'id'),
+        Index('ix_posts_deleted_at', 'deleted_at'),
+    )
     
     title = Column(String(256), nullable=False)
     content = Column(Text, nullable=False)
     summary = Column(String(500), nullable=True)
-    author_id = Column(Integer, ForeignKey('users.id'), nullable=False)
+    author_id = Column(Integer, ForeignKey('users.id'), nullable=False, index=True)
     view_count = Column(Integer, default=0)
     
     # Relationships
@@ -163,6 +183,19 @@ class Post(BaseModel):
     likes = relationship("Like", back_populates="post", cascade="all, delete-orphan")
     tags = relationship("Tag", secondary=post_tags, back_populates="posts")
     categories = relationship("Category", secondary=post_categories, back_populates="posts")
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary"""
+        return {
+            'id': self.id,
+            'title': self.title,
+            'content': self.content,
+            'summary': self.summary,
+            'author_id': self.author_id,
+            'view_count': self.view_count or 0,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+        }
 
 
 class Comment(BaseModel):
@@ -170,7 +203,7 @@ class Comment(BaseModel):
     __tablename__ = 'comments'
     
     content = Column(Text, nullable=False)
-    post_id = Column(Integer, ForeignKey('posts.id'), nullable=False)
+    post_id = Column(Integer, ForeignKey('posts.id'), nullable=False, index=True)
     author_id = Column(Integer, ForeignKey('users.id'), nullable=False)
     
     # Relationships
@@ -181,9 +214,13 @@ class Comment(BaseModel):
 class Like(BaseModel):
     """Like model"""
     __tablename__ = 'likes'
+    __table_args__ = (
+        # A user can like a post once
+        Index('uq_likes_user_id_post_id', 'user_id', 'post_id', unique=True),
+    )
     
     user_id = Column(Integer, ForeignKey('users.id'), nullable=False)
-    post_id = Column(Integer, ForeignKey('posts.id'), nullable=False)
+    post_id = Column(Integer, ForeignKey('posts.id'), nullable=False, index=True)
     
     # Relationships
     user = relationship("User", back_populates="likes")
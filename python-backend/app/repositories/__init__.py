@@ -1,11 +1,15 @@
 """User repository"""
 
 import logging
-from typing import Optional, List
-from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from typing import Optional, List, Tuple
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import desc, select
 from app.models import User
-from app.utils.redis_client import get_cache_manager
+from app.schemas import UserResponse, PostResponse
+from app.services.permission_index import get_permission_index
+from app.utils.redis_client import get_cache_manager, get_async_cache_manager
+from app.utils.pagination import apply_keyset, split_page
 
 logger = logging.getLogger(__name__)
 
@@ -16,6 +20,7 @@ class UserRepository:
     def __init__(self, db: Session):
         self.db = db
         self.cache = get_cache_manager()
+        self.permissions = get_permission_index()
     
     def create(self, user: User) -> User:
         """Create a new user"""
@@ -23,26 +28,38 @@ class UserRepository:
         self.db.commit()
         self.db.refresh(user)
         
-        # Cache the user
+        # Evict negative entries for the new ID everywhere, then cache the user
+        self.cache.invalidate_user(user.id)
         self.cache.cache_user(user.id, user.to_dict(), ttl=86400)
         
         return user
     
     def get_by_id(self, user_id: int) -> Optional[User]:
-        """Get user by ID with caching"""
-        # Try to get from cache first
-        cached = self.cache.get_cached_user(user_id)
-        if cached:
-            logger.debug(f"User {user_id} retrieved from cache")
-            # Note: In production, you'd hydrate the object from cache
-            # For now, we still query the DB to get full relationships
-        
-        user = self.db.query(User).filter(User.id == user_id).first()
-        if user:
-            # Update cache
-            self.cache.cache_user(user.id, user.to_dict(), ttl=86400)
+        """Get user by ID from the database, for callers that modify it"""
+        return self.db.query(User).filter(User.id == user_id).first()
+    
+    def get_view(self, user_id: int) -> Optional[UserResponse]:
+        """Get a read-only view of a user, served from the cache when possible"""
+        def load():
+            user = self.get_by_id(user_id)
+            return user.to_dict() if user else None
         
-        return user
+        data = self.cache.get_or_load(f"user:{user_id}", load, ttl=86400)
+        return UserResponse.model_validate(data) if data else None
+    
+    def get_views(self, user_ids: List[int]) -> List[UserResponse]:
+        """Get read-only views of users in ``user_ids`` order.
+
+        Cached users are fetched in one round trip; the rest are loaded with a
+        single ``WHERE id IN (...)`` query and cached together.
+        """
+        found = self.cache.get_cached_users(user_ids)
+        missing = [i for i in user_ids if i not in found]
+        if missing:
+            loaded = {u.id: u.to_dict() for u in self.db.query(User).filter(User.id.in_(missing))}
+            self.cache.cache_users(loaded, ttl=86400)
+            found.update(loaded)
+        return [UserResponse.model_validate(found[i]) for i in user_ids if i in found]
     
     def get_by_name(self, name: str) -> Optional[User]:
         """Get user by name"""
@@ -56,6 +73,24 @@ class UserRepository:
         """List all users with pagination"""
         return self.db.query(User).order_by(User.name).offset(skip).limit(limit).all()
     
+    def list_page(self, cursor: Optional[str] = None, limit: int = 100) -> Tuple[List[User], Optional[str]]:
+        """List users ordered by (name, id) after ``cursor``"""
+        keys = (User.name, User.id)
+        rows = apply_keyset(self.db.query(User), keys, cursor, limit).all()
+        return split_page(rows, keys, limit)
+    
+    def list_views(self, skip: int = 0, limit: int = 100) -> List[UserResponse]:
+        """List user views; only the ids come from the database when cached"""
+        ids = [row.id for row in self.db.query(User.id).order_by(User.name).offset(skip).limit(limit)]
+        return self.get_views(ids)
+    
+    def list_page_views(self, cursor: Optional[str] = None,
+                        limit: int = 100) -> Tuple[List[UserResponse], Optional[str]]:
+        """Keyset page of user views ordered by (name, id)"""
+        keys = (User.name, User.id)
+        ids = [row.id for row in apply_keyset(self.db.query(User.id), keys, cursor, limit)]
+        return split_page(self.get_views(ids), keys, limit)
+    
     def update(self, user: User) -> User:
         """Update user"""
         self.db.merge(user)
@@ -78,12 +113,16 @@ class UserRepository:
         
         # Invalidate cache
         self.cache.invalidate_user(user_id)
+        self.permissions.bump()
         
         return True
     
+    def _get_with_groups(self, user_id: int) -> Optional[User]:
+        return self.db.query(User).options(selectinload(User.groups)).filter(User.id == user_id).first()
+    
     def add_to_group(self, user_id: int, group) -> bool:
         """Add user to group"""
-        user = self.db.query(User).filter(User.id == user_id).first()
+        user = self._get_with_groups(user_id)
         if not user:
             return False
         
@@ -91,12 +130,13 @@ class UserRepository:
             user.groups.append(group)
             self.db.commit()
             self.cache.invalidate_user(user_id)
+            self.permissions.bump()
         
         return True
     
     def remove_from_group(self, user_id: int, group) -> bool:
         """Remove user from group"""
-        user = self.db.query(User).filter(User.id == user_id).first()
+        user = self._get_with_groups(user_id)
         if not user:
             return False
         
@@ -104,6 +144,7 @@ class UserRepository:
             user.groups.remove(group)
             self.db.commit()
             self.cache.invalidate_user(user_id)
+            self.permissions.bump()
         
         return True
 
@@ -113,6 +154,7 @@ class GroupRepository:
     
     def __init__(self, db: Session):
         self.db = db
+        self.permissions = get_permission_index()
     
     def create(self, group) -> None:
         """Create a new group"""
@@ -134,6 +176,13 @@ class GroupRepository:
         from app.models import Group
         return self.db.query(Group).offset(skip).limit(limit).all()
     
+    def list_page(self, cursor: Optional[str] = None, limit: int = 100):
+        """List groups ordered by id after ``cursor``"""
+        from app.models import Group
+        keys = (Group.id,)
+        rows = apply_keyset(self.db.query(Group), keys, cursor, limit).all()
+        return split_page(rows, keys, limit)
+    
     def update(self, group):
         """Update group"""
         self.db.merge(group)
@@ -148,6 +197,8 @@ class GroupRepository:
         
         self.db.delete(group)
         self.db.commit()
+        # Members lose the group's roles
+        self.permissions.bump()
         return True
 
 
@@ -162,28 +213,65 @@ class PostRepository:
         """Create a new post"""
         self.db.add(post)
         self.db.commit()
-        self.cache.cache_post(post.id, post.to_dict() if hasattr(post, 'to_dict') else {})
+        # Evict negative entries for the new ID everywhere, then cache the post
+        self.cache.invalidate_post(post.id)
+        self.cache.cache_post(post.id, post.to_dict())
     
     def get_by_id(self, post_id: int):
-        """Get post by ID with caching"""
+        """Get post by ID from the database, for callers that modify it"""
         from app.models import Post
+        return self.db.query(Post).filter(Post.id == post_id).first()
+    
+    def get_view(self, post_id: int) -> Optional[PostResponse]:
+        """Get a read-only view of a post, served from the cache when possible"""
+        def load():
+            post = self.get_by_id(post_id)
+            return post.to_dict() if post else None
         
-        # Try cache first
-        cached = self.cache.get_cached_post(post_id)
-        if cached:
-            logger.debug(f"Post {post_id} retrieved from cache")
-        
-        post = self.db.query(Post).filter(Post.id == post_id).first()
-        if post:
-            self.cache.cache_post(post.id, post.to_dict() if hasattr(post, 'to_dict') else {})
-        
-        return post
+        data = self.cache.get_or_load(f"post:{post_id}", load, ttl=3600)
+        return PostResponse.model_validate(data) if data else None
+    
+    def get_views(self, post_ids: List[int]) -> List[PostResponse]:
+        """Get read-only views of posts in ``post_ids`` order.
+
+        Cached posts are fetched in one round trip; the rest are loaded with a
+        single ``WHERE id IN (...)`` query and cached together.
+        """
+        from app.models import Post
+        found = self.cache.get_cached_posts(post_ids)
+        missing = [i for i in post_ids if i not in found]
+        if missing:
+            loaded = {p.id: p.to_dict() for p in self.db.query(Post).filter(Post.id.in_(missing))}
+            self.cache.cache_posts(loaded)
+            found.update(loaded)
+        return [PostResponse.model_validate(found[i]) for i in post_ids if i in found]
     
     def list(self, skip: int = 0, limit: int = 100):
         """List all posts"""
         from app.models import Post
         return self.db.query(Post).order_by(desc(Post.created_at)).offset(skip).limit(limit).all()
     
+    def list_page(self, cursor: Optional[str] = None, limit: int = 100):
+        """List posts newest first, ordered by (created_at, id) after ``cursor``"""
+        from app.models import Post
+        keys = (Post.created_at, Post.id)
+        rows = apply_keyset(self.db.query(Post), keys, cursor, limit, descending=True).all()
+        return split_page(rows, keys, limit)
+    
+    def list_views(self, skip: int = 0, limit: int = 100) -> List[PostResponse]:
+        """List post views newest first; only the ids come from the database when cached"""
+        from app.models import Post
+        query = self.db.query(Post.id).order_by(desc(Post.created_at)).offset(skip).limit(limit)
+        return self.get_views([row.id for row in query])
+    
+    def list_page_views(self, cursor: Optional[str] = None,
+                        limit: int = 100) -> Tuple[List[PostResponse], Optional[str]]:
+        """Keyset page of post views, newest first"""
+        from app.models import Post
+        keys = (Post.created_at, Post.id)
+        query = apply_keyset(self.db.query(Post.id), keys, cursor, limit, descending=True)
+        return split_page(self.get_views([row.id for row in query]), keys, limit)
+    
     def list_by_author(self, author_id: int, skip: int = 0, limit: int = 100):
         """List posts by author"""
         from app.models import Post
@@ -206,3 +294,264 @@ class PostRepository:
         self.db.commit()
         self.cache.invalidate_post(post_id)
         return True
+
+
+
+class AsyncUserRepository:
+    """User data access layer on an AsyncSession"""
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.cache = get_async_cache_manager()
+        self.permissions = get_permission_index()
+    
+    async def create(self, user: User) -> User:
+        """Create a new user"""
+        self.db.add(user)
+        await self.db.commit()
+        await self.db.refresh(user)
+        
+        # Evict negative entries for the new ID everywhere, then cache the user
+        await self.cache.invalidate_user(user.id)
+        await self.cache.cache_user(user.id, user.to_dict(), ttl=86400)
+        
+        return user
+    
+    async def get_by_id(self, user_id: int) -> Optional[User]:
+        """Get user by ID from the database, for callers that modify it"""
+        return await self.db.get(User, user_id)
+    
+    async def get_view(self, user_id: int) -> Optional[UserResponse]:
+        """Get a read-only view of a user, served from the cache when possible"""
+        async def load():
+            # Early refreshes run after the request, so use a session of our own
+            async with AsyncSession(self.db.bind) as session:
+                user = await session.get(User, user_id)
+                return user.to_dict() if user else None
+        
+        data = await self.cache.get_or_load(f"user:{user_id}", load, ttl=86400)
+        return UserResponse.model_validate(data) if data else None
+    
+    async def get_by_name(self, name: str) -> Optional[User]:
+        """Get user by name"""
+        result = await self.db.execute(select(User).where(User.name == name))
+        return result.scalars().first()
+    
+    async def get_by_email(self, email: str) -> Optional[User]:
+        """Get user by email"""
+        result = await self.db.execute(select(User).where(User.email == email))
+        return result.scalars().first()
+    
+    async def list(self, skip: int = 0, limit: int = 100) -> List[User]:
+        """List all users with pagination"""
+        result = await self.db.execute(select(User).order_by(User.name).offset(skip).limit(limit))
+        return list(result.scalars().all())
+    
+    async def list_page(self, cursor: Optional[str] = None, limit: int = 100) -> Tuple[List[User], Optional[str]]:
+        """List users ordered by (name, id) after ``cursor``"""
+        keys = (User.name, User.id)
+        result = await self.db.execute(apply_keyset(select(User), keys, cursor, limit))
+        return split_page(result.scalars().all(), keys, limit)
+    
+    async def update(self, user: User) -> User:
+        """Update user"""
+        await self.db.merge(user)
+        await self.db.commit()
+        await self.db.refresh(user)
+        
+        # Invalidate cache
+        await self.cache.invalidate_user(user.id)
+        
+        return user
+    
+    async def delete(self, user_id: int) -> bool:
+        """Delete user"""
+        # Collections touched by the delete cascade must be loaded up front
+        user = await self.db.get(
+            User, user_id,
+            options=[selectinload(User.auth_infos), selectinload(User.groups), selectinload(User.roles)]
+        )
+        if not user:
+            return False
+        
+        await self.db.delete(user)
+        await self.db.commit()
+        
+        # Invalidate cache
+        await self.cache.invalidate_user(user_id)
+        self.permissions.bump()
+        
+        return True
+    
+    async def _get_with_groups(self, user_id: int) -> Optional[User]:
+        # Relationships cannot lazy-load on an AsyncSession, so load groups eagerly
+        result = await self.db.execute(
+            select(User).options(selectinload(User.groups)).where(User.id == user_id)
+        )
+        return result.scalars().first()
+    
+    async def add_to_group(self, user_id: int, group) -> bool:
+        """Add user to group"""
+        user = await self._get_with_groups(user_id)
+        if not user:
+            return False
+        
+        if group not in user.groups:
+            user.groups.append(group)
+            await self.db.commit()
+            await self.cache.invalidate_user(user_id)
+            self.permissions.bump()
+        
+        return True
+    
+    async def remove_from_group(self, user_id: int, group) -> bool:
+        """Remove user from group"""
+        user = await self._get_with_groups(user_id)
+        if not user:
+            return False
+        
+        if group in user.groups:
+            user.groups.remove(group)
+            await self.db.commit()
+            await self.cache.invalidate_user(user_id)
+            self.permissions.bump()
+        
+        return True
+
+
+class AsyncGroupRepository:
+    """Group data access layer on an AsyncSession"""
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.permissions = get_permission_index()
+    
+    async def create(self, group) -> None:
+        """Create a new group"""
+        self.db.add(group)
+        await self.db.commit()
+    
+    async def get_by_id(self, group_id: int):
+        """Get group by ID"""
+        from app.models import Group
+        return await self.db.get(Group, group_id)
+    
+    async def get_by_name(self, name: str):
+        """Get group by name"""
+        from app.models import Group
+        result = await self.db.execute(select(Group).where(Group.name == name))
+        return result.scalars().first()
+    
+    async def list(self, skip: int = 0, limit: int = 100):
+        """List all groups"""
+        from app.models import Group
+        result = await self.db.execute(select(Group).offset(skip).limit(limit))
+        return list(result.scalars().all())
+    
+    async def list_page(self, cursor: Optional[str] = None, limit: int = 100):
+        """List groups ordered by id after ``cursor``"""
+        from app.models import Group
+        keys = (Group.id,)
+        result = await self.db.execute(apply_keyset(select(Group), keys, cursor, limit))
+        return split_page(result.scalars().all(), keys, limit)
+    
+    async def update(self, group):
+        """Update group"""
+        await self.db.merge(group)
+        await self.db.commit()
+    
+    async def delete(self, group_id: int) -> bool:
+        """Delete group"""
+        from app.models import Group
+        group = await self.db.get(
+            Group, group_id, options=[selectinload(Group.users), selectinload(Group.roles)]
+        )
+        if not group:
+            return False
+        
+        await self.db.delete(group)
+        await self.db.commit()
+        # Members lose the group's roles
+        self.permissions.bump()
+        return True
+
+
+class AsyncPostRepository:
+    """Post data access layer on an AsyncSession"""
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.cache = get_async_cache_manager()
+    
+    async def create(self, post) -> None:
+        """Create a new post"""
+        self.db.add(post)
+        await self.db.commit()
+        # Evict negative entries for the new ID everywhere, then cache the post
+        await self.cache.invalidate_post(post.id)
+        await self.cache.cache_post(post.id, post.to_dict())
+    
+    async def get_by_id(self, post_id: int):
+        """Get post by ID from the database, for callers that modify it"""
+        from app.models import Post
+        return await self.db.get(Post, post_id)
+    
+    async def get_view(self, post_id: int) -> Optional[PostResponse]:
+        """Get a read-only view of a post, served from the cache when possible"""
+        from app.models import Post
+        
+        async def load():
+            # Early refreshes run after the request, so use a session of our own
+            async with AsyncSession(self.db.bind) as session:
+                post = await session.get(Post, post_id)
+                return post.to_dict() if post else None
+        
+        data = await self.cache.get_or_load(f"post:{post_id}", load, ttl=3600)
+        return PostResponse.model_validate(data) if data else None
+    
+    async def list(self, skip: int = 0, limit: int = 100):
+        """List all posts"""
+        from app.models import Post
+        result = await self.db.execute(
+            select(Post).order_by(desc(Post.created_at)).offset(skip).limit(limit)
+        )
+        return list(result.scalars().all())
+    
+    async def list_page(self, cursor: Optional[str] = None, limit: int = 100):
+        """List posts newest first, ordered by (created_at, id) after ``cursor``"""
+        from app.models import Post
+        keys = (Post.created_at, Post.id)
+        result = await self.db.execute(apply_keyset(select(Post), keys, cursor, limit, descending=True))
+        return split_page(result.scalars().all(), keys, limit)
+    
+    async def list_by_author(self, author_id: int, skip: int = 0, limit: int = 100):
+        """List posts by author"""
+        from app.models import Post
+        result = await self.db.execute(
+            select(Post).where(Post.author_id == author_id).offset(skip).limit(limit)
+        )
+        return list(result.scalars().all())
+    
+    async def update(self, post):
+        """Update post"""
+        await self.db.merge(post)
+        await self.db.commit()
+        await self.cache.invalidate_post(post.id)
+    
+    async def delete(self, post_id: int) -> bool:
+        """Delete post"""
+        from app.models import Post
+        post = await self.db.get(
+            Post, post_id,
+            options=[
+                selectinload(Post.comments), selectinload(Post.likes),
+                selectinload(Post.tags), selectinload(Post.categories)
+            ]
+        )
+        if not post:
+            return False
+        
+        await self.db.delete(post)
+        await self.db.commit()
+        await self.cache.invalidate_post(post_id)
+        return True
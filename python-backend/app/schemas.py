@@ -175,6 +175,18 @@ class RuleResponse(RuleBase):
         from_attributes = True
 
 
+class PermissionCheck(BaseModel):
+    """A resource operation to check"""
+    resource: str
+    operation: str
+
+
+class BatchPermissionCheck(BaseModel):
+    """Batch permission check schema"""
+    user_id: int
+    checks: List[PermissionCheck] = Field(..., max_length=1000)
+
+
 # Standard response schema
 class StandardResponse(BaseModel):
     """Standard API response schema"""
@@ -185,11 +197,16 @@ class StandardResponse(BaseModel):
 
 
 class PaginatedResponse(BaseModel):
-    """Paginated response schema"""
+    """Paginated response schema
+
+    Cursor pages leave ``total``, ``page`` and ``total_pages`` unset and return
+    ``next_cursor`` instead; it is None on the last page.
+    """
     success: bool
     message: str
     data: List[Any]
-    total: int
-    page: int
+    total: Optional[int] = None
+    page: Optional[int] = None
     page_size: int
-    total_pages: int
+    total_pages: Optional[int] = None
+    next_cursor: Optional[str] = None
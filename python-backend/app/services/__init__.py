@@ -1,3 +1,3 @@
 """Services package"""
 
-__all__ = ['auth_service', 'rbac_service']
+__all__ = ['auth_service', 'password_service', 'permission_index', 'rbac_service', 'view_counter']
@@ -4,7 +4,8 @@ import logging
 from typing import Optional, Tuple
 from sqlalchemy.orm import Session
 from app.models import User, AuthInfo
-from app.utils.auth import hash_password, verify_password, create_access_token
+from app.utils.auth import create_access_token
+from app.services.password_service import get_password_service
 from app.utils.redis_client import get_cache_manager
 
 logger = logging.getLogger(__name__)
@@ -16,8 +17,9 @@ class AuthService:
     def __init__(self, db: Session):
         self.db = db
         self.cache = get_cache_manager()
+        self.passwords = get_password_service()
     
-    def register(self, username: str, email: str, password: str) -> Tuple[bool, Optional[User], str]:
+    async def register(self, username: str, email: str, password: str) -> Tuple[bool, Optional[User], str]:
         """Register a new user"""
         try:
             # Check if username already exists
@@ -32,7 +34,7 @@ class AuthService:
                     return False, None, "Email already exists"
             
             # Create new user
-            hashed_password = hash_password(password)
+            hashed_password = await self.passwords.hash(password)
             new_user = User(
                 name=username,
                 email=email,
@@ -42,6 +44,8 @@ class AuthService:
             self.db.add(new_user)
             self.db.commit()
             self.db.refresh(new_user)
+            # Evict negative entries for the new ID
+            self.cache.invalidate_user(new_user.id)
             
             logger.info(f"New user registered: {username}")
             return True, new_user, "User registered successfully"
@@ -51,7 +55,7 @@ class AuthService:
             logger.error(f"Failed to register user: {e}")
             return False, None, f"Registration failed: {str(e)}"
     
-    def login(self, username: str, password: str) -> Tuple[bool, Optional[User], Optional[str], str]:
+    async def login(self, username: str, password: str) -> Tuple[bool, Optional[User], Optional[str], str]:
         """Login user and return access token"""
         try:
             # Find user by username
@@ -60,7 +64,7 @@ class AuthService:
                 return False, None, None, "Invalid username or password"
             
             # Verify password
-            if not verify_password(password, user.password or ""):
+            if not await self.passwords.verify(password, user.password or ""):
                 return False, None, None, "Invalid username or password"
             
             # Create access token
@@ -0,0 +1,110 @@
+"""Password hashing service backed by a process pool"""
+
+import asyncio
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Dict, Any
+from app.config import get_config
+from app.utils.auth import hash_password, verify_password
+from app.utils.metrics import register_stats
+
+logger = logging.getLogger(__name__)
+
+
+class PasswordHashingService:
+    """Run bcrypt hashing and verification off the event loop.
+
+    Each bcrypt call burns ~200ms of CPU, so it runs in a dedicated process
+    pool where it cannot compete with the event loop. At most
+    ``max_concurrency`` operations are submitted to the pool at once; further
+    callers wait on a semaphore and show up in ``queue_depth``.
+    """
+
+    def __init__(self, workers: int = 2, max_concurrency: int = 16):
+        self.workers = workers
+        self.max_concurrency = max_concurrency
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.in_flight = 0
+        self.queue_depth = 0
+        self.completed = 0
+        self.total_seconds = 0.0
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # asyncio primitives are bound to one event loop, so recreate the
+        # semaphore if the service is used from a new loop
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._loop = loop
+        return self._semaphore
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=self.workers)
+            logger.info(f"Password hashing pool started with {self.workers} workers")
+        return self.executor
+
+    async def _run(self, func, *args):
+        semaphore = self._get_semaphore()
+        self.queue_depth += 1
+        try:
+            await semaphore.acquire()
+        finally:
+            self.queue_depth -= 1
+
+        self.in_flight += 1
+        start = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), func, *args)
+        finally:
+            self.in_flight -= 1
+            self.completed += 1
+            self.total_seconds += time.perf_counter() - start
+            semaphore.release()
+
+    async def hash(self, password: str) -> str:
+        """Hash a password using bcrypt"""
+        return await self._run(hash_password, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """Verify a password against its hash"""
+        return await self._run(verify_password, plain_password, hashed_password)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get pool size, queue depth and latency counters"""
+        return {
+            "workers": self.workers,
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "completed": self.completed,
+            "avg_ms": self.total_seconds / self.completed * 1000 if self.completed else 0.0,
+        }
+
+    def shutdown(self) -> None:
+        """Stop the worker processes; the pool restarts on next use"""
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+            logger.info("Password hashing pool stopped")
+
+
+# Global password hashing service instance
+_password_service: Optional[PasswordHashingService] = None
+
+
+def get_password_service() -> PasswordHashingService:
+    """Get the password hashing service instance"""
+    global _password_service
+    if _password_service is None:
+        config = get_config()
+        _password_service = PasswordHashingService(
+            workers=config.server.password_hash_workers,
+            max_concurrency=config.server.password_hash_concurrency
+        )
+        register_stats("password_hashing", _password_service.stats)
+    return _password_service
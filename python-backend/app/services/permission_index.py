@@ -0,0 +1,266 @@
+"""Compiled per-user RBAC permission sets"""
+
+import json
+import logging
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+from app.config import get_config
+from app.utils.metrics import register_stats
+from app.utils.redis_client import InvalidationListener, RedisClient, get_redis_client
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = "rbac:version"
+CHANNEL = "rbac:invalidate"
+
+WILDCARD = "*"
+SEPARATOR = "/"
+
+
+class _TrieNode:
+    """One resource path segment of a ``PermissionSet`` trie"""
+
+    __slots__ = ("children", "operations", "subtree_operations")
+
+    def __init__(self):
+        self.children: Dict[str, "_TrieNode"] = {}
+        # Granted on this exact path, and on every path below it
+        self.operations: Set[str] = set()
+        self.subtree_operations: Set[str] = set()
+
+
+class PermissionSet(frozenset):
+    """A user's (resource, operation) pairs, with wildcard matching.
+
+    Resources are ``/``-separated paths. A rule resource ending in ``/*``
+    grants everything below that path (``posts/*`` covers ``posts/1`` and
+    ``posts/1/comments`` but not ``posts``), ``*`` alone grants every
+    resource, and operation ``*`` grants every operation. Wildcard rules are
+    compiled into a trie of path segments, so ``allows`` takes time
+    proportional to the depth of the checked resource, not the rule count.
+    A ``*`` anywhere else is matched literally.
+    """
+
+    __slots__ = ("root",)
+
+    def __new__(cls, pairs: Iterable[Tuple[str, str]] = ()):
+        self = super().__new__(cls, pairs)
+        self.root = None
+        for resource, operation in self:
+            if operation == WILDCARD or resource == WILDCARD or resource.endswith(SEPARATOR + WILDCARD):
+                self._insert(resource, operation)
+        return self
+
+    def _insert(self, resource: str, operation: str) -> None:
+        if self.root is None:
+            self.root = _TrieNode()
+        segments = resource.split(SEPARATOR)
+        subtree = segments[-1] == WILDCARD
+        node = self.root
+        for segment in segments[:-1] if subtree else segments:
+            node = node.children.setdefault(segment, _TrieNode())
+        (node.subtree_operations if subtree else node.operations).add(operation)
+
+    def allows(self, resource: str, operation: str) -> bool:
+        """Whether any pair, wildcards included, grants ``operation`` on ``resource``"""
+        if (resource, operation) in self:
+            return True
+        node = self.root
+        if node is None:
+            return False
+        for segment in resource.split(SEPARATOR):
+            granted = node.subtree_operations
+            if granted and (operation in granted or WILDCARD in granted):
+                return True
+            node = node.children.get(segment)
+            if node is None:
+                return False
+        return operation in node.operations or WILDCARD in node.operations
+
+
+def resource_patterns(resource: str) -> List[str]:
+    """Rule resources that grant ``resource``: itself, ``*`` and each ancestor's ``/*``"""
+    segments = resource.split(SEPARATOR)
+    return [resource, WILDCARD] + [
+        SEPARATOR.join(segments[:depth]) + SEPARATOR + WILDCARD for depth in range(1, len(segments))
+    ]
+
+
+class PermissionIndex:
+    """Per-user permission sets, compiled once and cached in memory and Redis.
+
+    A user's (resource, operation) pairs are loaded with one query into a
+    ``PermissionSet`` of interned strings, so an exact check is a single set
+    lookup and a wildcard check walks the resource's path segments. Every
+    entry is tagged with the RBAC version, which ``bump`` increments on any
+    role, rule or membership change; entries of older versions are ignored.
+    The version is kept in Redis and each bump is published, so other workers
+    drop their sets at once. ``ttl`` bounds how stale a worker's sets can be
+    if it misses a bump, e.g. while running without Redis.
+    """
+
+    def __init__(self, redis_client: RedisClient, max_size: int = 10000, ttl: float = 30.0,
+                 redis_ttl: int = 3600, channel: str = CHANNEL):
+        self.redis = redis_client
+        self.max_size = max_size
+        self.ttl = ttl
+        self.redis_ttl = redis_ttl
+        self.channel = channel
+        self.version = 0
+        # False after a bump Redis did not record; compiled sets are then kept
+        # out of Redis until the version is read back from it
+        self.synced = True
+        self.entries: "OrderedDict[int, Tuple[int, PermissionSet, float]]" = OrderedDict()
+        self.lock = threading.Lock()
+        self.listener: Optional[InvalidationListener] = None
+        self.hits = 0
+        self.misses = 0
+        self.compiled = 0
+        self.bumps = 0
+
+    def peek(self, user_id: int) -> Optional[PermissionSet]:
+        """Get a user's permissions if compiled in this process, without I/O"""
+        version = self.version
+        with self.lock:
+            entry = self.entries.get(user_id)
+            if entry is not None and entry[0] == version and entry[2] > time.monotonic():
+                self.entries.move_to_end(user_id)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            return None
+
+    def get(self, user_id: int, loader: Callable[[int], Iterable[Tuple[str, str]]]) -> PermissionSet:
+        """Get a user's permissions, compiling them with ``loader`` on a miss"""
+        permissions = self.peek(user_id)
+        if permissions is not None:
+            return permissions
+        return self.load(user_id, loader)
+
+    def load(self, user_id: int, loader: Callable[[int], Iterable[Tuple[str, str]]]) -> PermissionSet:
+        """Get a user's permissions from Redis or ``loader`` after a ``peek`` miss"""
+        version = self.version
+        shared = self.synced and self.redis.is_enabled()
+        permissions = self._get_shared(user_id, version) if shared else None
+        if permissions is None:
+            permissions = compile_permissions(loader(user_id))
+            self.compiled += 1
+            if shared:
+                self.redis.set(self._key(user_id, version), sorted(permissions), ex=self.redis_ttl)
+        self._put(user_id, version, permissions)
+        return permissions
+
+    def _key(self, user_id: int, version: int) -> str:
+        return f"rbac:perms:{version}:{user_id}"
+
+    def _get_shared(self, user_id: int, version: int) -> Optional[PermissionSet]:
+        value = self.redis.get(self._key(user_id, version))
+        if value is None:
+            return None
+        try:
+            return compile_permissions(json.loads(value))
+        except (TypeError, ValueError) as e:
+            logger.warning(f"Ignoring malformed permissions of user {user_id}: {e}")
+            return None
+
+    def _put(self, user_id: int, version: int, permissions: PermissionSet) -> None:
+        if self.max_size <= 0:
+            return
+        with self.lock:
+            self.entries[user_id] = (version, permissions, time.monotonic() + self.ttl)
+            self.entries.move_to_end(user_id)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def bump(self) -> None:
+        """Invalidate every compiled set after roles, rules or memberships change"""
+        self.bumps += 1
+        version = self.redis.incr(VERSION_KEY) if self.redis.is_enabled() else None
+        if version is None:
+            with self.lock:
+                self.version += 1
+                self.synced = not self.redis.enabled
+                self.entries.clear()
+            return
+        self.observe(version)
+        self.redis.publish(self.channel, str(version))
+
+    def observe(self, version: int) -> None:
+        """Adopt a version read from Redis or announced by another worker"""
+        with self.lock:
+            if version != self.version or not self.synced:
+                self.version = version
+                self.synced = True
+                self.entries.clear()
+
+    def sync(self) -> None:
+        """Read the current version from Redis"""
+        if self.redis.is_enabled():
+            version = self.redis.get(VERSION_KEY)
+            self.observe(int(version) if version is not None else 0)
+
+    def _on_message(self, message: str) -> None:
+        try:
+            self.observe(int(message))
+        except ValueError:
+            logger.warning(f"Ignoring malformed RBAC version {message!r}")
+
+    def start_listener(self) -> None:
+        """Follow version bumps of other processes"""
+        if self.listener is None and self.redis.enabled:
+            self.listener = InvalidationListener(self.redis, self.channel, None, self._on_message, self.sync)
+            self.listener.start()
+
+    def clear(self) -> None:
+        """Drop every compiled set held in memory"""
+        with self.lock:
+            self.entries.clear()
+
+    def close(self) -> None:
+        """Stop following version bumps"""
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Get cache size, hit/miss and invalidation counters"""
+        total = self.hits + self.misses
+        return {
+            "version": self.version,
+            "size": len(self.entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+            "compiled": self.compiled,
+            "bumps": self.bumps,
+        }
+
+
+def compile_permissions(pairs: Iterable[Tuple[str, str]]) -> PermissionSet:
+    """Build a permission set, interning names so users' sets share them"""
+    return PermissionSet((sys.intern(resource), sys.intern(operation)) for resource, operation in pairs)
+
+
+# Global permission index instance
+_permission_index: Optional[PermissionIndex] = None
+
+
+def get_permission_index() -> PermissionIndex:
+    """Get the permission index instance"""
+    global _permission_index
+    if _permission_index is None:
+        server_config = get_config().server
+        index = PermissionIndex(
+            get_redis_client(),
+            max_size=server_config.permission_cache_size,
+            ttl=server_config.permission_cache_ttl
+        )
+        index.sync()
+        index.start_listener()
+        register_stats("permissions", index.stats)
+        _permission_index = index
+    return _permission_index
@@ -1,18 +1,36 @@
 """RBAC authorization system"""
 
 import logging
-from typing import List, Optional, Tuple
-from sqlalchemy.orm import Session
-from app.models import User, Role, Rule, Group
+from typing import Awaitable, Callable, List, Optional, Tuple
+from fastapi import Request
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import exists, select, union
+from sqlalchemy.orm import Session, selectinload
+from app.database import get_db_manager
+from app.models import User, Role, Rule, Group, user_roles, user_groups, group_roles, role_rules
+from app.services.permission_index import PermissionSet, WILDCARD, get_permission_index, resource_patterns
+from app.utils.errors import ForbiddenException, UnauthorizedException
+from app.utils.pagination import apply_keyset, split_page
 
 logger = logging.getLogger(__name__)
 
 
+def granted_role_ids(user_id: int):
+    """Subquery of the IDs of the user's own roles and its groups' roles"""
+    return union(
+        select(user_roles.c.role_id).where(user_roles.c.user_id == user_id),
+        select(group_roles.c.role_id)
+        .join(user_groups, user_groups.c.group_id == group_roles.c.group_id)
+        .where(user_groups.c.user_id == user_id)
+    )
+
+
 class RBACService:
     """Role-Based Access Control service"""
     
     def __init__(self, db: Session):
         self.db = db
+        self.permissions = get_permission_index()
     
     def create_role(self, name: str, description: Optional[str] = None) -> Tuple[bool, Optional[Role], str]:
         """Create a new role"""
@@ -33,6 +51,24 @@ class RBACService:
             logger.error(f"Failed to create role: {e}")
             return False, None, str(e)
     
+    def list_roles(self, skip: int = 0, limit: int = 100) -> List[Role]:
+        """List roles with offset pagination"""
+        return self.db.query(Role).order_by(Role.id).offset(skip).limit(limit).all()
+    
+    def list_roles_page(self, cursor: Optional[str] = None, limit: int = 100) -> Tuple[List[Role], Optional[str]]:
+        """List roles ordered by id after ``cursor``"""
+        keys = (Role.id,)
+        return split_page(apply_keyset(self.db.query(Role), keys, cursor, limit).all(), keys, limit)
+    
+    def list_rules(self, skip: int = 0, limit: int = 100) -> List[Rule]:
+        """List rules with offset pagination"""
+        return self.db.query(Rule).order_by(Rule.id).offset(skip).limit(limit).all()
+    
+    def list_rules_page(self, cursor: Optional[str] = None, limit: int = 100) -> Tuple[List[Rule], Optional[str]]:
+        """List rules ordered by id after ``cursor``"""
+        keys = (Rule.id,)
+        return split_page(apply_keyset(self.db.query(Rule), keys, cursor, limit).all(), keys, limit)
+    
     def create_rule(self, name: str, resource: str, operation: str, 
                    description: Optional[str] = None) -> Tuple[bool, Optional[Rule], str]:
         """Create a new authorization rule"""
@@ -52,7 +88,7 @@ class RBACService:
     def assign_role_to_user(self, user_id: int, role_id: int) -> Tuple[bool, str]:
         """Assign a role to a user"""
         try:
-            user = self.db.query(User).filter(User.id == user_id).first()
+            user = self.db.query(User).options(selectinload(User.roles)).filter(User.id == user_id).first()
             if not user:
                 return False, "User not found"
             
@@ -66,6 +102,7 @@ class RBACService:
             
             user.roles.append(role)
             self.db.commit()
+            self.permissions.bump()
             
             logger.info(f"Role {role.name} assigned to user {user_id}")
             return True, "Role assigned successfully"
@@ -77,7 +114,7 @@ class RBACService:
     def remove_role_from_user(self, user_id: int, role_id: int) -> Tuple[bool, str]:
         """Remove a role from a user"""
         try:
-            user = self.db.query(User).filter(User.id == user_id).first()
+            user = self.db.query(User).options(selectinload(User.roles)).filter(User.id == user_id).first()
             if not user:
                 return False, "User not found"
             
@@ -90,6 +127,7 @@ class RBACService:
             
             user.roles.remove(role)
             self.db.commit()
+            self.permissions.bump()
             
             logger.info(f"Role {role.name} removed from user {user_id}")
             return True, "Role removed successfully"
@@ -101,7 +139,7 @@ class RBACService:
     def assign_rule_to_role(self, role_id: int, rule_id: int) -> Tuple[bool, str]:
         """Assign a rule to a role"""
         try:
-            role = self.db.query(Role).filter(Role.id == role_id).first()
+            role = self.db.query(Role).options(selectinload(Role.rules)).filter(Role.id == role_id).first()
             if not role:
                 return False, "Role not found"
             
@@ -114,6 +152,7 @@ class RBACService:
             
             role.rules.append(rule)
             self.db.commit()
+            self.permissions.bump()
             
             logger.info(f"Rule {rule.name} assigned to role {role.name}")
             return True, "Rule assigned successfully"
@@ -125,47 +164,97 @@ class RBACService:
     def check_permission(self, user_id: int, resource: str, operation: str) -> bool:
         """Check if user has permission for a resource operation"""
         try:
-            user = self.db.query(User).filter(User.id == user_id).first()
-            if not user:
-                return False
-            
-            # Get all roles for user (directly and through groups)
-            roles = set(user.roles)
-            for group in user.groups:
-                roles.update(group.roles)
-            
-            # Check if any role has the required permission
-            for role in roles:
-                for rule in role.rules:
-                    if rule.resource == resource and rule.operation == operation:
-                        return True
-            
-            return False
+            if self.permissions.max_size <= 0:
+                # Without the in-process index, don't compile a set for one check
+                return self.has_permission(user_id, resource, operation)
+            return self.get_permission_set(user_id).allows(resource, operation)
         except Exception as e:
             logger.error(f"Failed to check permission: {e}")
             return False
     
+    def check_permissions(self, user_id: int, checks: List[Tuple[str, str]]) -> List[bool]:
+        """Check several (resource, operation) pairs, resolving permissions once"""
+        try:
+            permissions = self.get_permission_set(user_id)
+            return [permissions.allows(resource, operation) for resource, operation in checks]
+        except Exception as e:
+            logger.error(f"Failed to check permissions: {e}")
+            return [False] * len(checks)
+    
+    def get_permission_set(self, user_id: int) -> PermissionSet:
+        """Get the user's compiled (resource, operation) pairs.
+
+        Compiled sets are shared with other requests and workers, so they are
+        always loaded from the primary, never from this service's replica.
+        """
+        loader = load_permissions if getattr(self.db, "use_replica", False) else self._load_permissions
+        return self.permissions.get(user_id, loader)
+    
+    def has_permission(self, user_id: int, resource: str, operation: str) -> bool:
+        """Check one permission, wildcards included, with a single EXISTS query"""
+        query = select(exists().where(
+            role_rules.c.rule_id == Rule.id,
+            role_rules.c.role_id.in_(granted_role_ids(user_id)),
+            Rule.resource.in_(resource_patterns(resource)),
+            Rule.operation.in_([operation, WILDCARD])
+        ))
+        return bool(self.db.scalar(query))
+    
+    def _load_permissions(self, user_id: int) -> List[Tuple[str, str]]:
+        """Load the pairs granted by the user's own and group roles in one query"""
+        query = (
+            select(Rule.resource, Rule.operation)
+            .join(role_rules, role_rules.c.rule_id == Rule.id)
+            .where(role_rules.c.role_id.in_(granted_role_ids(user_id)))
+            .distinct()
+        )
+        return [(resource, operation) for resource, operation in self.db.execute(query)]
+    
     def get_user_permissions(self, user_id: int) -> List[Tuple[str, str]]:
         """Get all permissions for a user as (resource, operation) tuples"""
         try:
-            user = self.db.query(User).filter(User.id == user_id).first()
-            if not user:
-                return []
-            
-            permissions = set()
-            
-            # Get permissions from direct roles
-            for role in user.roles:
-                for rule in role.rules:
-                    permissions.add((rule.resource, rule.operation))
-            
-            # Get permissions from group roles
-            for group in user.groups:
-                for role in group.roles:
-                    for rule in role.rules:
-                        permissions.add((rule.resource, rule.operation))
-            
-            return list(permissions)
+            return sorted(self.get_permission_set(user_id))
         except Exception as e:
             logger.error(f"Failed to get user permissions: {e}")
             return []
+
+
+def load_permissions(user_id: int) -> List[Tuple[str, str]]:
+    """Load a user's permission pairs on a session of its own.
+
+    Reads the primary, since a replica may not have the change that
+    invalidated the user's compiled set yet.
+    """
+    db = get_db_manager().SessionLocal()
+    try:
+        return RBACService(db)._load_permissions(user_id)
+    finally:
+        db.close()
+
+
+def require_permission(resource: str, operation: str) -> Callable[[Request], Awaitable[None]]:
+    """Dependency rejecting requests whose user may not ``operation`` ``resource``.
+
+    ``resource`` may name path parameters, as in
+    ``docker/containers/{container_id}``, so that rules such as
+    ``docker/containers/*`` apply. The user comes from ``request.state``,
+    set by ``AuthenticationMiddleware``, and the check runs against the
+    user's compiled permission set: only the first request after a
+    permission change loads it, in a worker thread.
+    """
+    templated = "{" in resource
+    
+    async def check(request: Request) -> None:
+        user_id = getattr(request.state, "user_id", None)
+        if user_id is None:
+            raise UnauthorizedException()
+        
+        target = resource.format_map(request.path_params) if templated else resource
+        index = get_permission_index()
+        permissions = index.peek(user_id)
+        if permissions is None:
+            permissions = await run_in_threadpool(index.load, user_id, load_permissions)
+        if not permissions.allows(target, operation):
+            raise ForbiddenException(f"Permission denied: {operation} {target}")
+    
+    return check
@@ -0,0 +1,276 @@
+"""Write-behind post view counter"""
+
+import logging
+import threading
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+from sqlalchemy import bindparam, delete, func, insert, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.config import get_config
+from app.models import Post, view_flushes
+from app.schemas import PostResponse
+from app.utils.metrics import register_stats
+from app.utils.redis_client import (
+    AsyncRedisClient, CacheManager, RedisClient, decode, get_async_redis_client, get_cache_manager, get_redis_client
+)
+from app.utils.redlock import Redlock
+
+logger = logging.getLogger(__name__)
+
+PENDING_KEY = "post_views:pending"
+FLUSHING_KEY = "post_views:flushing"
+FLUSHING_ID_KEY = "post_views:flushing:id"
+FLUSH_LOCK = "lock:post_views:flush"
+
+# How long applied batch IDs are kept; a batch is only ever replayed by the
+# next flush, so this just has to outlast an outage
+FLUSH_ID_RETENTION = timedelta(days=1)
+
+# Count a view and return the post's unflushed views, including any batch
+# a flusher has taken but not yet committed
+INCR_SCRIPT = """
+local pending = redis.call('HINCRBY', KEYS[1], ARGV[1], 1)
+return pending + tonumber(redis.call('HGET', KEYS[2], ARGV[1]) or '0')
+"""
+
+# Unflushed views of several posts, in ARGV order
+PENDING_SCRIPT = """
+local counts = {}
+for i, id in ipairs(ARGV) do
+    counts[i] = tonumber(redis.call('HGET', KEYS[1], id) or '0')
+        + tonumber(redis.call('HGET', KEYS[2], id) or '0')
+end
+return counts
+"""
+
+# Move the pending views aside for flushing under the batch ID ARGV[1],
+# unless a failed flush left a batch behind, which is retried with its ID
+TAKE_SCRIPT = """
+if redis.call('EXISTS', KEYS[2]) == 0 then
+    if redis.call('EXISTS', KEYS[1]) == 0 then
+        return {}
+    end
+    redis.call('RENAME', KEYS[1], KEYS[2])
+    redis.call('SET', KEYS[3], ARGV[1])
+end
+local batch_id = redis.call('GET', KEYS[3])
+if not batch_id then
+    batch_id = ARGV[1]
+    redis.call('SET', KEYS[3], batch_id)
+end
+return {batch_id, redis.call('HGETALL', KEYS[2])}
+"""
+
+
+class ViewCounter:
+    """Buffer post view increments and write them to the database in batches.
+
+    Views are counted with HINCRBY in a Redis hash shared by all workers, or
+    in process memory while Redis is unavailable, and added to the counts
+    served by reads. A background thread flushes them every ``interval``
+    seconds with one batched UPDATE; one worker flushes the shared hash at a
+    time, under a Redis lock. A batch whose UPDATE fails is kept and retried;
+    shared batches carry an ID recorded in the same transaction, so one that
+    was written but not dropped from Redis is skipped when it comes back.
+    ``close`` flushes what is left, so a graceful shutdown loses nothing.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session], redis_client: RedisClient,
+                 cache: CacheManager, interval: float = 5.0, batch_size: int = 500,
+                 async_redis: Optional[AsyncRedisClient] = None):
+        self.session_factory = session_factory
+        self.redis = redis_client
+        # Counts views from async handlers without blocking the event loop
+        self.async_redis = async_redis
+        self.cache = cache
+        self.interval = interval
+        self.batch_size = batch_size
+        self.local: Dict[int, int] = {}
+        self.local_flushing: Dict[int, int] = {}
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+        self.flushed = 0
+        self.flushes = 0
+        self.failed_flushes = 0
+
+    def incr(self, post_id: int) -> int:
+        """Count a view and return the post's views not yet in the database"""
+        if self.redis.is_enabled():
+            total = self.redis.eval_script(INCR_SCRIPT, [PENDING_KEY, FLUSHING_KEY], [post_id])
+            if total is not None:
+                return int(total) + self._local_pending(post_id)
+        return self._incr_local(post_id)
+
+    async def incr_async(self, post_id: int) -> int:
+        """``incr`` through the async Redis client, for async handlers"""
+        if self.async_redis is not None and self.async_redis.is_enabled():
+            total = await self.async_redis.eval_script(INCR_SCRIPT, [PENDING_KEY, FLUSHING_KEY], [post_id])
+            if total is not None:
+                return int(total) + self._local_pending(post_id)
+        return self._incr_local(post_id)
+
+    def _incr_local(self, post_id: int) -> int:
+        with self.lock:
+            self.local[post_id] = self.local.get(post_id, 0) + 1
+        return self._local_pending(post_id)
+
+    def _local_pending(self, post_id: int) -> int:
+        with self.lock:
+            return self.local.get(post_id, 0) + self.local_flushing.get(post_id, 0)
+
+    def pending(self, post_ids: List[int]) -> Dict[int, int]:
+        """Get the views of ``post_ids`` not yet in the database"""
+        counts = {post_id: self._local_pending(post_id) for post_id in post_ids}
+        if post_ids and self.redis.is_enabled():
+            shared = self.redis.eval_script(PENDING_SCRIPT, [PENDING_KEY, FLUSHING_KEY], post_ids)
+            if shared is not None:
+                for post_id, count in zip(post_ids, shared):
+                    counts[post_id] += int(count)
+        return counts
+
+    def add_pending(self, posts: List[PostResponse]) -> List[PostResponse]:
+        """Add unflushed views to the counts of ``posts``"""
+        counts = self.pending([post.id for post in posts])
+        return [
+            post.model_copy(update={"view_count": post.view_count + counts[post.id]}) if counts[post.id] else post
+            for post in posts
+        ]
+
+    def flush(self) -> int:
+        """Write buffered views to the database; returns the number written"""
+        with self.flush_lock:
+            return self._flush_local() + self._flush_shared()
+
+    def _flush_local(self) -> int:
+        with self.lock:
+            if not self.local_flushing:
+                self.local_flushing, self.local = self.local, {}
+            batch = dict(self.local_flushing)
+        if not batch or not self._write(batch):
+            return 0
+        with self.lock:
+            self.local_flushing = {}
+        return self._written(batch)
+
+    def _flush_shared(self) -> int:
+        if not self.redis.is_enabled():
+            return 0
+        lock = Redlock([self.redis.client]).lock(FLUSH_LOCK, ttl=60000, retry_count=1, retry_delay=0, fencing=False)
+        if not lock.locked:
+            return 0
+        try:
+            taken = self.redis.eval_script(TAKE_SCRIPT, [PENDING_KEY, FLUSHING_KEY, FLUSHING_ID_KEY],
+                                           [uuid.uuid4().hex])
+            if not taken:
+                return 0
+            batch_id, fields = decode(taken[0]), taken[1]
+            batch = {int(fields[i]): int(fields[i + 1]) for i in range(0, len(fields), 2)}
+            if not self._write(batch, batch_id):
+                return 0
+            # A failure here replays the batch, which _write then skips
+            self.redis.delete(FLUSHING_KEY, FLUSHING_ID_KEY)
+            return self._written(batch)
+        finally:
+            lock.unlock()
+
+    def _write(self, batch: Dict[int, int], batch_id: Optional[str] = None) -> bool:
+        """Add ``batch`` to the stored counts; True once it is in the database"""
+        table = Post.__table__
+        statement = (
+            update(table)
+            .where(table.c.id == bindparam("post_id"))
+            .values(view_count=func.coalesce(table.c.view_count, 0) + bindparam("views"))
+        )
+        rows = [{"post_id": post_id, "views": views} for post_id, views in batch.items()]
+
+        session = self.session_factory()
+        try:
+            if batch_id is not None:
+                # Fails on the primary key if the batch was written before
+                now = datetime.utcnow()
+                session.execute(insert(view_flushes).values(batch_id=batch_id, flushed_at=now))
+                session.execute(delete(view_flushes).where(view_flushes.c.flushed_at < now - FLUSH_ID_RETENTION))
+            for start in range(0, len(rows), self.batch_size):
+                session.connection().execute(statement, rows[start:start + self.batch_size])
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            if batch_id is not None and isinstance(e, IntegrityError):
+                logger.info(f"Skipping view batch {batch_id}, already written")
+                return True
+            self.failed_flushes += 1
+            logger.warning(f"Failed to flush views of {len(rows)} posts: {e}")
+            return False
+        finally:
+            session.close()
+
+        self.flushes += 1
+        self.flushed += sum(batch.values())
+        return True
+    
+    def _written(self, batch: Dict[int, int]) -> int:
+        """Invalidate the cached posts of a batch dropped from the buffer"""
+        # Not before the drop, or a post reloaded in between would be served
+        # with the batch counted in both the database and the buffer. Loads
+        # that read the database before the write are kept out of the cache
+        # by the generation check of get_or_load.
+        self.cache.invalidate_posts(list(batch))
+        return sum(batch.values())
+
+    def start(self) -> None:
+        """Flush every ``interval`` seconds in the background"""
+        if self.thread is None:
+            self.stopped.clear()
+            self.thread = threading.Thread(target=self._run, name="view-counter", daemon=True)
+            self.thread.start()
+
+    def _run(self) -> None:
+        while not self.stopped.wait(self.interval):
+            try:
+                self.flush()
+            except Exception as e:
+                logger.warning(f"View count flush failed: {e}")
+
+    def close(self) -> None:
+        """Stop the flusher and write out every buffered view"""
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join(timeout=10)
+            self.thread = None
+        self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get buffer and flush counters"""
+        with self.lock:
+            buffered = sum(self.local.values()) + sum(self.local_flushing.values())
+        return {
+            "local_pending": buffered,
+            "flushes": self.flushes,
+            "failed_flushes": self.failed_flushes,
+            "flushed_views": self.flushed,
+        }
+
+
+# Global view counter instance
+_view_counter: Optional[ViewCounter] = None
+
+
+def get_view_counter() -> ViewCounter:
+    """Get the view counter instance; ``start`` it at startup"""
+    global _view_counter
+    if _view_counter is None:
+        from app.database import get_db_manager
+        db_manager = get_db_manager()
+        _view_counter = ViewCounter(
+            lambda: db_manager.SessionLocal(),
+            get_redis_client(),
+            get_cache_manager(),
+            interval=get_config().server.view_flush_interval,
+            async_redis=get_async_redis_client()
+        )
+        register_stats("view_counter", _view_counter.stats)
+    return _view_counter
@@ -1,3 +1,3 @@
 """Utils package"""
 
-__all__ = ['auth', 'errors', 'redis_client']
+__all__ = ['auth', 'errors', 'metrics', 'ratelimit', 'redis_client']
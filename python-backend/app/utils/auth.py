@@ -1,12 +1,17 @@
 """Authentication utilities and JWT handling"""
 
+import hashlib
 import logging
-from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Dict, Any, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from pydantic import BaseModel
 from app.config import get_config
+from app.utils.metrics import register_stats
 
 logger = logging.getLogger(__name__)
 
@@ -89,9 +94,11 @@ def verify_token(token: str) -> Optional[TokenData]:
             logger.warning("Invalid token claims")
             return None
         
+        exp = payload.get("exp")
         return TokenData(
             user_id=int(user_id),
-            username=username
+            username=username,
+            exp=datetime.utcfromtimestamp(exp) if exp is not None else None
         )
     except JWTError as e:
         logger.warning(f"JWT validation failed: {e}")
@@ -101,6 +108,94 @@ def verify_token(token: str) -> Optional[TokenData]:
         return None
 
 
+class TokenCache:
+    """Bounded LRU cache of verified token claims.
+
+    Entries are keyed by a SHA-256 digest of the token, so raw tokens are never
+    kept in memory, and expire at the token's own ``exp`` claim. Only
+    successfully verified tokens are cached.
+    """
+    
+    def __init__(self, max_size: int = 10000):
+        self.max_size = max_size
+        self.entries: "OrderedDict[bytes, Tuple[TokenData, float]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def _digest(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+    
+    def get(self, token: str) -> Optional[TokenData]:
+        """Get cached claims for a token, or None if absent or expired"""
+        key = self._digest(token)
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                token_data, expires_at = entry
+                if time.time() < expires_at:
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return token_data
+                del self.entries[key]
+            self.misses += 1
+            return None
+    
+    def put(self, token: str, token_data: TokenData) -> None:
+        """Cache verified claims until the token expires"""
+        if self.max_size <= 0 or token_data.exp is None:
+            return
+        
+        expires_at = token_data.exp.replace(tzinfo=timezone.utc).timestamp()
+        key = self._digest(token)
+        with self._lock:
+            self.entries[key] = (token_data, expires_at)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+    
+    def clear(self) -> None:
+        """Drop all cached entries"""
+        with self._lock:
+            self.entries.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Get cache size and hit/miss counters"""
+        total = self.hits + self.misses
+        return {
+            "size": len(self.entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+        }
+
+
+# Global token cache instance
+_token_cache: Optional[TokenCache] = None
+
+
+def get_token_cache() -> TokenCache:
+    """Get the verified-token cache instance"""
+    global _token_cache
+    if _token_cache is None:
+        _token_cache = TokenCache(get_config().server.token_cache_size)
+        register_stats("token_cache", _token_cache.stats)
+    return _token_cache
+
+
+def verify_token_cached(token: str) -> Optional[TokenData]:
+    """Verify a JWT token, serving repeat tokens from the verified-token cache"""
+    cache = get_token_cache()
+    token_data = cache.get(token)
+    if token_data is None:
+        token_data = verify_token(token)
+        if token_data is not None:
+            cache.put(token, token_data)
+    return token_data
+
+
 def extract_token_from_header(authorization: Optional[str]) -> Optional[str]:
     """Extract JWT token from Authorization header"""
     if not authorization:
@@ -0,0 +1,52 @@
+"""In-memory Bloom filter"""
+
+import hashlib
+import math
+import threading
+from typing import Any, Dict
+
+
+class BloomFilter:
+    """Set membership with no false negatives and a bounded false positive rate.
+
+    Sized for ``capacity`` items at ``error_rate``; adding more items raises
+    the false positive rate but never causes false negatives. A filter that is
+    not ``ready`` is still being filled and must not be trusted for misses.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+        self.ready = False
+        self.lock = threading.Lock()
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, item: str) -> None:
+        """Add an item"""
+        positions = self._positions(item)
+        with self.lock:
+            for position in positions:
+                self.bits[position >> 3] |= 1 << (position & 7)
+            self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[p >> 3] & (1 << (p & 7)) for p in self._positions(item))
+
+    def stats(self) -> Dict[str, Any]:
+        """Get fill and sizing figures"""
+        return {
+            "ready": self.ready,
+            "items": self.count,
+            "capacity": self.capacity,
+            "bits": self.size,
+            "hashes": self.hashes,
+        }
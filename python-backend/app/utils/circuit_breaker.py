@@ -0,0 +1,174 @@
+"""Circuit breaker for calls to an external service"""
+
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+STATE_CODES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitBreaker:
+    """Stop calling a failing service and probe it in the background.
+
+    The outcomes of the last ``window`` calls are kept. Once at least
+    ``min_calls`` are recorded, the breaker opens when the share of failures
+    reaches ``error_rate`` or the share of calls slower than ``slow_call``
+    seconds reaches ``slow_rate``. While open, ``allow`` answers False at
+    once and a background thread calls ``probe`` every ``retry_interval``
+    seconds. A successful probe half-opens the breaker: calls go through
+    again, the first failure reopens it and ``half_open_calls`` successes in
+    a row close it, and then the callbacks registered with ``on_close`` run.
+    """
+
+    def __init__(self, name: str, probe: Callable[[], Any], window: int = 50, min_calls: int = 10,
+                 error_rate: float = 0.5, slow_call: float = 0.25, slow_rate: float = 0.5,
+                 retry_interval: float = 2.0, half_open_calls: int = 3,
+                 failures: Tuple[Type[BaseException], ...] = (Exception,)):
+        self.name = name
+        self.probe = probe
+        self.min_calls = min_calls
+        self.error_rate = error_rate
+        self.slow_call = slow_call
+        self.slow_rate = slow_rate
+        self.retry_interval = retry_interval
+        self.half_open_calls = half_open_calls
+        self.failures = failures
+        self.state = CLOSED
+        self.outcomes: "deque[Tuple[bool, bool]]" = deque(maxlen=window)
+        self.half_open_successes = 0
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+        self.trips = 0
+        self.rejected = 0
+        self.close_callbacks: List[Callable[[], None]] = []
+
+    def allow(self) -> bool:
+        """Whether a call may be made now; counts rejections while open"""
+        if self.state != OPEN:
+            return True
+        self.rejected += 1
+        return False
+
+    def call(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run ``fn`` and record its outcome and latency"""
+        start = time.monotonic()
+        try:
+            result = fn(*args, **kwargs)
+        except self.failures:
+            self.record(False, time.monotonic() - start)
+            raise
+        self.record(True, time.monotonic() - start)
+        return result
+
+    async def call_async(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Await ``fn`` and record its outcome and latency"""
+        start = time.monotonic()
+        try:
+            result = await fn(*args, **kwargs)
+        except self.failures:
+            self.record(False, time.monotonic() - start)
+            raise
+        self.record(True, time.monotonic() - start)
+        return result
+
+    def on_close(self, callback: Callable[[], None]) -> None:
+        """Call ``callback`` each time the breaker closes after an outage"""
+        self.close_callbacks.append(callback)
+
+    def record(self, success: bool, elapsed: float) -> None:
+        """Record the outcome of a call made while the breaker allowed it"""
+        slow = elapsed >= self.slow_call
+        closed = False
+        with self.lock:
+            if self.state == HALF_OPEN:
+                if not success or slow:
+                    self._open("failed while half-open")
+                else:
+                    self.half_open_successes += 1
+                    if self.half_open_successes >= self.half_open_calls:
+                        self.state = CLOSED
+                        self.outcomes.clear()
+                        closed = True
+                        logger.info(f"Circuit {self.name} closed")
+            elif self.state == CLOSED:
+                self._count(success, slow)
+        if closed:
+            self._run_close_callbacks()
+
+    def _count(self, success: bool, slow: bool) -> None:
+        self.outcomes.append((success, slow))
+        total = len(self.outcomes)
+        if total < self.min_calls:
+            return
+        failed = sum(1 for ok, _ in self.outcomes if not ok)
+        slow_calls = sum(1 for _, is_slow in self.outcomes if is_slow)
+        if failed / total >= self.error_rate:
+            self._open(f"{failed}/{total} calls failed")
+        elif slow_calls / total >= self.slow_rate:
+            self._open(f"{slow_calls}/{total} calls slower than {self.slow_call}s")
+
+    def _run_close_callbacks(self) -> None:
+        # On a thread of their own: the closing call may run on an event loop
+        for callback in self.close_callbacks:
+            threading.Thread(target=self._run_callback, args=(callback,),
+                             name=f"{self.name}-on-close", daemon=True).start()
+
+    def _run_callback(self, callback: Callable[[], None]) -> None:
+        try:
+            callback()
+        except Exception as e:
+            logger.warning(f"Circuit {self.name} close callback failed: {e}")
+
+    def trip(self, reason: str) -> None:
+        """Open the breaker now, e.g. when the first connection fails"""
+        with self.lock:
+            if self.state != OPEN:
+                self._open(reason)
+
+    def _open(self, reason: str) -> None:
+        logger.warning(f"Circuit {self.name} opened: {reason}")
+        self.state = OPEN
+        self.trips += 1
+        self.outcomes.clear()
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._reconnect, name=f"{self.name}-breaker", daemon=True)
+            self.thread.start()
+
+    def _reconnect(self) -> None:
+        while not self.stopped.wait(self.retry_interval):
+            try:
+                self.probe()
+            except Exception as e:
+                logger.debug(f"Circuit {self.name} probe failed: {e}")
+                continue
+            with self.lock:
+                self.state = HALF_OPEN
+                self.half_open_successes = 0
+                self.thread = None
+            logger.info(f"Circuit {self.name} half-open")
+            return
+
+    def stop(self) -> None:
+        """Stop background probing"""
+        self.stopped.set()
+        thread = self.thread
+        if thread is not None:
+            thread.join(timeout=5)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the state as a gauge (0 closed, 1 half-open, 2 open) and counters"""
+        return {
+            "state": STATE_CODES[self.state],
+            "open": self.state == OPEN,
+            "trips": self.trips,
+            "rejected": self.rejected,
+        }
@@ -0,0 +1,146 @@
+"""Pluggable serialization and compression for cached values
+
+Encoded values start with a two byte header:
+
+    byte 0  format version (``FORMAT_VERSION``)
+    byte 1  serializer id in the low nibble, compression id in the high nibble
+
+The header makes every entry self-describing, so a worker can read entries
+written with another serializer or compression while a config change rolls
+out, and a future layout can bump the version byte. Values without a header
+are legacy plain JSON written before the codec existed.
+"""
+
+import json
+import logging
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:
+    lz4_frame = None
+
+FORMAT_VERSION = 1
+
+JSON = 1
+ORJSON = 2
+MSGPACK = 3
+
+NONE = 0
+ZSTD = 1
+LZ4 = 2
+
+SERIALIZERS = {"json": JSON, "orjson": ORJSON, "msgpack": MSGPACK}
+COMPRESSIONS = {"none": NONE, "zstd": ZSTD, "lz4": LZ4}
+
+
+class CodecError(ValueError):
+    """Raised when a cached value cannot be decoded"""
+
+
+def _serializers() -> Dict[int, Tuple[Callable[[Any], bytes], Callable[[bytes], Any]]]:
+    available = {
+        JSON: (lambda v: json.dumps(v, separators=(",", ":")).encode(), json.loads),
+    }
+    if orjson is not None:
+        available[ORJSON] = (orjson.dumps, orjson.loads)
+    if msgpack is not None:
+        available[MSGPACK] = (
+            lambda v: msgpack.packb(v, use_bin_type=True),
+            lambda b: msgpack.unpackb(b, raw=False),
+        )
+    return available
+
+
+class CacheCodec:
+    """Encode cache values with a serializer, compressing large payloads.
+
+    Payloads of at least ``compress_threshold`` bytes are compressed, unless
+    compression does not make them smaller. Unavailable libraries fall back
+    to stdlib JSON and no compression with a warning.
+    """
+
+    def __init__(self, serializer: str = "json", compression: str = "none",
+                 compress_threshold: int = 1024, level: int = 3):
+        if serializer not in SERIALIZERS:
+            raise ValueError(f"Unknown cache serializer: {serializer}")
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Unknown cache compression: {compression}")
+
+        self.serializers = _serializers()
+        self.serializer = SERIALIZERS[serializer]
+        if self.serializer not in self.serializers:
+            logger.warning(f"{serializer} is not installed, caching with json")
+            self.serializer = JSON
+
+        self.compression = COMPRESSIONS[compression]
+        if (self.compression == ZSTD and zstandard is None) or (self.compression == LZ4 and lz4_frame is None):
+            logger.warning(f"{compression} is not installed, caching uncompressed")
+            self.compression = NONE
+
+        self.compress_threshold = compress_threshold
+        self.level = level
+        self._zstd_compressor = zstandard.ZstdCompressor(level=level) if zstandard is not None else None
+        self._zstd_decompressor = zstandard.ZstdDecompressor() if zstandard is not None else None
+
+    def _compress(self, payload: bytes) -> Tuple[int, bytes]:
+        if self.compression == NONE or len(payload) < self.compress_threshold:
+            return NONE, payload
+        if self.compression == ZSTD:
+            compressed = self._zstd_compressor.compress(payload)
+        else:
+            compressed = lz4_frame.compress(payload, compression_level=self.level)
+        if len(compressed) >= len(payload):
+            return NONE, payload
+        return self.compression, compressed
+
+    def _decompress(self, compression: int, payload: bytes) -> bytes:
+        if compression == NONE:
+            return payload
+        if compression == ZSTD and self._zstd_decompressor is not None:
+            return self._zstd_decompressor.decompress(payload)
+        if compression == LZ4 and lz4_frame is not None:
+            return lz4_frame.decompress(payload)
+        raise CodecError(f"Unsupported cache compression id {compression}")
+
+    def encode(self, value: Any) -> bytes:
+        """Encode a value with the configured serializer and compression"""
+        dumps, _ = self.serializers[self.serializer]
+        compression, payload = self._compress(dumps(value))
+        return bytes((FORMAT_VERSION, self.serializer | compression << 4)) + payload
+
+    def decode(self, data: Optional[bytes]) -> Any:
+        """Decode a value written by any codec configuration, or legacy JSON"""
+        if not data:
+            return None
+        try:
+            if isinstance(data, str) or data[0] != FORMAT_VERSION:
+                return json.loads(data)
+
+            serializer = data[1] & 0x0F
+            compression = data[1] >> 4
+            if serializer not in self.serializers:
+                raise CodecError(f"Unsupported cache serializer id {serializer}")
+            _, loads = self.serializers[serializer]
+            return loads(self._decompress(compression, data[2:]))
+        except CodecError:
+            raise
+        except Exception as e:
+            raise CodecError(f"Failed to decode cached value: {e}") from e
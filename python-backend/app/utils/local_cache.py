@@ -0,0 +1,88 @@
+"""In-process TTL/LRU cache with a byte budget"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+
+class LocalCache:
+    """Thread-safe LRU cache bounded by the total size of its values.
+
+    Each entry is stored with the size of its serialized form and an expiry
+    time. Inserting past ``max_bytes`` evicts least recently used entries.
+    Values are shared between callers and must be treated as read-only.
+    """
+
+    def __init__(self, max_bytes: int, ttl: float):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.entries: "OrderedDict[str, Tuple[Any, int, float]]" = OrderedDict()
+        self.bytes = 0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        """Get a value, or None if missing or expired"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            value, size, expires_at = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                self.misses += 1
+                return None
+
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: Any, size: int, ttl: Optional[float] = None) -> None:
+        """Store a value whose serialized form is ``size`` bytes"""
+        if size > self.max_bytes:
+            return
+
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        with self.lock:
+            if key in self.entries:
+                self._remove(key)
+            self.entries[key] = (value, size, time.monotonic() + ttl)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                oldest = next(iter(self.entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def delete(self, key: str) -> None:
+        """Drop a key if present"""
+        with self.lock:
+            if key in self.entries:
+                self._remove(key)
+
+    def clear(self) -> None:
+        """Drop every entry"""
+        with self.lock:
+            self.entries.clear()
+            self.bytes = 0
+
+    def _remove(self, key: str) -> None:
+        _, size, _ = self.entries.pop(key)
+        self.bytes -= size
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters and memory use"""
+        total = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": self.hits / total if total else 0.0,
+        }
@@ -0,0 +1,60 @@
+"""Runtime metrics registry
+
+Components register a callable returning a dict of numeric stats; ``/metrics``
+renders all of them in the Prometheus text exposition format. Nested dicts are
+flattened into underscore-joined metric names.
+"""
+
+import logging
+from typing import Any, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+METRIC_PREFIX = "weave"
+
+_providers: Dict[str, Callable[[], Dict[str, Any]]] = {}
+
+
+def register_stats(name: str, provider: Callable[[], Dict[str, Any]]) -> None:
+    """Register (or replace) a stats provider under ``name``"""
+    _providers[name] = provider
+
+
+def unregister_stats(name: str) -> None:
+    """Remove a stats provider"""
+    _providers.pop(name, None)
+
+
+def collect() -> Dict[str, Dict[str, Any]]:
+    """Collect stats from every registered provider"""
+    result = {}
+    for name, provider in list(_providers.items()):
+        try:
+            result[name] = provider()
+        except Exception as e:
+            logger.warning(f"Failed to collect stats for {name}: {e}")
+    return result
+
+
+def _flatten(prefix: str, value: Any, out: Dict[str, Any]) -> None:
+    if isinstance(value, dict):
+        for key, item in value.items():
+            _flatten(f"{prefix}_{key}", item, out)
+    elif isinstance(value, bool):
+        out[prefix] = int(value)
+    elif isinstance(value, (int, float)):
+        out[prefix] = value
+
+
+def render_prometheus() -> str:
+    """Render all stats in the Prometheus text format"""
+    samples: Dict[str, Any] = {}
+    for name, stats in collect().items():
+        _flatten(f"{METRIC_PREFIX}_{name}", stats, samples)
+
+    lines = []
+    for metric, value in sorted(samples.items()):
+        metric = metric.replace("-", "_").replace(".", "_")
+        lines.append(f"# TYPE {metric} gauge")
+        lines.append(f"{metric} {value}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,99 @@
+"""Keyset (cursor) pagination helpers
+
+A cursor is the sort key of the last row of a page, JSON encoded and
+base64url wrapped so clients treat it as opaque. The next page is fetched
+with a ``WHERE (a, b) > (:a, :b)`` style filter instead of ``OFFSET``, so
+every page costs the same regardless of how deep it is.
+"""
+
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+from sqlalchemy import and_, or_
+from app.schemas import PaginatedResponse
+from app.utils.errors import BadRequestException
+
+DATETIME_TAG = "$dt"
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {DATETIME_TAG: value.isoformat()}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict) and DATETIME_TAG in value:
+        return datetime.fromisoformat(value[DATETIME_TAG])
+    return value
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Encode a row's sort key as an opaque cursor"""
+    payload = json.dumps([_encode_value(v) for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    """Decode a cursor holding ``size`` sort key values"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list) or len(values) != size:
+            raise ValueError("unexpected cursor shape")
+        return [_decode_value(v) for v in values]
+    except (ValueError, TypeError, binascii.Error):
+        raise BadRequestException("Invalid cursor")
+
+
+def keyset_filter(columns: Sequence[Any], values: Sequence[Any], descending: bool = False):
+    """Build the filter selecting rows after ``values`` in ``columns`` order.
+
+    Expands to ``a >= :a AND (a > :a OR (a = :a AND b > :b))`` rather than a
+    row-value comparison so it works on every supported backend; the leading
+    range on ``a`` lets the planner seek into an index on the sort columns.
+    """
+    clauses = []
+    for i, column in enumerate(columns):
+        after = column < values[i] if descending else column > values[i]
+        equal = [columns[j] == values[j] for j in range(i)]
+        clauses.append(and_(*equal, after) if equal else after)
+    if len(columns) == 1:
+        return clauses[0]
+    bound = columns[0] <= values[0] if descending else columns[0] >= values[0]
+    return and_(bound, or_(*clauses))
+
+
+def apply_keyset(query, columns: Sequence[Any], cursor: Optional[str], limit: int,
+                 descending: bool = False):
+    """Restrict a Query or Select to the page after ``cursor``.
+
+    One extra row is fetched so ``split_page`` can tell whether a next page
+    exists.
+    """
+    if cursor:
+        query = query.filter(keyset_filter(columns, decode_cursor(cursor, len(columns)), descending))
+    order = [c.desc() if descending else c.asc() for c in columns]
+    return query.order_by(*order).limit(limit + 1)
+
+
+def split_page(rows: Sequence[Any], columns: Sequence[Any], limit: int) -> Tuple[List[Any], Optional[str]]:
+    """Trim the extra row and build the next cursor, None on the last page"""
+    rows = list(rows)
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor([getattr(rows[-1], c.key) for c in columns])
+
+
+def cursor_response(data: List[Any], page_size: int, next_cursor: Optional[str]) -> PaginatedResponse:
+    """Wrap a cursor page in the standard paginated response"""
+    return PaginatedResponse(
+        success=True,
+        message="Success",
+        data=data,
+        page_size=page_size,
+        next_cursor=next_cursor
+    )
@@ -0,0 +1,160 @@
+"""Token-bucket rate limiting driven by RateLimitConfig"""
+
+import logging
+import time
+from collections import OrderedDict
+from typing import Optional
+from app.config import RateLimitConfig
+from app.utils.redis_client import AsyncRedisClient
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_SIZE = 2048
+
+SERVER_LIMIT_TYPE = "server"
+IP_LIMIT_TYPE = "ip"
+
+# Distributed limiting must never cost more than a few milliseconds per request,
+# so it uses its own async Redis pool with a short timeout and, after a failure,
+# skips Redis entirely until the retry interval has passed.
+REDIS_SOCKET_TIMEOUT = 0.05
+REDIS_RETRY_INTERVAL = 5.0
+
+# GCRA (generic cell rate algorithm): the key stores the theoretical arrival
+# time (TAT) of the next request in milliseconds. A request is allowed when it
+# arrives no earlier than TAT minus the burst tolerance. Redis TIME is used so
+# every worker and replica shares one clock.
+GCRA_SCRIPT = """
+local emission = tonumber(ARGV[1])
+local tolerance = tonumber(ARGV[2])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + tonumber(t[2]) / 1000
+local tat = tonumber(redis.call('GET', KEYS[1]))
+if tat == nil or tat < now then
+    tat = now
+end
+local new_tat = tat + emission
+if new_tat - tolerance > now then
+    return 0
+end
+redis.call('SET', KEYS[1], tostring(new_tat), 'PX', math.ceil(new_tat - now))
+return 1
+"""
+
+
+def validate_limit_config(config: RateLimitConfig) -> None:
+    """Validate a rate limit config, filling in the default cache size"""
+    if config.qps <= 0 or config.burst <= 0:
+        raise ValueError("RateLimitConfig burst and qps must be positive")
+    if config.qps > config.burst:
+        raise ValueError(f"RateLimitConfig qps({config.qps}) must not exceed burst({config.burst})")
+    if config.limit_type not in (SERVER_LIMIT_TYPE, IP_LIMIT_TYPE):
+        raise ValueError(f"Unknown rate limit type: {config.limit_type}")
+    if config.cache_size <= 0:
+        config.cache_size = DEFAULT_CACHE_SIZE
+
+
+class TokenBucket:
+    """Token bucket refilled at ``rate`` tokens/sec up to ``burst`` tokens"""
+
+    __slots__ = ("rate", "burst", "tokens", "updated_at")
+
+    def __init__(self, rate: float, burst: int, now: Optional[float] = None):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated_at = time.monotonic() if now is None else now
+
+    def allow(self, now: Optional[float] = None) -> bool:
+        """Take one token if available"""
+        if now is None:
+            now = time.monotonic()
+
+        elapsed = now - self.updated_at
+        if elapsed > 0:
+            self.tokens = min(self.burst, self.tokens + elapsed * self.rate)
+            self.updated_at = now
+
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+class RateLimiter:
+    """Rate limiter keeping one token bucket per key in an LRU cache.
+
+    ``server`` limiters share a single bucket; ``ip`` limiters keep a bucket per
+    client address, evicting the least recently seen client once
+    ``cache_size`` buckets exist.
+    """
+
+    # Whether ``allow`` is a coroutine
+    distributed = False
+
+    def __init__(self, config: RateLimitConfig):
+        validate_limit_config(config)
+        self.limit_type = config.limit_type
+        self.qps = config.qps
+        self.burst = config.burst
+        self.cache_size = config.cache_size
+        self.buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+
+    def key_for(self, client_ip: str) -> str:
+        """Get the bucket key for a client"""
+        return "" if self.limit_type == SERVER_LIMIT_TYPE else client_ip
+
+    def allow(self, client_ip: str, now: Optional[float] = None) -> bool:
+        """Check whether a request from ``client_ip`` is allowed"""
+        key = self.key_for(client_ip)
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = TokenBucket(self.qps, self.burst, now)
+            self.buckets[key] = bucket
+            if len(self.buckets) > self.cache_size:
+                self.buckets.popitem(last=False)
+        else:
+            self.buckets.move_to_end(key)
+
+        return bucket.allow(now)
+
+
+class RedisRateLimiter:
+    """Rate limiter sharing its quota across workers and replicas via Redis.
+
+    Each check is a single GCRA script call, awaited on the async client so
+    it never blocks the event loop. While Redis is unavailable the check is
+    answered by an in-process ``RateLimiter`` with the same config.
+    """
+
+    distributed = True
+
+    def __init__(self, config: RateLimitConfig, redis_client: AsyncRedisClient):
+        self.local = RateLimiter(config)
+        self.limit_type = config.limit_type
+        self.redis = redis_client
+        self.emission_ms = 1000.0 / config.qps
+        self.tolerance_ms = self.emission_ms * config.burst
+        self.retry_at = 0.0
+
+    async def allow(self, client_ip: str, now: Optional[float] = None) -> bool:
+        """Check whether a request from ``client_ip`` is allowed"""
+        if self.redis.is_enabled() and time.monotonic() >= self.retry_at:
+            key = f"ratelimit:{self.limit_type}:{self.local.key_for(client_ip)}"
+            result = await self.redis.eval_script(GCRA_SCRIPT, [key], [self.emission_ms, self.tolerance_ms])
+            if result is not None:
+                return bool(result)
+
+            self.retry_at = time.monotonic() + REDIS_RETRY_INTERVAL
+            logger.warning(
+                f"Distributed rate limiting unavailable, using local limiter for {REDIS_RETRY_INTERVAL}s"
+            )
+
+        return self.local.allow(client_ip, now)
+
+
+def create_rate_limiter(config: RateLimitConfig, redis_client: Optional[AsyncRedisClient] = None):
+    """Create a local or Redis-backed limiter depending on ``config.distributed``"""
+    if config.distributed and redis_client is not None:
+        return RedisRateLimiter(config, redis_client)
+    return RateLimiter(config)
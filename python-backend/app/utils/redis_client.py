@@ -1,22 +1,185 @@
 """Redis client and caching utilities"""
 
+import asyncio
 import json
 import logging
-from typing import Optional, Any, TypeVar, Generic
+import math
+import random
+import threading
+import time
+import uuid
+from typing import Optional, Any, Awaitable, Callable, Dict, Iterable, List, Set, Tuple, TypeVar, Generic, Union
 import redis
+import redis.asyncio as aioredis
+from redis.commands.core import AsyncScript, Script
 from app.config import get_config
+from app.utils.bloom import BloomFilter
+from app.utils.circuit_breaker import OPEN, CircuitBreaker
+from app.utils.codec import CacheCodec, CodecError
+from app.utils.local_cache import LocalCache
+from app.utils.metrics import register_stats
+from app.utils.redlock import Redlock
 
 logger = logging.getLogger(__name__)
 
 T = TypeVar('T')
 
+# Cached in place of a value the loader found missing
+NEGATIVE_ENTRY = {"$missing": True}
+
+# Published as ``prefix:*`` when every key under a prefix was dropped
+WILDCARD_SUFFIX = ":*"
+
+# Every invalidation bumps the key's ``gen:`` counter, and a fill only stores
+# its value if the counter has not moved since before the load, so a load
+# that read the database before a write cannot cache what it read after the
+# write's invalidation. Counters only have to outlast the slowest load.
+GENERATION_TTL = 3600
+
+# Deletes a lock key only if it still holds our token
+UNLOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+# Sets KEYS[1] to ARGV[2], expiring after ARGV[3] seconds if positive, only
+# while KEYS[2] holds ARGV[1], an empty ARGV[1] standing for a missing key
+SET_IF_UNCHANGED_SCRIPT = """
+if (redis.call('get', KEYS[2]) or '') ~= ARGV[1] then
+    return 0
+end
+if tonumber(ARGV[3]) > 0 then
+    redis.call('set', KEYS[1], ARGV[2], 'EX', ARGV[3])
+else
+    redis.call('set', KEYS[1], ARGV[2])
+end
+return 1
+"""
+
+
+def generation_key(key: str) -> str:
+    """Name of the counter bumped by each invalidation of ``key``"""
+    return f"gen:{key}"
+
+
+def serialize(value: Any) -> Union[str, bytes]:
+    """Serialize a value for storage, leaving strings and bytes untouched"""
+    if isinstance(value, (str, bytes)):
+        return value
+    if hasattr(value, 'to_dict'):
+        return json.dumps(value.to_dict())
+    if isinstance(value, dict):
+        return json.dumps(value)
+    return json.dumps(value, default=str)
+
+
+def is_negative(value: Any) -> bool:
+    """Whether a cached value is a negative entry"""
+    return isinstance(value, dict) and value.get("$missing") is True
+
+
+def decode(value: Any) -> Optional[str]:
+    """Decode a reply to str, mapping empty replies to None"""
+    if not value:
+        return None
+    return value.decode('utf-8') if isinstance(value, bytes) else value
+
+
+# Errors that mean Redis is unreachable or too slow, as opposed to a bad command
+OUTAGE_ERRORS = (redis.exceptions.ConnectionError, redis.exceptions.TimeoutError, OSError)
+
+# Client attributes that are not Redis commands
+_UNGUARDED = {"pubsub", "close", "aclose", "get_encoder", "connection_pool"}
+
+
+class _GuardedRedis:
+    """Proxy for a ``redis.Redis`` reporting every command to a circuit breaker"""
+    
+    def __init__(self, client: redis.Redis, breaker: CircuitBreaker):
+        self._client = client
+        self._breaker = breaker
+    
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._client, name)
+        if name in _UNGUARDED or not callable(attr):
+            return attr
+        if name == "pipeline":
+            return lambda *args, **kwargs: _GuardedPipeline(attr(*args, **kwargs), self._breaker)
+        if name == "register_script":
+            return lambda script: Script(self, script)
+        return lambda *args, **kwargs: self._breaker.call(attr, *args, **kwargs)
+
+
+class _GuardedPipeline:
+    """Pipeline whose ``execute`` is reported to a circuit breaker"""
+    
+    def __init__(self, pipeline, breaker: CircuitBreaker):
+        self._pipeline = pipeline
+        self._breaker = breaker
+    
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._pipeline, name)
+    
+    def execute(self, *args, **kwargs):
+        return self._breaker.call(self._pipeline.execute, *args, **kwargs)
+
+
+class _GuardedAsyncRedis(_GuardedRedis):
+    """Proxy for a ``redis.asyncio.Redis`` reporting every command to a circuit breaker"""
+    
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._client, name)
+        if name in _UNGUARDED or not callable(attr):
+            return attr
+        if name == "pipeline":
+            return lambda *args, **kwargs: _GuardedAsyncPipeline(attr(*args, **kwargs), self._breaker)
+        if name == "register_script":
+            return lambda script: AsyncScript(self, script)
+        return lambda *args, **kwargs: self._breaker.call_async(attr, *args, **kwargs)
+
+
+class _GuardedAsyncPipeline(_GuardedPipeline):
+    """Async pipeline whose ``execute`` is reported to a circuit breaker"""
+    
+    def execute(self, *args, **kwargs):
+        return self._breaker.call_async(self._pipeline.execute, *args, **kwargs)
+
+
+def create_breaker(probe: Callable[[], Any]) -> CircuitBreaker:
+    """Create a Redis circuit breaker from the Redis config"""
+    redis_config = get_config().redis
+    return CircuitBreaker(
+        "redis",
+        probe,
+        window=redis_config.breaker_window,
+        min_calls=redis_config.breaker_min_calls,
+        error_rate=redis_config.breaker_error_rate,
+        slow_call=redis_config.breaker_slow_call,
+        slow_rate=redis_config.breaker_slow_rate,
+        retry_interval=redis_config.breaker_retry_interval,
+        failures=OUTAGE_ERRORS
+    )
+
 
 class RedisClient:
-    """Redis client wrapper with hash operations"""
+    """Redis client wrapper with hash operations.
+
+    Commands go through a circuit breaker: once Redis fails or slows down
+    too often, every method returns its neutral value at once instead of
+    waiting for socket timeouts, and the connection is probed in the
+    background until Redis is back. A failed initial connection opens the
+    breaker too, so Redis is picked up whenever it comes up.
+    """
     
-    def __init__(self):
+    def __init__(self, socket_timeout: float = 5, retry_on_timeout: bool = True):
         self.client = None
         self.enabled = False
+        self.socket_timeout = socket_timeout
+        self.retry_on_timeout = retry_on_timeout
+        self.scripts = {}
+        self.breaker: Optional[CircuitBreaker] = None
     
     def connect(self) -> bool:
         """Connect to Redis"""
@@ -28,52 +191,49 @@ class RedisClient:
             self.enabled = False
             return True
         
-        try:
-            self.client = redis.Redis(
-                host=redis_config.host,
-                port=redis_config.port,
-                password=redis_config.password if redis_config.password else None,
-                db=0,
-                decode_responses=False,
+        client = redis.Redis(
+            host=redis_config.host,
+            port=redis_config.port,
+            password=redis_config.password if redis_config.password else None,
+            db=0,
+            decode_responses=False,
 
-                socket_connect_timeout=5,
-                socket_timeout=5,
-                socket_keepalive=True,
-                retry_on_timeout=True,
-                health_check_interval=30
+            socket_connect_timeout=self.socket_timeout,
+            socket_timeout=self.socket_timeout,
+            socket_keepalive=True,
+            retry_on_timeout=self.retry_on_timeout,
+            health_check_interval=30
 
-            )
-            
+        )
+        self.breaker = create_breaker(client.ping)
+        self.client = _GuardedRedis(client, self.breaker)
+        self.enabled = True
+        
+        try:
             # Test connection
-            self.client.ping()
-            self.enabled = True
+            client.ping()
             logger.info(f"Connected to Redis at {redis_config.host}:{redis_config.port}")
             return True
         except Exception as e:
-            logger.error(f"Failed to connect to Redis: {e}")
-            self.enabled = False
+            logger.error(f"Failed to connect to Redis, retrying in the background: {e}")
+            self.breaker.trip(f"initial connection failed: {e}")
             return False
     
+    def available(self) -> bool:
+        """Whether a command may be sent now; False while the breaker is open"""
+        return self.enabled and (self.breaker is None or self.breaker.allow())
+    
     def is_enabled(self) -> bool:
-        """Check if Redis is enabled and connected"""
-        return self.enabled
+        """Check if Redis is enabled and not known to be down"""
+        return self.enabled and (self.breaker is None or self.breaker.state != OPEN)
     
     def hset(self, key: str, field: str, value: Any) -> bool:
         """Set a hash field value"""
-        if not self.enabled:
+        if not self.available():
             return False
         
         try:
-            # Serialize value if it's not a string
-            if not isinstance(value, str):
-                if hasattr(value, 'to_dict'):
-                    value = json.dumps(value.to_dict())
-                elif isinstance(value, dict):
-                    value = json.dumps(value)
-                else:
-                    value = json.dumps(value, default=str)
-            
-            self.client.hset(key, field, value)
+            self.client.hset(key, field, serialize(value))
             return True
         except Exception as e:
             logger.warning(f"Failed to set hash field {field} in key {key}: {e}")
@@ -81,21 +241,18 @@ class RedisClient:
     
     def hget(self, key: str, field: str) -> Optional[str]:
         """Get a hash field value"""
-        if not self.enabled:
+        if not self.available():
             return None
         
         try:
-            value = self.client.hget(key, field)
-            if value:
-                return value.decode('utf-8') if isinstance(value, bytes) else value
-            return None
+            return decode(self.client.hget(key, field))
         except Exception as e:
             logger.warning(f"Failed to get hash field {field} from key {key}: {e}")
             return None
     
     def hdel(self, key: str, *fields: str) -> bool:
         """Delete hash fields"""
-        if not self.enabled:
+        if not self.available():
             return False
         
         try:
@@ -107,41 +264,40 @@ class RedisClient:
     
     def set(self, key: str, value: Any, ex: Optional[int] = None) -> bool:
         """Set a key-value pair with optional expiration"""
-        if not self.enabled:
+        if not self.available():
             return False
         
         try:
-            if not isinstance(value, str):
-                if hasattr(value, 'to_dict'):
-                    value = json.dumps(value.to_dict())
-                elif isinstance(value, dict):
-                    value = json.dumps(value)
-                else:
-                    value = json.dumps(value, default=str)
-            
-            self.client.set(key, value, ex=ex)
+            self.client.set(key, serialize(value), ex=ex)
             return True
         except Exception as e:
             logger.warning(f"Failed to set key {key}: {e}")
             return False
     
-    def get(self, key: str) -> Optional[str]:
-        """Get a key value"""
-        if not self.enabled:
+    def set_if_unchanged(self, key: str, value: Any, ex: Optional[int], guard: str,
+                         expected: Optional[str]) -> Optional[bool]:
+        """Set a key only while ``guard`` still holds ``expected``, None meaning missing.
+
+        Returns None, rather than False, when Redis could not be asked.
+        """
+        stored = self.eval_script(SET_IF_UNCHANGED_SCRIPT, [key, guard], [expected or "", serialize(value), ex or 0])
+        return None if stored is None else bool(stored)
+    
+    def get(self, key: str, raw: bool = False) -> Optional[Union[str, bytes]]:
+        """Get a key value, as bytes if ``raw``"""
+        if not self.available():
             return None
         
         try:
             value = self.client.get(key)
-            if value:
-                return value.decode('utf-8') if isinstance(value, bytes) else value
-            return None
+            return (value or None) if raw else decode(value)
         except Exception as e:
             logger.warning(f"Failed to get key {key}: {e}")
             return None
     
     def delete(self, *keys: str) -> bool:
         """Delete keys"""
-        if not self.enabled:
+        if not self.available():
             return False
         
         try:
@@ -151,9 +307,20 @@ class RedisClient:
             logger.warning(f"Failed to delete keys: {e}")
             return False
     
+    def incr(self, key: str) -> Optional[int]:
+        """Increment a counter, returning the new value or None on failure"""
+        if not self.available():
+            return None
+        
+        try:
+            return self.client.incr(key)
+        except Exception as e:
+            logger.warning(f"Failed to increment key {key}: {e}")
+            return None
+    
     def exists(self, key: str) -> bool:
         """Check if key exists"""
-        if not self.enabled:
+        if not self.available():
             return False
         
         try:
@@ -162,14 +329,454 @@ class RedisClient:
             logger.warning(f"Failed to check key existence {key}: {e}")
             return False
     
+    def mget(self, keys: List[str], raw: bool = False) -> List[Optional[Union[str, bytes]]]:
+        """Get several keys in one round trip, as bytes if ``raw``; missing keys are None"""
+        if not self.available() or not keys:
+            return [None] * len(keys)
+        
+        try:
+            values = self.client.mget(keys)
+            return [value or None for value in values] if raw else [decode(value) for value in values]
+        except Exception as e:
+            logger.warning(f"Failed to get {len(keys)} keys: {e}")
+            return [None] * len(keys)
+    
+    def get_with_ttl(self, key: str) -> Tuple[Optional[bytes], int]:
+        """Get a key's raw value and remaining TTL in milliseconds in one round trip.
+
+        The TTL follows ``PTTL``: -1 for no expiry and -2 for a missing key.
+        """
+        if not self.available():
+            return None, -2
+        
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            pipe.get(key)
+            pipe.pttl(key)
+            value, ttl = pipe.execute()
+            return value or None, ttl
+        except Exception as e:
+            logger.warning(f"Failed to get key {key}: {e}")
+            return None, -2
+    
+    def mset(self, mapping: Dict[str, Any], ex: Optional[int] = None) -> bool:
+        """Set several keys with an optional expiration in one pipelined round trip"""
+        if not self.available():
+            return False
+        if not mapping:
+            return True
+        
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            for key, value in mapping.items():
+                pipe.set(key, serialize(value), ex=ex)
+            pipe.execute()
+            return True
+        except Exception as e:
+            logger.warning(f"Failed to set {len(mapping)} keys: {e}")
+            return False
+    
+    def hmget(self, key: str, fields: List[str]) -> List[Optional[str]]:
+        """Get several hash fields in one round trip; missing fields are None"""
+        if not self.available() or not fields:
+            return [None] * len(fields)
+        
+        try:
+            return [decode(value) for value in self.client.hmget(key, fields)]
+        except Exception as e:
+            logger.warning(f"Failed to get hash fields from key {key}: {e}")
+            return [None] * len(fields)
+    
+    def delete_and_publish(self, keys: List[str], channel: str, counters: Iterable[str] = (),
+                           counter_ttl: Optional[int] = None) -> bool:
+        """Delete keys and announce them on a channel in one pipelined round trip.
+
+        ``counters`` are incremented in the same round trip, expiring after
+        ``counter_ttl`` seconds.
+        """
+        if not self.available() or not keys:
+            return False
+        
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            pipe.delete(*keys)
+            for counter in counters:
+                pipe.incr(counter)
+                if counter_ttl:
+                    pipe.expire(counter, counter_ttl)
+            pipe.publish(channel, " ".join(keys))
+            pipe.execute()
+            return True
+        except Exception as e:
+            logger.warning(f"Failed to invalidate {len(keys)} keys: {e}")
+            return False
+    
+    def delete_matching(self, pattern: str, batch: int = 1000) -> bool:
+        """Delete every key matching a glob ``pattern``, scanning in batches"""
+        if not self.available():
+            return False
+        
+        try:
+            keys = []
+            for key in self.client.scan_iter(match=pattern, count=batch):
+                keys.append(key)
+                if len(keys) >= batch:
+                    self.client.delete(*keys)
+                    keys = []
+            if keys:
+                self.client.delete(*keys)
+            return True
+        except Exception as e:
+            logger.warning(f"Failed to delete keys matching {pattern}: {e}")
+            return False
+    
+    def publish(self, channel: str, message: str) -> bool:
+        """Publish a message on a pub/sub channel"""
+        if not self.available():
+            return False
+        
+        try:
+            self.client.publish(channel, message)
+            return True
+        except Exception as e:
+            logger.warning(f"Failed to publish to {channel}: {e}")
+            return False
+    
+    def eval_script(self, script: str, keys: List[str], args: List[Any]) -> Optional[Any]:
+        """Run a Lua script atomically, returning None on failure.
+
+        Scripts are registered once and executed with EVALSHA, falling back to
+        EVAL only when the server does not have the script cached yet.
+        """
+        if not self.available():
+            return None
+        
+        try:
+            registered = self.scripts.get(script)
+            if registered is None:
+                registered = self.client.register_script(script)
+                self.scripts[script] = registered
+            return registered(keys=keys, args=args)
+        except Exception as e:
+            logger.warning(f"Failed to run script on keys {keys}: {e}")
+            return None
+    
     def close(self):
         """Close Redis connection"""
+        if self.breaker is not None:
+            self.breaker.stop()
         if self.client:
             self.client.close()
             self.enabled = False
             logger.info("Redis connection closed")
 
 
+class AsyncRedisClient:
+    """Non-blocking Redis client for use from async handlers.
+
+    Connections come from a ``BlockingConnectionPool``: once
+    ``max_connections`` are checked out, callers wait up to ``pool_timeout``
+    for one to be returned rather than opening more. Like ``RedisClient``,
+    every method logs and returns a neutral value when Redis fails, so a slow
+    Redis costs at most the configured timeouts. A ``socket_timeout`` given
+    here replaces the configured pool, connect and command timeouts.
+    """
+    
+    def __init__(self, breaker: Optional[CircuitBreaker] = None, socket_timeout: Optional[float] = None):
+        self.client: Optional[aioredis.Redis] = None
+        self.pool: Optional[aioredis.BlockingConnectionPool] = None
+        self.enabled = False
+        self.scripts = {}
+        # Usually shared with the sync client, whose thread probes Redis
+        self.breaker = breaker
+        self.socket_timeout = socket_timeout
+    
+    async def connect(self) -> bool:
+        """Create the connection pool and check Redis is reachable"""
+        redis_config = get_config().redis
+        
+        if not redis_config.enable:
+            logger.info("Redis is disabled")
+            self.enabled = False
+            return True
+        
+        try:
+            self.pool = aioredis.BlockingConnectionPool(
+                host=redis_config.host,
+                port=redis_config.port,
+                password=redis_config.password if redis_config.password else None,
+                db=0,
+                max_connections=redis_config.max_connections,
+                timeout=self.socket_timeout or redis_config.pool_timeout,
+                socket_timeout=self.socket_timeout or redis_config.socket_timeout,
+                socket_connect_timeout=self.socket_timeout or redis_config.socket_connect_timeout,
+                socket_keepalive=True,
+                health_check_interval=redis_config.health_check_interval
+            )
+            client = aioredis.Redis(connection_pool=self.pool)
+            self.client = _GuardedAsyncRedis(client, self.breaker) if self.breaker is not None else client
+            await client.ping()
+            self.enabled = True
+            logger.info(f"Async Redis client connected to {redis_config.host}:{redis_config.port}")
+            return True
+        except Exception as e:
+            if self.breaker is not None:
+                # Connections are opened lazily; keep the pool for when Redis is back
+                logger.error(f"Failed to connect async Redis client, retrying in the background: {e}")
+                await self.pool.disconnect()
+                self.breaker.trip(f"initial async connection failed: {e}")
+                self.enabled = True
+                return False
+            logger.error(f"Failed to connect async Redis client: {e}")
+            self.enabled = False
+            if self.pool is not None:
+                await self.pool.disconnect()
+            self.client = None
+            self.pool = None
+            return False
+    
+    def available(self) -> bool:
+        """Whether a command may be sent now; False while the breaker is open"""
+        return self.enabled and (self.breaker is None or self.breaker.allow())
+    
+    def is_enabled(self) -> bool:
+        """Check if Redis is enabled and not known to be down"""
+        return self.enabled and (self.breaker is None or self.breaker.state != OPEN)
+    
+    async def hset(self, key: str, field: str, value: Any) -> bool:
+        """Set a hash field value"""
+        if not self.available():
+            return False
+        
+        try:
+            await self.client.hset(key, field, serialize(value))
+            return True
+        except Exception as e:
+            logger.warning(f"Failed to set hash field {field} in key {key}: {e}")
+            return False
+    
+    async def hget(self, key: str, field: str) -> Optional[str]:
+        """Get a hash field value"""
+        if not self.available():
+            return None
+        
+        try:
+            return decode(await self.client.hget(key, field))
+        except Exception as e:
+            logger.warning(f"Failed to get hash field {field} from key {key}: {e}")
+            return None
+    
+    async def hdel(self, key: str, *fields: str) -> bool:
+        """Delete hash fields"""
+        if not self.available():
+            return False
+        
+        try:
+            await self.client.hdel(key, *fields)
+            return True
+        except Exception as e:
+            logger.warning(f"Failed to delete hash fields from key {key}: {e}")
+            return False
+    
+    async def set(self, key: str, value: Any, ex: Optional[int] = None) -> bool:
+        """Set a key-value pair with optional expiration"""
+        if not self.available():
+            return False
+        
+        try:
+            await self.client.set(key, serialize(value), ex=ex)
+            return True
+        except Exception as e:
+            logger.warning(f"Failed to set key {key}: {e}")
+            return False
+    
+    async def get(self, key: str, raw: bool = False) -> Optional[Union[str, bytes]]:
+        """Get a key value, as bytes if ``raw``"""
+        if not self.available():
+            return None
+        
+        try:
+            value = await self.client.get(key)
+            return (value or None) if raw else decode(value)
+        except Exception as e:
+            logger.warning(f"Failed to get key {key}: {e}")
+            return None
+    
+    async def set_if_unchanged(self, key: str, value: Any, ex: Optional[int], guard: str,
+                               expected: Optional[str]) -> Optional[bool]:
+        """Set a key only while ``guard`` still holds ``expected``; None if Redis could not be asked"""
+        stored = await self.eval_script(SET_IF_UNCHANGED_SCRIPT, [key, guard],
+                                        [expected or "", serialize(value), ex or 0])
+        return None if stored is None else bool(stored)
+    
+    async def set_nx(self, key: str, value: Any, px: int) -> Optional[bool]:
+        """Set a key expiring after ``px`` ms unless it exists.
+
+        Returns None, rather than False, when Redis could not be asked.
+        """
+        if not self.available():
+            return None
+        
+        try:
+            return bool(await self.client.set(key, serialize(value), nx=True, px=px))
+        except Exception as e:
+            logger.warning(f"Failed to set key {key}: {e}")
+            return None
+    
+    async def get_with_ttl(self, key: str) -> Tuple[Optional[bytes], int]:
+        """Get a key's raw value and remaining TTL in milliseconds in one round trip.
+
+        The TTL follows ``PTTL``: -1 for no expiry and -2 for a missing key.
+        """
+        if not self.available():
+            return None, -2
+        
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            pipe.get(key)
+            pipe.pttl(key)
+            value, ttl = await pipe.execute()
+            return value or None, ttl
+        except Exception as e:
+            logger.warning(f"Failed to get key {key}: {e}")
+            return None, -2
+    
+    async def delete(self, *keys: str) -> bool:
+        """Delete keys"""
+        if not self.available():
+            return False
+        
+        try:
+            await self.client.delete(*keys)
+            return True
+        except Exception as e:
+            logger.warning(f"Failed to delete keys: {e}")
+            return False
+    
+    async def exists(self, key: str) -> bool:
+        """Check if key exists"""
+        if not self.available():
+            return False
+        
+        try:
+            return await self.client.exists(key) > 0
+        except Exception as e:
+            logger.warning(f"Failed to check key existence {key}: {e}")
+            return False
+    
+    async def mget(self, keys: List[str], raw: bool = False) -> List[Optional[Union[str, bytes]]]:
+        """Get several keys in one round trip, as bytes if ``raw``; missing keys are None"""
+        if not self.available() or not keys:
+            return [None] * len(keys)
+        
+        try:
+            values = await self.client.mget(keys)
+            return [value or None for value in values] if raw else [decode(value) for value in values]
+        except Exception as e:
+            logger.warning(f"Failed to get {len(keys)} keys: {e}")
+            return [None] * len(keys)
+    
+    async def mset(self, mapping: Dict[str, Any], ex: Optional[int] = None) -> bool:
+        """Set several keys with an optional expiration in one pipelined round trip"""
+        if not self.available():
+            return False
+        if not mapping:
+            return True
+        
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            for key, value in mapping.items():
+                pipe.set(key, serialize(value), ex=ex)
+            await pipe.execute()
+            return True
+        except Exception as e:
+            logger.warning(f"Failed to set {len(mapping)} keys: {e}")
+            return False
+    
+    async def hmget(self, key: str, fields: List[str]) -> List[Optional[str]]:
+        """Get several hash fields in one round trip; missing fields are None"""
+        if not self.available() or not fields:
+            return [None] * len(fields)
+        
+        try:
+            return [decode(value) for value in await self.client.hmget(key, fields)]
+        except Exception as e:
+            logger.warning(f"Failed to get hash fields from key {key}: {e}")
+            return [None] * len(fields)
+    
+    async def delete_and_publish(self, keys: List[str], channel: str, counters: Iterable[str] = (),
+                           counter_ttl: Optional[int] = None) -> bool:
+        """Delete keys and announce them on a channel in one pipelined round trip.
+
+        ``counters`` are incremented in the same round trip, expiring after
+        ``counter_ttl`` seconds.
+        """
+        if not self.available() or not keys:
+            return False
+        
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            pipe.delete(*keys)
+            for counter in counters:
+                pipe.incr(counter)
+                if counter_ttl:
+                    pipe.expire(counter, counter_ttl)
+            pipe.publish(channel, " ".join(keys))
+            await pipe.execute()
+            return True
+        except Exception as e:
+            logger.warning(f"Failed to invalidate {len(keys)} keys: {e}")
+            return False
+    
+    async def publish(self, channel: str, message: str) -> bool:
+        """Publish a message on a pub/sub channel"""
+        if not self.available():
+            return False
+        
+        try:
+            await self.client.publish(channel, message)
+            return True
+        except Exception as e:
+            logger.warning(f"Failed to publish to {channel}: {e}")
+            return False
+    
+    async def eval_script(self, script: str, keys: List[str], args: List[Any]) -> Optional[Any]:
+        """Run a Lua script atomically via EVALSHA, returning None on failure"""
+        if not self.available():
+            return None
+        
+        try:
+            registered = self.scripts.get(script)
+            if registered is None:
+                registered = self.client.register_script(script)
+                self.scripts[script] = registered
+            return await registered(keys=keys, args=args)
+        except Exception as e:
+            logger.warning(f"Failed to run script on keys {keys}: {e}")
+            return None
+    
+    def stats(self) -> Dict[str, Any]:
+        """Get connection pool usage"""
+        if self.pool is None:
+            return {"enabled": False}
+        return {
+            "enabled": self.enabled,
+            "max_connections": self.pool.max_connections,
+            "in_use": len(self.pool._in_use_connections),
+            "idle": len(self.pool._available_connections),
+        }
+    
+    async def close(self):
+        """Close the client and its connection pool"""
+        if self.client:
+            await self.client.aclose()
+            await self.pool.disconnect()
+            self.client = None
+            self.pool = None
+            self.enabled = False
+            logger.info("Async Redis connection closed")
+
+
 # Global Redis client instance
 _redis_client: Optional[RedisClient] = None
 
@@ -178,54 +785,861 @@ def get_redis_client() -> RedisClient:
     """Get the Redis client instance"""
     global _redis_client
     if _redis_client is None:
-        _redis_client = RedisClient()
+        _redis_client = RedisClient(socket_timeout=get_config().redis.socket_timeout)
         _redis_client.connect()
+        if _redis_client.breaker is not None:
+            register_stats("redis_breaker", _redis_client.breaker.stats)
     return _redis_client
 
 
-class CacheManager:
-    """Cache manager for common caching operations"""
+_async_redis_client: Optional[AsyncRedisClient] = None
+
+
+def get_async_redis_client() -> AsyncRedisClient:
+    """Get the async Redis client instance; ``connect`` it at startup"""
+    global _async_redis_client
+    if _async_redis_client is None:
+        _async_redis_client = AsyncRedisClient(get_redis_client().breaker)
+        register_stats("redis_async_pool", _async_redis_client.stats)
+    return _async_redis_client
+
+
+class InvalidationListener:
+    """Evict L1 entries for keys published on the invalidation channel.
+
+    Runs a pub/sub subscription on a daemon thread. Messages published while
+    the subscription is down are lost, so the L1 cache is cleared whenever it
+    (re)subscribes.
+    """
+    
+    RETRY_INTERVAL = 1.0
     
-    def __init__(self, redis_client: RedisClient):
+    def __init__(self, redis_client: RedisClient, channel: str, local: Optional[LocalCache],
+                 on_key: Optional[Callable[[str], None]] = None,
+                 on_resubscribe: Optional[Callable[[], None]] = None):
         self.redis = redis_client
+        self.channel = channel
+        self.local = local
+        self.on_key = on_key
+        self.on_resubscribe = on_resubscribe
+        self.stopped = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+        self.received = 0
+    
+    def start(self) -> None:
+        """Start listening in the background"""
+        self.thread = threading.Thread(target=self._run, name="cache-invalidation", daemon=True)
+        self.thread.start()
+    
+    def stop(self) -> None:
+        """Stop listening and wait for the thread to exit"""
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join(timeout=5)
+            self.thread = None
+    
+    def handle(self, message: Optional[dict]) -> None:
+        """Evict the space-separated keys named by a pub/sub message"""
+        if not message or message.get("type") != "message":
+            return
+        data = message["data"]
+        for key in (data.decode("utf-8") if isinstance(data, bytes) else data).split():
+            if key.endswith(WILDCARD_SUFFIX):
+                self.flush()
+                continue
+            if self.local is not None:
+                self.local.delete(key)
+            if self.on_key is not None:
+                self.on_key(key)
+        self.received += 1
+    
+    def flush(self) -> None:
+        """Forget everything derived from invalidations that may have been missed"""
+        if self.local is not None:
+            self.local.clear()
+        if self.on_resubscribe is not None:
+            self.on_resubscribe()
+    
+    def _run(self) -> None:
+        subscribed = False
+        while not self.stopped.is_set():
+            pubsub = None
+            try:
+                pubsub = self.redis.client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                if self.local is not None:
+                    self.local.clear()
+                if subscribed and self.on_resubscribe is not None:
+                    self.on_resubscribe()
+                subscribed = True
+                while not self.stopped.is_set():
+                    self.handle(pubsub.get_message(timeout=1.0))
+            except Exception as e:
+                logger.warning(f"Cache invalidation subscription failed: {e}")
+                if self.local is not None:
+                    self.local.clear()
+                self.stopped.wait(self.RETRY_INTERVAL)
+            finally:
+                if pubsub is not None:
+                    try:
+                        pubsub.close()
+                    except Exception:
+                        pass
+
+
+class InvalidationBacklog:
+    """Invalidations that did not reach Redis, to replay once it is back.
+
+    While the circuit breaker is open, deletes and their announcements are
+    skipped, leaving stale entries in Redis and in the L1 caches of other
+    workers. Their keys are kept here until the breaker closes. Past
+    ``max_keys`` only the key prefixes are kept, and the replay drops every
+    key under them instead.
+    """
+    
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self.keys: Set[str] = set()
+        self.prefixes: Set[str] = set()
+        self.lock = threading.Lock()
+        self.replayed = 0
+    
+    def add(self, keys: Iterable[str]) -> None:
+        with self.lock:
+            for key in keys:
+                if len(self.keys) < self.max_keys:
+                    self.keys.add(key)
+                else:
+                    self.prefixes.add(key.partition(":")[0])
+    
+    def restore(self, keys: Iterable[str], prefixes: Iterable[str]) -> None:
+        """Put back what a failed replay did not get to"""
+        self.add(keys)
+        with self.lock:
+            self.prefixes.update(prefixes)
+    
+    def take(self) -> Tuple[List[str], List[str]]:
+        """Remove and return the pending keys and overflowed prefixes"""
+        with self.lock:
+            keys, prefixes = self.keys, self.prefixes
+            self.keys, self.prefixes = set(), set()
+        return [key for key in keys if key.partition(":")[0] not in prefixes], sorted(prefixes)
+    
+    def __len__(self) -> int:
+        return len(self.keys) + len(self.prefixes)
+
+
+def should_refresh(load_time: float, beta: float, remaining: int) -> bool:
+    """XFetch: refresh when -load_time * beta * ln(U) reaches the remaining TTL in ms"""
+    if remaining <= 0:
+        return False
+    return -load_time * beta * math.log(1.0 - random.random()) * 1000 >= remaining
+
+
+class _Flight:
+    """A load in progress that concurrent callers for the same key wait on"""
+    
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class _CacheManagerBase:
+    """Codec, L1, Bloom filter and negative entry handling of the cache managers.
+
+    Subclasses only add the Redis I/O, blocking in ``CacheManager`` and
+    awaited in ``AsyncCacheManager``, so both see the same cached values.
+    """
+    
+    def __init__(self, local: Optional[LocalCache], channel: str, codec: Optional[CacheCodec],
+                 blooms: Optional[Dict[str, BloomFilter]], backlog: Optional[InvalidationBacklog],
+                 lock_ttl: int, lock_wait: float, early_refresh_beta: float, negative_ttl: int):
+        self.local = local
+        self.channel = channel
+        self.codec = codec or CacheCodec()
+        self.blooms = blooms if blooms is not None else {}
+        self.backlog = backlog if backlog is not None else InvalidationBacklog()
+        self.negative_ttl = negative_ttl
+        self.negative_hits = 0
+        self.redis_hits = 0
+        self.redis_misses = 0
+        # Stampede protection for get_or_load
+        self.lock_ttl = lock_ttl
+        self.lock_wait = lock_wait
+        self.early_refresh_beta = early_refresh_beta
+        self.load_times: Dict[str, float] = {}
+        self.loads = 0
+        self.coalesced = 0
+        self.early_refreshes = 0
+        self.stale_fills = 0
+    
+    def _local_get(self, key: str) -> Optional[dict]:
+        return self.local.get(key) if self.local is not None else None
+    
+    def _split_local(self, keys: List[str]) -> Tuple[Dict[str, dict], List[str]]:
+        """Values of ``keys`` found in L1, and the keys left for Redis"""
+        if self.local is None:
+            return {}, keys
+        found = {}
+        missing = []
+        for key in keys:
+            value = self.local.get(key)
+            if value is not None:
+                found[key] = value
+            else:
+                missing.append(key)
+        return found, missing
+    
+    def _decode(self, key: str, data: Optional[bytes], local_ttl: Optional[float] = None) -> Optional[dict]:
+        """Decode a Redis reply and keep it in L1; None counts as a Redis miss"""
+        if not data:
+            self.redis_misses += 1
+            return None
+        try:
+            value = self.codec.decode(data)
+        except CodecError as e:
+            logger.warning(f"Failed to decode cached {key}: {e}")
+            self.redis_misses += 1
+            return None
+        
+        self.redis_hits += 1
+        if self.local is not None:
+            self.local.set(key, value, len(data), local_ttl)
+        return value
+    
+    def _encode(self, key: str, value: dict, ttl: Optional[int]) -> bytes:
+        """Encode a value for Redis and keep it in L1"""
+        data = self.codec.encode(value)
+        if self.local is not None:
+            self.local.set(key, value, len(data), ttl)
+        return data
+    
+    def _encode_many(self, values: Dict[str, dict], ttl: Optional[int]) -> Dict[str, bytes]:
+        return {key: self._encode(key, value, ttl) for key, value in values.items()}
+    
+    def _decode_many(self, found: Dict[str, dict], keys: List[str], replies: List[Optional[bytes]]) -> Dict[str, dict]:
+        for key, data in zip(keys, replies):
+            value = self._decode(key, data)
+            if value is not None:
+                found[key] = value
+        return {key: value for key, value in found.items() if not is_negative(value)}
+    
+    def _filled(self, key: str, value: dict, data: bytes, ttl: Optional[int], stored: Optional[bool]) -> bool:
+        """Keep a filled value in L1 unless Redis turned it down as stale"""
+        if stored is False:
+            self.stale_fills += 1
+            return False
+        if self.local is not None:
+            self.local.set(key, value, len(data), ttl)
+        return bool(stored)
+    
+    def _drop_local(self, keys: List[str]) -> None:
+        """Evict keys from L1 and add them to the Bloom filters before a Redis delete"""
+        for key in keys:
+            if self.local is not None:
+                self.local.delete(key)
+            self._note_key(key)
+    
+    def _invalidated(self, keys: List[str], ok: bool) -> bool:
+        """Keep keys whose invalidation did not reach Redis for the replay"""
+        if not ok and keys and self.redis.enabled:
+            self.backlog.add(keys)
+        return ok
+    
+    def _note_key(self, key: str) -> None:
+        bloom = self.blooms.get(key.partition(":")[0])
+        if bloom is not None:
+            bloom.add(key)
+    
+    def might_exist(self, key: str) -> bool:
+        """False only if the Bloom filter for the key's prefix rules it out"""
+        bloom = self.blooms.get(key.partition(":")[0])
+        return bloom is None or not bloom.ready or key in bloom
+    
+    def _positive(self, value: Optional[dict]) -> Optional[dict]:
+        if is_negative(value):
+            self.negative_hits += 1
+            return None
+        return value
+    
+    def _cached(self, key: str, data: Optional[bytes], remaining: int, ttl: Optional[int]) -> Optional[dict]:
+        """Decode a ``get_with_ttl`` reply, keeping it in L1 no longer than in Redis"""
+        return self._decode(key, data, remaining / 1000 if remaining > 0 else ttl)
+    
+    def _should_refresh(self, key: str, remaining: int) -> bool:
+        return should_refresh(self.load_times.get(key, 0.05), self.early_refresh_beta, remaining)
+    
+    def _loaded(self, key: str, start: float, value: Optional[dict],
+                ttl: Optional[int]) -> Tuple[Optional[dict], Optional[int]]:
+        """Record a load; the entry to cache for its result, negative if None, and its TTL"""
+        if len(self.load_times) > 10000:
+            self.load_times.clear()
+        self.load_times[key] = time.monotonic() - start
+        self.loads += 1
+        if value is not None:
+            return value, ttl
+        if self.negative_ttl > 0:
+            return NEGATIVE_ENTRY, self.negative_ttl
+        return None, None
+    
+    def _ids(self, prefix: str, ids: List[int], found: Dict[str, dict]) -> Dict[int, dict]:
+        return {i: found[f"{prefix}:{i}"] for i in ids if f"{prefix}:{i}" in found}
+    
+    def stats(self) -> Dict[str, Any]:
+        """Get Redis tier hit ratio and loader counters"""
+        total = self.redis_hits + self.redis_misses
+        return {
+            "redis": {
+                "hits": self.redis_hits,
+                "misses": self.redis_misses,
+                "hit_ratio": self.redis_hits / total if total else 0.0,
+            },
+            "loads": self.loads,
+            "coalesced": self.coalesced,
+            "early_refreshes": self.early_refreshes,
+            "negative_hits": self.negative_hits,
+            "stale_fills": self.stale_fills,
+            "invalidation_backlog": len(self.backlog),
+        }
+
+
+class CacheManager(_CacheManagerBase):
+    """Cache manager for common caching operations.
+
+    Reads go through an optional in-process L1 cache before Redis. Every
+    invalidation is published on ``channel`` so the L1 copies held by other
+    workers and replicas are evicted too. Values are stored in Redis in the
+    format of ``codec``; the L1 keeps them decoded.
+
+    IDs a loader found missing are cached as negative entries for
+    ``negative_ttl`` seconds, and optional Bloom filters of existing IDs
+    answer lookups of IDs that never existed without Redis or SQL. Both rely
+    on creations being invalidated like any other write.
+    """
+    
+    def __init__(self, redis_client: RedisClient, local: Optional[LocalCache] = None,
+                 channel: str = "cache:invalidate", codec: Optional[CacheCodec] = None,
+                 lock_ttl: int = 5000, lock_wait: float = 2.0, early_refresh_beta: float = 1.0,
+                 negative_ttl: int = 60, bloom_capacity: int = 1000000, bloom_error_rate: float = 0.01):
+        super().__init__(local, channel, codec, None, None, lock_ttl, lock_wait, early_refresh_beta, negative_ttl)
+        self.redis = redis_client
+        self.bloom_capacity = bloom_capacity
+        self.bloom_error_rate = bloom_error_rate
+        self.bloom_loaders: Dict[str, Callable[[], Iterable[Any]]] = {}
+        self.listener: Optional[InvalidationListener] = None
+        self.redlock: Optional[Redlock] = None
+        self.flights: Dict[str, _Flight] = {}
+        self.flights_lock = threading.Lock()
+    
+    def _get(self, key: str) -> Optional[dict]:
+        value = self._local_get(key)
+        if value is not None:
+            return value
+        return self._decode(key, self.redis.get(key, raw=True))
+    
+    def _set(self, key: str, value: dict, ttl: Optional[int]) -> bool:
+        return self.redis.set(key, self._encode(key, value, ttl), ex=ttl)
+    
+    def _get_many(self, keys: List[str]) -> Dict[str, dict]:
+        found, missing = self._split_local(keys)
+        return self._decode_many(found, missing, self.redis.mget(missing, raw=True))
+    
+    def _set_many(self, values: Dict[str, dict], ttl: Optional[int]) -> bool:
+        return self.redis.mset(self._encode_many(values, ttl), ex=ttl)
+    
+    def _invalidate_many(self, keys: List[str]) -> bool:
+        self._drop_local(keys)
+        ok = self._invalidated(keys, self._delete_and_publish(keys))
+        if ok and len(self.backlog):
+            self.replay_invalidations()
+        return ok
+    
+    def replay_invalidations(self, batch: int = 1000) -> None:
+        """Delete and announce the keys whose invalidation did not reach Redis.
+
+        Runs when the breaker closes. Prefixes the backlog overflowed on are
+        dropped from Redis as a whole and announced as ``prefix:*``, which
+        clears the L1 caches and rebuilds the Bloom filters of every worker.
+        """
+        keys, prefixes = self.backlog.take()
+        for index, prefix in enumerate(prefixes):
+            pattern = prefix + WILDCARD_SUFFIX
+            if not (self.redis.delete_matching(pattern) and self.redis.publish(self.channel, pattern)):
+                self.backlog.restore(keys, prefixes[index:])
+                return
+        for start in range(0, len(keys), batch):
+            chunk = keys[start:start + batch]
+            if not self._delete_and_publish(chunk):
+                self.backlog.restore(keys[start:], [])
+                return
+            self.backlog.replayed += len(chunk)
+        if keys or prefixes:
+            logger.info(f"Replayed {len(keys)} invalidations and {len(prefixes)} prefix flushes")
+    
+    def _delete_and_publish(self, keys: List[str]) -> bool:
+        return self.redis.delete_and_publish(keys, self.channel, map(generation_key, keys), GENERATION_TTL)
+    
+    def _invalidate(self, key: str) -> bool:
+        return self._invalidate_many([key])
+    
+    def get_or_load(self, key: str, loader: Callable[[], Optional[dict]], ttl: Optional[int] = None) -> Optional[dict]:
+        """Get a cached value, calling ``loader`` to fill it on a miss.
+
+        Concurrent misses in this process share one ``loader`` call, and a
+        short Redis lock makes other processes wait for the winner to fill the
+        key instead of loading it too. Keys with a ``ttl`` are refreshed early
+        with a probability that rises as expiry nears (XFetch), so hot keys
+        are reloaded by one caller before they expire for everyone. A None
+        result is cached as a negative entry and returned as None. A result
+        is not cached if the key was invalidated while ``loader`` ran.
+        """
+        if not self.might_exist(key):
+            self.negative_hits += 1
+            return None
+        
+        value = self._local_get(key)
+        if value is not None:
+            return self._positive(value)
+        
+        data, remaining = self.redis.get_with_ttl(key)
+        value = self._cached(key, data, remaining, ttl)
+        if value is not None:
+            if is_negative(value):
+                return self._positive(value)
+            if ttl and self._should_refresh(key, remaining):
+                self.early_refreshes += 1
+                self._single_flight(key, lambda: self._refresh(key, loader, ttl), wait=False)
+            return value
+        
+        return self._positive(self._single_flight(key, lambda: self._load(key, loader, ttl)))
+    
+    def _single_flight(self, key: str, fn: Callable[[], Any], wait: bool = True) -> Any:
+        with self.flights_lock:
+            flight = self.flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self.flights[key] = _Flight()
+        
+        if not leader:
+            if not wait:
+                return None
+            self.coalesced += 1
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+        
+        try:
+            flight.value = fn()
+            return flight.value
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self.flights_lock:
+                del self.flights[key]
+            flight.done.set()
+    
+    def _lock(self, key: str):
+        if not self.redis.is_enabled():
+            return None
+        if self.redlock is None:
+            self.redlock = Redlock([self.redis.client])
+        return self.redlock.lock(f"lock:{key}", ttl=self.lock_ttl, retry_count=1, retry_delay=0, fencing=False)
+    
+    def _load(self, key: str, loader: Callable[[], Optional[dict]], ttl: Optional[int]) -> Optional[dict]:
+        lock = self._lock(key)
+        if lock is None or lock.unreachable:
+            # Without a working Redis nobody can fill the key for us
+            return self._fill(key, loader, ttl)
+        
+        if lock.locked:
+            try:
+                # The previous holder may have filled the key since our miss
+                value = self._get(key)
+                return value if value is not None else self._fill(key, loader, ttl)
+            finally:
+                lock.unlock()
+        
+        # Another process is loading the key; wait for it rather than
+        # hitting the database too, and load ourselves if it takes too long
+        deadline = time.monotonic() + self.lock_wait
+        while time.monotonic() < deadline:
+            time.sleep(0.02)
+            value = self._get(key)
+            if value is not None:
+                return value
+        return self._fill(key, loader, ttl)
+    
+    def _refresh(self, key: str, loader: Callable[[], Optional[dict]], ttl: Optional[int]) -> None:
+        lock = self._lock(key)
+        if lock is not None and not lock.locked:
+            return
+        try:
+            self._fill(key, loader, ttl)
+        except Exception as e:
+            logger.warning(f"Early refresh of {key} failed: {e}")
+        finally:
+            if lock is not None:
+                lock.unlock()
+    
+    def _fill(self, key: str, loader: Callable[[], Optional[dict]], ttl: Optional[int]) -> Optional[dict]:
+        generation = self.redis.get(generation_key(key))
+        start = time.monotonic()
+        value = loader()
+        entry, entry_ttl = self._loaded(key, start, value, ttl)
+        if entry is not None:
+            data = self.codec.encode(entry)
+            stored = self.redis.set_if_unchanged(key, data, entry_ttl, generation_key(key), generation)
+            self._filled(key, entry, data, entry_ttl, stored)
+        return value
+    
+    def enable_bloom(self, prefix: str, load_ids: Callable[[], Iterable[Any]]) -> None:
+        """Track existing ``prefix:{id}`` keys in a Bloom filter built from ``load_ids()``.
+
+        Invalidated keys, local or broadcast, are added to the filter, so
+        creations must be invalidated. The filter is rebuilt after the
+        invalidation subscription reconnects, since messages may have been
+        missed meanwhile.
+        """
+        self.bloom_loaders[prefix] = load_ids
+        self.start_listener()
+        self._build_bloom(prefix)
+    
+    def _build_bloom(self, prefix: str) -> None:
+        bloom = BloomFilter(self.bloom_capacity, self.bloom_error_rate)
+        # Installed before filling so keys invalidated meanwhile are added too
+        self.blooms[prefix] = bloom
+        try:
+            for item_id in self.bloom_loaders[prefix]():
+                bloom.add(f"{prefix}:{item_id}")
+        except Exception as e:
+            logger.warning(f"Failed to build the {prefix} Bloom filter: {e}")
+            return
+        bloom.ready = True
+    
+    def _rebuild_blooms(self) -> None:
+        for prefix in list(self.bloom_loaders):
+            threading.Thread(target=self._build_bloom, args=(prefix,), name=f"bloom-{prefix}", daemon=True).start()
     
     def cache_user(self, user_id: int, user_data: dict, ttl: Optional[int] = None) -> bool:
         """Cache user data"""
-        return self.redis.set(f"user:{user_id}", user_data, ex=ttl)
+        return self._set(f"user:{user_id}", user_data, ttl)
     
     def get_cached_user(self, user_id: int) -> Optional[dict]:
         """Get cached user data"""
-        data = self.redis.get(f"user:{user_id}")
-        if data:
-            try:
-                return json.loads(data)
-            except json.JSONDecodeError:
-                return None
-        return None
+        return self._positive(self._get(f"user:{user_id}"))
     
     def invalidate_user(self, user_id: int) -> bool:
         """Invalidate user cache"""
-        return self.redis.delete(f"user:{user_id}")
+        return self._invalidate(f"user:{user_id}")
     
     def cache_post(self, post_id: int, post_data: dict, ttl: Optional[int] = 3600) -> bool:
         """Cache post data"""
-        return self.redis.set(f"post:{post_id}", post_data, ex=ttl)
+        return self._set(f"post:{post_id}", post_data, ttl)
     
     def get_cached_post(self, post_id: int) -> Optional[dict]:
         """Get cached post data"""
-        data = self.redis.get(f"post:{post_id}")
-        if data:
-            try:
-                return json.loads(data)
-            except json.JSONDecodeError:
-                return None
-        return None
+        return self._positive(self._get(f"post:{post_id}"))
     
     def invalidate_post(self, post_id: int) -> bool:
         """Invalidate post cache"""
-        return self.redis.delete(f"post:{post_id}")
+        return self._invalidate(f"post:{post_id}")
+    
+    def get_cached_users(self, user_ids: List[int]) -> Dict[int, dict]:
+        """Get the cached users among ``user_ids`` in one round trip"""
+        return self._ids("user", user_ids, self._get_many([f"user:{i}" for i in user_ids]))
+    
+    def cache_users(self, users: Dict[int, dict], ttl: Optional[int] = None) -> bool:
+        """Cache several users in one round trip"""
+        return self._set_many({f"user:{i}": data for i, data in users.items()}, ttl)
+    
+    def invalidate_users(self, user_ids: List[int]) -> bool:
+        """Invalidate several users in one round trip"""
+        return self._invalidate_many([f"user:{i}" for i in user_ids])
+    
+    def get_cached_posts(self, post_ids: List[int]) -> Dict[int, dict]:
+        """Get the cached posts among ``post_ids`` in one round trip"""
+        return self._ids("post", post_ids, self._get_many([f"post:{i}" for i in post_ids]))
+    
+    def cache_posts(self, posts: Dict[int, dict], ttl: Optional[int] = 3600) -> bool:
+        """Cache several posts in one round trip"""
+        return self._set_many({f"post:{i}": data for i, data in posts.items()}, ttl)
+    
+    def invalidate_posts(self, post_ids: List[int]) -> bool:
+        """Invalidate several posts in one round trip"""
+        return self._invalidate_many([f"post:{i}" for i in post_ids])
+    
+    def start_listener(self) -> None:
+        """Subscribe to invalidations from other processes"""
+        if self.listener is None and (self.local is not None or self.bloom_loaders) and self.redis.enabled:
+            self.listener = InvalidationListener(self.redis, self.channel, self.local,
+                                                 self._note_key, self._rebuild_blooms)
+            self.listener.start()
+    
+    def close(self) -> None:
+        """Stop the invalidation listener"""
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+    
+    def stats(self) -> Dict[str, Any]:
+        """Get per-tier hit ratios and loader counters"""
+        result = super().stats()
+        for prefix, bloom in self.blooms.items():
+            result[f"bloom_{prefix}"] = bloom.stats()
+        if self.local is not None:
+            result["l1"] = self.local.stats()
+        if self.listener is not None:
+            result["invalidations_received"] = self.listener.received
+        result["invalidations_replayed"] = self.backlog.replayed
+        return result
+
+
+class AsyncCacheManager(_CacheManagerBase):
+    """Async counterpart of ``CacheManager`` sharing its L1 cache, Bloom filters and invalidation backlog"""
+    
+    def __init__(self, redis_client: AsyncRedisClient, local: Optional[LocalCache] = None,
+                 channel: str = "cache:invalidate", codec: Optional[CacheCodec] = None,
+                 blooms: Optional[Dict[str, BloomFilter]] = None, backlog: Optional[InvalidationBacklog] = None,
+                 lock_ttl: int = 5000, lock_wait: float = 2.0, early_refresh_beta: float = 1.0,
+                 negative_ttl: int = 60):
+        super().__init__(local, channel, codec, blooms, backlog, lock_ttl, lock_wait, early_refresh_beta,
+                         negative_ttl)
+        self.redis = redis_client
+        self.flights: Dict[str, asyncio.Task] = {}
+    
+    async def _get(self, key: str) -> Optional[dict]:
+        value = self._local_get(key)
+        if value is not None:
+            return value
+        return self._decode(key, await self.redis.get(key, raw=True))
+    
+    async def _set(self, key: str, value: dict, ttl: Optional[int]) -> bool:
+        return await self.redis.set(key, self._encode(key, value, ttl), ex=ttl)
+    
+    async def _get_many(self, keys: List[str]) -> Dict[str, dict]:
+        found, missing = self._split_local(keys)
+        return self._decode_many(found, missing, await self.redis.mget(missing, raw=True))
+    
+    async def _set_many(self, values: Dict[str, dict], ttl: Optional[int]) -> bool:
+        return await self.redis.mset(self._encode_many(values, ttl), ex=ttl)
+    
+    async def _invalidate_many(self, keys: List[str]) -> bool:
+        self._drop_local(keys)
+        return self._invalidated(keys, await self.redis.delete_and_publish(
+            keys, self.channel, map(generation_key, keys), GENERATION_TTL))
+    
+    async def _invalidate(self, key: str) -> bool:
+        return await self._invalidate_many([key])
+    
+    async def get_or_load(self, key: str, loader: Callable[[], Awaitable[Optional[dict]]],
+                          ttl: Optional[int] = None) -> Optional[dict]:
+        """Get a cached value, awaiting ``loader`` to fill it on a miss.
+
+        Behaves like ``CacheManager.get_or_load`` without blocking the event
+        loop: concurrent misses await one load task, waiting for another
+        process's fill sleeps with ``asyncio.sleep``, and early refreshes run
+        as background tasks, so ``loader`` must not use the caller's session.
+        """
+        if not self.might_exist(key):
+            self.negative_hits += 1
+            return None
+        
+        value = self._local_get(key)
+        if value is not None:
+            return self._positive(value)
+        
+        data, remaining = await self.redis.get_with_ttl(key)
+        value = self._cached(key, data, remaining, ttl)
+        if value is not None:
+            if is_negative(value):
+                return self._positive(value)
+            if ttl and key not in self.flights and self._should_refresh(key, remaining):
+                self.early_refreshes += 1
+                self._single_flight(key, lambda: self._refresh(key, loader, ttl))
+            return value
+        
+        # Shielded so a cancelled caller does not cancel the load for the others
+        return self._positive(await asyncio.shield(self._single_flight(key, lambda: self._load(key, loader, ttl))))
+    
+    def _single_flight(self, key: str, fn: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        task = self.flights.get(key)
+        if task is not None:
+            self.coalesced += 1
+            return task
+        
+        task = self.flights[key] = asyncio.ensure_future(fn())
+        
+        def done(finished: asyncio.Task) -> None:
+            if self.flights.get(key) is finished:
+                del self.flights[key]
+            if not finished.cancelled():
+                # Retrieved here so a load nobody awaits any more is not logged
+                finished.exception()
+        
+        task.add_done_callback(done)
+        return task
+    
+    async def _lock(self, key: str) -> Tuple[Optional[bool], str]:
+        """Take ``key``'s load lock; None if Redis could not be asked"""
+        token = uuid.uuid4().hex
+        if not self.redis.is_enabled():
+            return None, token
+        return await self.redis.set_nx(f"lock:{key}", token, self.lock_ttl), token
+    
+    async def _unlock(self, key: str, token: str) -> None:
+        await self.redis.eval_script(UNLOCK_SCRIPT, [f"lock:{key}"], [token])
+    
+    async def _load(self, key: str, loader: Callable[[], Awaitable[Optional[dict]]],
+                    ttl: Optional[int]) -> Optional[dict]:
+        locked, token = await self._lock(key)
+        if locked is None:
+            # Without a working Redis nobody can fill the key for us
+            return await self._fill(key, loader, ttl)
+        
+        if locked:
+            try:
+                # The previous holder may have filled the key since our miss
+                value = await self._get(key)
+                return value if value is not None else await self._fill(key, loader, ttl)
+            finally:
+                await self._unlock(key, token)
+        
+        # Another process is loading the key; wait for it rather than
+        # hitting the database too, and load ourselves if it takes too long
+        deadline = time.monotonic() + self.lock_wait
+        while time.monotonic() < deadline:
+            await asyncio.sleep(0.02)
+            value = await self._get(key)
+            if value is not None:
+                return value
+        return await self._fill(key, loader, ttl)
+    
+    async def _refresh(self, key: str, loader: Callable[[], Awaitable[Optional[dict]]],
+                       ttl: Optional[int]) -> None:
+        locked, token = await self._lock(key)
+        if locked is False:
+            return
+        try:
+            await self._fill(key, loader, ttl)
+        except Exception as e:
+            logger.warning(f"Early refresh of {key} failed: {e}")
+        finally:
+            if locked:
+                await self._unlock(key, token)
+    
+    async def _fill(self, key: str, loader: Callable[[], Awaitable[Optional[dict]]],
+                    ttl: Optional[int]) -> Optional[dict]:
+        generation = await self.redis.get(generation_key(key))
+        start = time.monotonic()
+        value = await loader()
+        entry, entry_ttl = self._loaded(key, start, value, ttl)
+        if entry is not None:
+            data = self.codec.encode(entry)
+            stored = await self.redis.set_if_unchanged(key, data, entry_ttl, generation_key(key), generation)
+            self._filled(key, entry, data, entry_ttl, stored)
+        return value
+    
+    async def cache_user(self, user_id: int, user_data: dict, ttl: Optional[int] = None) -> bool:
+        """Cache user data"""
+        return await self._set(f"user:{user_id}", user_data, ttl)
+    
+    async def get_cached_user(self, user_id: int) -> Optional[dict]:
+        """Get cached user data"""
+        return self._positive(await self._get(f"user:{user_id}"))
+    
+    async def invalidate_user(self, user_id: int) -> bool:
+        """Invalidate user cache"""
+        return await self._invalidate(f"user:{user_id}")
+    
+    async def cache_post(self, post_id: int, post_data: dict, ttl: Optional[int] = 3600) -> bool:
+        """Cache post data"""
+        return await self._set(f"post:{post_id}", post_data, ttl)
+    
+    async def get_cached_post(self, post_id: int) -> Optional[dict]:
+        """Get cached post data"""
+        return self._positive(await self._get(f"post:{post_id}"))
+    
+    async def invalidate_post(self, post_id: int) -> bool:
+        """Invalidate post cache"""
+        return await self._invalidate(f"post:{post_id}")
+    
+    async def get_cached_users(self, user_ids: List[int]) -> Dict[int, dict]:
+        """Get the cached users among ``user_ids`` in one round trip"""
+        return self._ids("user", user_ids, await self._get_many([f"user:{i}" for i in user_ids]))
+    
+    async def cache_users(self, users: Dict[int, dict], ttl: Optional[int] = None) -> bool:
+        """Cache several users in one round trip"""
+        return await self._set_many({f"user:{i}": data for i, data in users.items()}, ttl)
+    
+    async def invalidate_users(self, user_ids: List[int]) -> bool:
+        """Invalidate several users in one round trip"""
+        return await self._invalidate_many([f"user:{i}" for i in user_ids])
+    
+    async def get_cached_posts(self, post_ids: List[int]) -> Dict[int, dict]:
+        """Get the cached posts among ``post_ids`` in one round trip"""
+        return self._ids("post", post_ids, await self._get_many([f"post:{i}" for i in post_ids]))
+    
+    async def cache_posts(self, posts: Dict[int, dict], ttl: Optional[int] = 3600) -> bool:
+        """Cache several posts in one round trip"""
+        return await self._set_many({f"post:{i}": data for i, data in posts.items()}, ttl)
+    
+    async def invalidate_posts(self, post_ids: List[int]) -> bool:
+        """Invalidate several posts in one round trip"""
+        return await self._invalidate_many([f"post:{i}" for i in post_ids])
+
+
+# Global cache manager instance
+_cache_manager: Optional[CacheManager] = None
 
 
 def get_cache_manager() -> CacheManager:
-    """Get cache manager instance"""
-    return CacheManager(get_redis_client())
+    """Get the cache manager instance.
+
+    The L1 tier is only used with Redis enabled, since without pub/sub other
+    workers would never hear about invalidations.
+    """
+    global _cache_manager
+    if _cache_manager is None:
+        redis_client = get_redis_client()
+        redis_config = get_config().redis
+        local = None
+        if redis_client.enabled and redis_config.local_cache_bytes > 0:
+            local = LocalCache(redis_config.local_cache_bytes, redis_config.local_cache_ttl)
+        
+        codec = CacheCodec(redis_config.serializer, redis_config.compression, redis_config.compress_threshold)
+        _cache_manager = CacheManager(
+            redis_client, local, redis_config.invalidation_channel, codec,
+            lock_ttl=redis_config.load_lock_ttl,
+            lock_wait=redis_config.load_lock_wait,
+            early_refresh_beta=redis_config.early_refresh_beta,
+            negative_ttl=redis_config.negative_ttl,
+            bloom_capacity=redis_config.bloom_capacity,
+            bloom_error_rate=redis_config.bloom_error_rate
+        )
+        _cache_manager.start_listener()
+        if redis_client.breaker is not None:
+            redis_client.breaker.on_close(_cache_manager.replay_invalidations)
+        register_stats("cache", _cache_manager.stats)
+    return _cache_manager
+
+
+_async_cache_manager: Optional[AsyncCacheManager] = None
+
+
+def get_async_cache_manager() -> AsyncCacheManager:
+    """Get the async cache manager instance"""
+    global _async_cache_manager
+    if _async_cache_manager is None:
+        manager = get_cache_manager()
+        _async_cache_manager = AsyncCacheManager(
+            get_async_redis_client(), manager.local, manager.channel, manager.codec, manager.blooms, manager.backlog,
+            lock_ttl=manager.lock_ttl,
+            lock_wait=manager.lock_wait,
+            early_refresh_beta=manager.early_refresh_beta,
+            negative_ttl=manager.negative_ttl
+        )
+        register_stats("async_cache", _async_cache_manager.stats)
+    return _async_cache_manager
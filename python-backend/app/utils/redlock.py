@@ -37,6 +37,9 @@ class Lock:
         self.clients = clients
         self.locked = True
         self.fencing_token = fencing_token  # Monotonically increasing fencing token
+        # Set on an unlocked Lock when too many instances failed to answer,
+        # as opposed to the lock being held by someone else
+        self.unreachable = False
 
     def unlock(self) -> bool:
         """Release the lock on all instances using an atomic check-and-del Lua script.
@@ -72,15 +75,17 @@ class Redlock:
         self.clients = clients
         self.quorum = len(clients) // 2 + 1
 
-    def _set_lock_instance(self, client: redis.Redis, resource: str, token: str, ttl: int) -> bool:
+    def _set_lock_instance(self, client: redis.Redis, resource: str, token: str, ttl: int) -> Optional[bool]:
         # ttl in milliseconds; redis-py expects px for milliseconds
         try:
             # Using set with nx and px for atomic set-if-not-exists with expiry
-            return client.set(resource, token, nx=True, px=ttl)
+            return bool(client.set(resource, token, nx=True, px=ttl))
         except Exception:
-            return False
+            # None rather than False: the instance did not answer
+            return None
 
-    def lock(self, resource: str, ttl: int = 10000, retry_count: int = 3, retry_delay: float = 0.2) -> Lock:
+    def lock(self, resource: str, ttl: int = 10000, retry_count: int = 3, retry_delay: float = 0.2,
+             fencing: bool = True) -> Lock:
         """Attempt to acquire a distributed lock.
 
         Args:
@@ -88,21 +93,32 @@ class Redlock:
             ttl: lock expiry in milliseconds
             retry_count: number of attempts
             retry_delay: base delay between retries in seconds (jitter applied)
+            fencing: issue a fencing token; the counter key never expires, so
+                skip it for short-lived per-key locks
 
-        Returns a Lock object with `.locked` == True when acquired; otherwise a Lock with `.locked` False.
+        Returns a Lock object with `.locked` == True when acquired; otherwise a Lock with `.locked` False,
+        and `.unreachable` True if the last attempt failed because too many instances raised errors.
         """
+        error_count = 0
         for attempt in range(retry_count):
             token = uuid.uuid4().hex
             start = int(time.time() * 1000)
             success_count = 0
+            error_count = 0
             for client in self.clients:
-                if self._set_lock_instance(client, resource, token, ttl):
+                acquired = self._set_lock_instance(client, resource, token, ttl)
+                if acquired:
                     success_count += 1
+                elif acquired is None:
+                    error_count += 1
 
             elapsed = int(time.time() * 1000) - start
             validity = ttl - elapsed
 
             if success_count >= self.quorum and validity > 0:
+                if not fencing:
+                    return Lock(resource, token, validity, self.clients)
+
                 # Issue fencing token using INCR on a dedicated key (use first client)
                 fencing_token = None
                 try:
@@ -125,10 +141,14 @@ class Redlock:
                     pass
 
             # wait before retry with jitter
-            time.sleep(retry_delay + random.uniform(0, retry_delay))
+            if attempt < retry_count - 1:
+                time.sleep(retry_delay + random.uniform(0, retry_delay))
 
         # return unlocked lock object
-        return Lock(resource, "", 0, self.clients, None)
+        lock = Lock(resource, "", 0, self.clients, None)
+        lock.locked = False
+        lock.unreachable = error_count > len(self.clients) - self.quorum
+        return lock
 
 
 __all__ = ["Redlock", "Lock"]
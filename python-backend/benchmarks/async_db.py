@@ -0,0 +1,128 @@
+"""Load test comparing the sync Session path with the AsyncSession path.
+
+Serves ``GET /users/{id}`` twice, once through ``get_db``/``UserRepository``
+and once through ``get_async_db``/``AsyncUserRepository``, and measures
+throughput as concurrency grows. Every request first runs
+``SELECT sleep_ms(:latency)`` to stand in for a network round trip to a
+database server; on the sync path that wait blocks the event loop, on the
+async path it runs in the driver's worker thread.
+
+Usage (from python-backend/):
+    python -m benchmarks.async_db --latency-ms 5 --requests 400
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.config import AppConfig, ServerConfig, RedisConfig, set_config
+from app.database import Base, DatabaseManager, get_async_db, get_db
+from app.models import User
+from app.repositories import AsyncUserRepository, UserRepository
+
+
+def register_sleep(engine) -> None:
+    """Add a ``sleep_ms`` SQL function to every connection of the engine"""
+    @event.listens_for(engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        dbapi_connection.create_function("sleep_ms", 1, lambda ms: time.sleep(ms / 1000))
+
+
+def build_app(manager: DatabaseManager, latency_ms: int) -> FastAPI:
+    """Build an app exposing the same lookup on both paths"""
+    app = FastAPI()
+    delay = text("SELECT sleep_ms(:ms)")
+
+    def override_get_db():
+        yield from manager.get_session()
+
+    async def override_get_async_db():
+        async for session in manager.get_async_session():
+            yield session
+
+    @app.get("/sync/users/{user_id}")
+    async def sync_user(user_id: int, db: Session = Depends(get_db)):
+        db.execute(delay, {"ms": latency_ms})
+        return {"name": UserRepository(db).get_by_id(user_id).name}
+
+    @app.get("/async/users/{user_id}")
+    async def async_user(user_id: int, db: AsyncSession = Depends(get_async_db)):
+        await db.execute(delay, {"ms": latency_ms})
+        return {"name": (await AsyncUserRepository(db).get_by_id(user_id)).name}
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    return app
+
+
+async def run(app: FastAPI, path: str, total: int, concurrency: int) -> float:
+    """Issue ``total`` requests with ``concurrency`` workers, return req/s"""
+    remaining = total
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def worker():
+            nonlocal remaining
+            while remaining > 0:
+                remaining -= 1
+                response = await client.get(path)
+                assert response.status_code == 200, response.text
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return total / (time.perf_counter() - start)
+
+
+async def main(total: int, latency_ms: int) -> None:
+    set_config(AppConfig(
+        server=ServerConfig(env="bench", db_type="sqlite"),
+        redis=RedisConfig(enable=False)
+    ))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DATABASE_URL"] = f"sqlite:///{tmp}/bench.db"
+        manager = DatabaseManager()
+        manager.init_db()
+        manager.init_async_db()
+        register_sleep(manager.engine)
+        register_sleep(manager.async_engine.sync_engine)
+        Base.metadata.create_all(bind=manager.engine)
+
+        db = next(manager.get_session())
+        user = User(name="bench")
+        db.add(user)
+        db.commit()
+        user_id = user.id
+        db.close()
+
+        app = build_app(manager, latency_ms)
+        print(f"{total} requests, {latency_ms}ms simulated DB latency")
+        print(f"{'concurrency':>12} {'sync req/s':>12} {'async req/s':>12}")
+        # Both engines use the default pool (5 + 10 overflow), so concurrency
+        # stays below 15 to measure the event loop rather than pool waits
+        for concurrency in (1, 2, 4, 8, 12):
+            sync_rps = await run(app, f"/sync/users/{user_id}", total, concurrency)
+            async_rps = await run(app, f"/async/users/{user_id}", total, concurrency)
+            print(f"{concurrency:>12} {sync_rps:>12.0f} {async_rps:>12.0f}")
+
+        await manager.close_async()
+        manager.close()
+
+
+if __name__ == "__main__":
+    import logging
+    logging.disable(logging.INFO)
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--latency-ms", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.latency_ms))
@@ -0,0 +1,123 @@
+"""Encode/decode time and stored size of cached users and posts per codec.
+
+Encodes the ``to_dict()`` of a user and of a post with every serializer and
+compression combination the installed libraries allow, and reports the mean
+encode and decode time and the payload size. Post bodies are random prose of
+``--post-bytes`` characters, so compression ratios are closer to real content
+than repeated characters would be.
+
+With ``--redis-url``, ``--keys`` copies of each value are also written to that
+server and the mean ``MEMORY USAGE`` per key is reported, which includes the
+key and Redis' per-entry overhead. The keys are deleted afterwards.
+
+Usage (from python-backend/):
+    python -m benchmarks.cache_codec --iterations 20000 --post-bytes 4000
+    python -m benchmarks.cache_codec --redis-url redis://localhost:6379/15
+"""
+
+import argparse
+import random
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from app.models import Post, User
+from app.utils import codec as codec_module
+from app.utils.codec import COMPRESSIONS, SERIALIZERS, CacheCodec
+
+WORDS = (
+    "the a cache redis post user value request server latency memory query "
+    "index page cursor worker process connection pool write read update token "
+    "session group role rule permission container cluster deploy service"
+).split()
+
+
+def sample_values(post_bytes: int) -> Dict[str, Dict[str, Any]]:
+    """Build a representative cached user and post"""
+    rng = random.Random(0)
+    content = []
+    size = 0
+    while size < post_bytes:
+        word = rng.choice(WORDS)
+        content.append(word)
+        size += len(word) + 1
+    now = datetime(2024, 1, 1, 12, 0, 0)
+
+    user = User(id=1024, name="alice.example", email="alice@example.com",
+                avatar="https://avatars.example.com/u/1024?v=4", created_at=now, updated_at=now)
+    post = Post(id=4096, title="Tuning the cache layer", content=" ".join(content)[:post_bytes],
+                summary="How values are encoded and compressed", author_id=1024, view_count=321,
+                created_at=now, updated_at=now)
+    return {"user": user.to_dict(), "post": post.to_dict()}
+
+
+def available() -> bool:
+    """Whether every serializer and compression library is installed"""
+    return None not in (codec_module.orjson, codec_module.msgpack, codec_module.zstandard, codec_module.lz4_frame)
+
+
+def timed(fn, arg, iterations: int) -> float:
+    """Mean microseconds per call"""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn(arg)
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def redis_memory(client, name: str, data: bytes, keys: int) -> float:
+    """Mean MEMORY USAGE in bytes of ``keys`` copies of ``data``"""
+    names = [f"bench:codec:{name}:{i}" for i in range(keys)]
+    pipe = client.pipeline(transaction=False)
+    for key in names:
+        pipe.set(key, data)
+    pipe.execute()
+    pipe = client.pipeline(transaction=False)
+    for key in names:
+        pipe.memory_usage(key, samples=0)
+    usage = pipe.execute()
+    client.delete(*names)
+    return sum(usage) / len(usage)
+
+
+def main(iterations: int, post_bytes: int, threshold: int, redis_url: Optional[str], keys: int) -> None:
+    values = sample_values(post_bytes)
+    if not available():
+        print("Some codec libraries are missing; their rows fall back to json/none")
+
+    client = None
+    if redis_url:
+        import redis
+        client = redis.Redis.from_url(redis_url)
+
+    print(f"{iterations} iterations, post content {post_bytes} bytes, compress threshold {threshold} bytes")
+    header = f"{'value':<6} {'codec':<16} {'encode us':>10} {'decode us':>10} {'bytes':>8}"
+    print(header + (f" {'redis bytes':>12}" if client else ""))
+
+    for name, value in values.items():
+        for serializer in SERIALIZERS:
+            for compression in COMPRESSIONS:
+                codec = CacheCodec(serializer, compression, compress_threshold=threshold)
+                data = codec.encode(value)
+                encode_us = timed(codec.encode, value, iterations)
+                decode_us = timed(codec.decode, data, iterations)
+                row = (
+                    f"{name:<6} {serializer + '+' + compression:<16}"
+                    f" {encode_us:>10.2f} {decode_us:>10.2f} {len(data):>8}"
+                )
+                if client:
+                    row += f" {redis_memory(client, f'{name}:{serializer}:{compression}', data, keys):>12.0f}"
+                print(row)
+
+
+if __name__ == "__main__":
+    import logging
+    logging.disable(logging.INFO)
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=20000)
+    parser.add_argument("--post-bytes", type=int, default=4000)
+    parser.add_argument("--threshold", type=int, default=1024)
+    parser.add_argument("--redis-url", default=None)
+    parser.add_argument("--keys", type=int, default=1000)
+    args = parser.parse_args()
+    main(args.iterations, args.post_bytes, args.threshold, args.redis_url, args.keys)
@@ -0,0 +1,142 @@
+"""Compare the BaseHTTPMiddleware stack against the pure-ASGI stack.
+
+Builds two otherwise identical apps, one with the legacy middlewares from
+``app.middleware.legacy`` and one with the ASGI middlewares from
+``app.middleware``, and drives them in-process over httpx's ASGI transport so
+the numbers reflect middleware overhead rather than network or server costs.
+
+Usage (from python-backend/):
+    python -m benchmarks.middleware_stack --requests 5000 --concurrency 50
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import List
+
+import httpx
+from fastapi import FastAPI
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app import middleware as asgi_middleware
+from app.config import AppConfig, ServerConfig, RedisConfig, RateLimitConfig, set_config
+from app.controllers import users
+from app.database import Base, get_db
+from app.middleware import legacy as legacy_middleware
+from app.models import User
+from app.utils.auth import create_access_token
+
+
+def build_app(middleware_module, session_factory, **rate_limit_kwargs) -> FastAPI:
+    """Build an app using the middlewares from the given module"""
+    app = FastAPI()
+    app.add_middleware(middleware_module.ErrorHandlingMiddleware)
+    app.add_middleware(middleware_module.AuthenticationMiddleware)
+    app.add_middleware(middleware_module.RateLimitMiddleware, **rate_limit_kwargs)
+    app.add_middleware(middleware_module.LoggingMiddleware)
+    app.add_middleware(middleware_module.RequestIDMiddleware)
+    app.include_router(users.router)
+
+    @app.get("/healthz")
+    async def health_check():
+        return {"status": "healthy"}
+
+    def override_get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    return app
+
+
+async def run(app: FastAPI, path: str, headers: dict, total: int, concurrency: int) -> List[float]:
+    """Issue ``total`` requests with ``concurrency`` workers and return latencies"""
+    latencies: List[float] = []
+    remaining = total
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def worker():
+            nonlocal remaining
+            while remaining > 0:
+                remaining -= 1
+                start = time.perf_counter()
+                response = await client.get(path, headers=headers)
+                latencies.append(time.perf_counter() - start)
+                assert response.status_code == 200, response.text
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+    return latencies
+
+
+def report(name: str, latencies: List[float], elapsed: float) -> None:
+    """Print requests/sec and latency percentiles"""
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2]
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(
+        f"{name:<32} {len(latencies) / elapsed:>10.0f} req/s"
+        f"   mean {statistics.mean(latencies) * 1000:7.3f}ms"
+        f"   p50 {p50 * 1000:7.3f}ms   p99 {p99 * 1000:7.3f}ms"
+    )
+
+
+async def main(total: int, concurrency: int) -> None:
+    set_config(AppConfig(
+        server=ServerConfig(env="bench", jwt_secret="bench-secret", db_type="sqlite"),
+        redis=RedisConfig(enable=False)
+    ))
+
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    db = session_factory()
+    user = User(name="bench", email="bench@example.com", password="x")
+    db.add(user)
+    db.commit()
+    user_id = user.id
+    db.close()
+
+    headers = {"Authorization": f"Bearer {create_access_token(user_id, 'bench')}"}
+    # Limits are set high enough that they never reject benchmark traffic
+    stacks = {
+        "BaseHTTPMiddleware": build_app(
+            legacy_middleware, session_factory, requests_per_minute=10 ** 9
+        ),
+        "pure ASGI": build_app(
+            asgi_middleware, session_factory,
+            configs=[RateLimitConfig(limit_type="ip", burst=10 ** 9, qps=10 ** 9, cache_size=2048)]
+        ),
+    }
+
+    for path in ("/healthz", f"/api/users/{user_id}"):
+        print(f"\n{path}  ({total} requests, concurrency {concurrency})")
+        for name, app in stacks.items():
+            # Warm up routing and dependency caches
+            await run(app, path, headers, min(total, 200), concurrency)
+            start = time.perf_counter()
+            latencies = await run(app, path, headers, total, concurrency)
+            report(name, latencies, time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    import logging
+    logging.disable(logging.INFO)
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency))
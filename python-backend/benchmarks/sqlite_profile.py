@@ -0,0 +1,119 @@
+"""Concurrent read/write throughput with and without the SQLite profile.
+
+Runs reader and writer threads against a file database for a fixed time,
+once with the default setup (rollback journal, one shared pool) and once with
+``sqlite_performance`` enabled (WAL, tuned PRAGMAs, a single writer
+connection and a reader pool). Readers look up random users by primary key;
+writers insert a post and update a user in one transaction. Failed operations
+(``database is locked``) are counted separately.
+
+Usage (from python-backend/):
+    python -m benchmarks.sqlite_profile --readers 8 --writers 2 --seconds 5
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+from typing import Dict
+
+from sqlalchemy.exc import OperationalError
+
+from app.config import AppConfig, DBConfig, ServerConfig, RedisConfig, set_config
+from app.database import Base, DatabaseManager
+from app.models import Post, User
+
+USERS = 1000
+
+
+def seed(manager: DatabaseManager) -> None:
+    """Create the schema and ``USERS`` users"""
+    Base.metadata.create_all(bind=manager.engine)
+    session = next(manager.get_session())
+    session.add_all(User(name=f"user{i}", email=f"user{i}@example.com") for i in range(USERS))
+    session.commit()
+    session.close()
+
+
+def run(manager: DatabaseManager, readers: int, writers: int, seconds: float) -> Dict[str, int]:
+    """Run readers and writers for ``seconds`` and count operations"""
+    counts = {"reads": 0, "writes": 0, "errors": 0}
+    lock = threading.Lock()
+    deadline = time.monotonic() + seconds
+
+    def count(key: str) -> None:
+        with lock:
+            counts[key] += 1
+
+    def reader():
+        while time.monotonic() < deadline:
+            session = next(manager.get_session(use_replica=True))
+            try:
+                session.get(User, random.randint(1, USERS))
+                count("reads")
+            except OperationalError:
+                count("errors")
+            finally:
+                session.close()
+
+    def writer():
+        while time.monotonic() < deadline:
+            session = next(manager.get_session())
+            try:
+                user = session.get(User, random.randint(1, USERS))
+                session.add(Post(title="bench", content="x" * 200, author_id=user.id))
+                user.avatar = f"avatar-{random.random()}"
+                session.commit()
+                count("writes")
+            except OperationalError:
+                session.rollback()
+                count("errors")
+            finally:
+                session.close()
+
+    threads = [threading.Thread(target=reader) for _ in range(readers)]
+    threads += [threading.Thread(target=writer) for _ in range(writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return counts
+
+
+def main(readers: int, writers: int, seconds: float) -> None:
+    print(f"{readers} readers, {writers} writers, {seconds:g}s per profile")
+    print(f"{'profile':<12} {'reads/s':>10} {'writes/s':>10} {'errors':>8}")
+
+    for name, performance in (("default", False), ("performance", True)):
+        with tempfile.TemporaryDirectory() as tmp:
+            db_config = DBConfig(file=f"{tmp}/bench.db", sqlite_performance=performance)
+            set_config(AppConfig(
+                server=ServerConfig(env="bench", db_type="sqlite"),
+                sqlite=db_config,
+                redis=RedisConfig(enable=False)
+            ))
+            manager = DatabaseManager()
+            manager.init_db(db_config)
+            seed(manager)
+
+            counts = run(manager, readers, writers, seconds)
+            print(
+                f"{name:<12} {counts['reads'] / seconds:>10.0f}"
+                f" {counts['writes'] / seconds:>10.0f} {counts['errors']:>8}"
+            )
+            manager.close()
+
+
+if __name__ == "__main__":
+    import logging
+    logging.disable(logging.INFO)
+    os.environ.pop("DATABASE_URL", None)
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=5)
+    args = parser.parse_args()
+    main(args.readers, args.writers, args.seconds)
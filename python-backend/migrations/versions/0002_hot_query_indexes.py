@@ -0,0 +1,51 @@
+"""Hot query indexes
+
+Adds secondary indexes for the predicates the repositories and services
+filter and sort on, and makes a like unique per (user, post). Duplicate likes
+are removed first, keeping the oldest one.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 03:11:14.577988
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_users_email', 'users', ['email'])
+    op.create_index('ix_users_deleted_at', 'users', ['deleted_at'])
+    op.create_index('ix_auth_infos_auth_type_auth_id', 'auth_infos', ['auth_type', 'auth_id'])
+    op.create_index('ix_posts_author_id', 'posts', ['author_id'])
+    op.create_index('ix_posts_created_at_id', 'posts', ['created_at', 'id'])
+    op.create_index('ix_posts_deleted_at', 'posts', ['deleted_at'])
+    op.create_index('ix_comments_post_id', 'comments', ['post_id'])
+    op.create_index('ix_likes_post_id', 'likes', ['post_id'])
+
+    # The derived table lets MySQL delete from the table it selects from
+    op.execute(
+        "DELETE FROM likes WHERE id NOT IN ("
+        "SELECT keep_id FROM (SELECT MIN(id) AS keep_id FROM likes GROUP BY user_id, post_id) AS keep)"
+    )
+    op.create_index('uq_likes_user_id_post_id', 'likes', ['user_id', 'post_id'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('uq_likes_user_id_post_id', table_name='likes')
+    op.drop_index('ix_likes_post_id', table_name='likes')
+    op.drop_index('ix_comments_post_id', table_name='comments')
+    op.drop_index('ix_posts_deleted_at', table_name='posts')
+    op.drop_index('ix_posts_created_at_id', table_name='posts')
+    op.drop_index('ix_posts_author_id', table_name='posts')
+    op.drop_index('ix_auth_infos_auth_type_auth_id', table_name='auth_infos')
+    op.drop_index('ix_users_deleted_at', table_name='users')
+    op.drop_index('ix_users_email', table_name='users')
@@ -0,0 +1,36 @@
+"""View flush batches
+
+Records the ID of every view count batch written to posts.view_count, so a
+batch that is flushed again after a crash is skipped instead of counted twice.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 14:02:51.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'view_flushes',
+        sa.Column('batch_id', sa.String(length=32), nullable=False),
+        sa.Column('flushed_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('batch_id')
+    )
+    op.create_index('ix_view_flushes_flushed_at', 'view_flushes', ['flushed_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_view_flushes_flushed_at', table_name='view_flushes')
+    op.drop_table('view_flushes')
@@ -1,18 +1,26 @@
 """Test configuration and fixtures"""
 
+import fnmatch
+import json
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from app.database import Base, get_db
+from sqlalchemy.pool import NullPool
+from app.database import Base, get_async_db, get_db, get_read_db, to_async_url
 from app.main import app
 from app.config import AppConfig, ServerConfig, DBConfig, RedisConfig, set_config
+from app.services.permission_index import get_permission_index
 
 
 # Create test database
 TEST_DATABASE_URL = "sqlite:///./test.db"
 engine = create_engine(TEST_DATABASE_URL, connect_args={"check_same_thread": False})
 TestSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Not pooled: the test client runs each app on an event loop of its own
+async_engine = create_async_engine(to_async_url(TEST_DATABASE_URL), poolclass=NullPool)
+TestAsyncSessionLocal = async_sessionmaker(bind=async_engine, expire_on_commit=False)
 
 
 def override_get_db():
@@ -24,6 +32,90 @@ def override_get_db():
         db.close()
 
 
+async def override_get_async_db():
+    """Override async database dependency for testing"""
+    async with TestAsyncSessionLocal() as db:
+        yield db
+
+
+class DictRedis:
+    """In-memory stand-in for the RedisClient key/value and pub/sub calls"""
+    
+    enabled = False
+    
+    def __init__(self):
+        self.data = {}
+        self.ttls = {}
+        self.published = []
+        self.round_trips = 0
+    
+    def is_enabled(self):
+        return False
+    
+    def set(self, key, value, ex=None):
+        self.data[key] = json.dumps(value) if isinstance(value, (dict, list)) else value
+        self.ttls[key] = ex
+        return True
+    
+    def get(self, key, raw=False):
+        return self.data.get(key)
+    
+    def get_with_ttl(self, key):
+        if key not in self.data:
+            return None, -2
+        ex = self.ttls.get(key)
+        return self.data[key], ex * 1000 if ex else -1
+    
+    def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+        return True
+    
+    def delete_matching(self, pattern):
+        for key in fnmatch.filter(list(self.data), pattern):
+            del self.data[key]
+        return True
+    
+    def publish(self, channel, message):
+        self.published.append((channel, message))
+        return True
+    
+    def mget(self, keys, raw=False):
+        self.round_trips += 1
+        return [self.data.get(key) for key in keys]
+    
+    def mset(self, mapping, ex=None):
+        self.round_trips += 1
+        self.data.update(mapping)
+        self.ttls.update(dict.fromkeys(mapping, ex))
+        return True
+    
+    def set_if_unchanged(self, key, value, ex, guard, expected):
+        if self.data.get(guard) != expected:
+            return False
+        return DictRedis.set(self, key, value, ex)
+    
+    def delete_and_publish(self, keys, channel, counters=(), counter_ttl=None):
+        DictRedis.delete(self, *keys)
+        for counter in counters:
+            self.data[counter] = str(int(self.data.get(counter, 0)) + 1)
+        return DictRedis.publish(self, channel, " ".join(keys))
+
+
+class SharedRedis(DictRedis):
+    """DictRedis reporting itself enabled, with INCR"""
+    
+    enabled = True
+    
+    def is_enabled(self):
+        return True
+    
+    def incr(self, key):
+        value = int(self.data.get(key, 0)) + 1
+        self.data[key] = str(value)
+        return value
+
+
 @pytest.fixture(scope="session", autouse=True)
 def setup_test_config():
     """Setup test configuration"""
@@ -51,12 +143,32 @@ def db():
     finally:
         db.close()
         Base.metadata.drop_all(bind=engine)
+        # IDs are reused by the next test's database
+        get_permission_index().clear()
+
+
+@pytest.fixture
+def count_queries(db):
+    """Count statements, and SELECTs among them, run on the test engine"""
+    counter = {"statements": 0, "selects": 0}
+    
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        counter["statements"] += 1
+        if statement.lstrip().upper().startswith("SELECT"):
+            counter["selects"] += 1
+    
+    engine = db.get_bind()
+    event.listen(engine, "before_cursor_execute", before_execute)
+    yield counter
+    event.remove(engine, "before_cursor_execute", before_execute)
 
 
 @pytest.fixture(scope="function")
 def client(db):
     """Create a test client"""
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
     Base.metadata.create_all(bind=engine)
     
     with TestClient(app) as test_client:
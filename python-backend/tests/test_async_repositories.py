@@ -0,0 +1,94 @@
+"""Tests for the async repositories"""
+
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from app.database import to_async_url
+from app.models import User, Group, Post
+from app.repositories import AsyncUserRepository, AsyncGroupRepository, AsyncPostRepository
+from tests.conftest import TEST_DATABASE_URL
+
+
+@pytest.fixture
+async def async_db(db):
+    """Create an async session on the test database"""
+    engine = create_async_engine(to_async_url(TEST_DATABASE_URL))
+    session_factory = async_sessionmaker(bind=engine, expire_on_commit=False)
+    async with session_factory() as session:
+        yield session
+    await engine.dispose()
+
+
+class TestAsyncRepositories:
+    """Async repository tests"""
+    
+    def test_to_async_url(self):
+        """Test sync URLs map to async drivers"""
+        assert to_async_url("sqlite:///./test.db") == "sqlite+aiosqlite:///./test.db"
+        assert to_async_url("postgresql://u:p@h/d") == "postgresql+asyncpg://u:p@h/d"
+        assert to_async_url("mysql+pymysql://u:p@h/d") == "mysql+aiomysql://u:p@h/d"
+    
+    async def test_user_crud(self, async_db):
+        """Test creating, reading and deleting users"""
+        repo = AsyncUserRepository(async_db)
+        user = await repo.create(User(name="asyncuser", email="async@example.com"))
+        
+        assert (await repo.get_by_id(user.id)).name == "asyncuser"
+        assert (await repo.get_by_email("async@example.com")).id == user.id
+        assert [u.name for u in await repo.list()] == ["asyncuser"]
+        assert await repo.delete(user.id) is True
+        assert await repo.get_by_name("asyncuser") is None
+    
+    async def test_group_membership(self, async_db):
+        """Test adding and removing users from groups"""
+        user_repo = AsyncUserRepository(async_db)
+        group_repo = AsyncGroupRepository(async_db)
+        user = await user_repo.create(User(name="member"))
+        await group_repo.create(Group(name="team"))
+        group = await group_repo.get_by_name("team")
+        
+        assert await user_repo.add_to_group(user.id, group) is True
+        assert await user_repo.remove_from_group(user.id, group) is True
+        assert await group_repo.delete(group.id) is True
+    
+    async def test_post_list(self, async_db):
+        """Test listing posts by author"""
+        user = await AsyncUserRepository(async_db).create(User(name="author"))
+        repo = AsyncPostRepository(async_db)
+        await repo.create(Post(title="hello", content="world", author_id=user.id))
+        
+        posts = await repo.list_by_author(user.id)
+        assert [p.title for p in posts] == ["hello"]
+        assert await repo.delete(posts[0].id) is True
+    
+    async def test_post_list_page(self, async_db):
+        """Test keyset pages of posts, newest first, with tied timestamps"""
+        from datetime import datetime
+        user = await AsyncUserRepository(async_db).create(User(name="pager"))
+        repo = AsyncPostRepository(async_db)
+        same_time = datetime(2024, 1, 1, 12, 0, 0)
+        for i in range(5):
+            await repo.create(Post(title=f"p{i}", content="x", author_id=user.id, created_at=same_time))
+        
+        titles, cursor = [], None
+        while True:
+            posts, cursor = await repo.list_page(cursor=cursor, limit=2)
+            titles.extend(p.title for p in posts)
+            if cursor is None:
+                break
+        
+        assert titles == ["p4", "p3", "p2", "p1", "p0"]
+    
+    async def test_get_view_read_through(self, async_db, monkeypatch):
+        """Test views are loaded once, then served from the cache"""
+        from app.utils.local_cache import LocalCache
+        from app.utils.redis_client import AsyncCacheManager, AsyncRedisClient
+        manager = AsyncCacheManager(AsyncRedisClient(), LocalCache(1024 * 1024, 60))
+        monkeypatch.setattr("app.repositories.get_async_cache_manager", lambda: manager)
+        user = await AsyncUserRepository(async_db).create(User(name="viewer"))
+        manager.local.clear()
+        repo = AsyncUserRepository(async_db)
+        
+        assert (await repo.get_view(user.id)).name == "viewer"
+        assert (await repo.get_view(user.id)).name == "viewer"
+        assert await repo.get_view(99999) is None
+        assert manager.stats()["loads"] == 2
@@ -0,0 +1,675 @@
+"""Tests for the two-tier cache"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+import pytest
+import redis as redis_lib
+from app.utils import codec as codec_module
+from app.utils.bloom import BloomFilter
+from app.utils.codec import CacheCodec, CodecError
+from app.utils.local_cache import LocalCache
+from app.utils.redis_client import CacheManager, InvalidationBacklog, InvalidationListener
+from app.utils.redlock import Redlock
+from tests.conftest import DictRedis, SharedRedis
+
+
+class TestLocalCache:
+    """In-process LRU cache tests"""
+    
+    def test_byte_budget_evicts_lru(self):
+        """Test the least recently used entries go first once over budget"""
+        cache = LocalCache(max_bytes=100, ttl=60)
+        cache.set("a", 1, 40)
+        cache.set("b", 2, 40)
+        cache.get("a")
+        cache.set("c", 3, 40)
+        
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+        assert cache.stats()["bytes"] == 80
+        assert cache.stats()["evictions"] == 1
+    
+    def test_oversized_value_skipped(self):
+        """Test values larger than the budget are not stored"""
+        cache = LocalCache(max_bytes=10, ttl=60)
+        cache.set("big", "x", 11)
+        assert cache.get("big") is None
+    
+    def test_expiry(self, monkeypatch):
+        """Test entries expire after the TTL"""
+        now = [1000.0]
+        monkeypatch.setattr("app.utils.local_cache.time.monotonic", lambda: now[0])
+        cache = LocalCache(max_bytes=100, ttl=5)
+        cache.set("a", 1, 1)
+        
+        now[0] += 4
+        assert cache.get("a") == 1
+        now[0] += 2
+        assert cache.get("a") is None
+        assert cache.stats()["entries"] == 0
+
+
+class TestTwoTierCache:
+    """CacheManager L1 + Redis tests"""
+    
+    @pytest.fixture
+    def redis(self):
+        return DictRedis()
+    
+    def test_l1_hit_skips_redis(self, redis):
+        """Test repeated reads are served by L1"""
+        manager = CacheManager(redis, LocalCache(1024, 60))
+        redis.set("user:1", {"id": 1, "name": "admin"})
+        
+        assert manager.get_cached_user(1)["name"] == "admin"
+        redis.data.clear()
+        assert manager.get_cached_user(1)["name"] == "admin"
+        
+        stats = manager.stats()
+        assert stats["redis"]["hits"] == 1
+        assert stats["l1"]["hits"] == 1
+        assert stats["l1"]["hit_ratio"] == 0.5
+    
+    def test_invalidate_publishes(self, redis):
+        """Test invalidations evict locally and are broadcast"""
+        manager = CacheManager(redis, LocalCache(1024, 60), channel="inval")
+        manager.cache_post(7, {"id": 7})
+        manager.invalidate_post(7)
+        
+        assert manager.local.get("post:7") is None
+        assert "post:7" not in redis.data
+        assert redis.published == [("inval", "post:7")]
+    
+    def test_listener_evicts_remote_invalidation(self, redis):
+        """Test a message from another worker evicts the L1 copy"""
+        local = LocalCache(1024, 60)
+        manager = CacheManager(redis, local)
+        manager.cache_user(3, {"id": 3})
+        listener = InvalidationListener(redis, "cache:invalidate", local)
+        
+        listener.handle({"type": "subscribe", "data": 1})
+        assert local.get("user:3") is not None
+        
+        listener.handle({"type": "message", "data": b"user:3"})
+        assert local.get("user:3") is None
+        assert listener.received == 1
+    
+    def test_without_l1(self, redis):
+        """Test the manager works with Redis only"""
+        manager = CacheManager(redis)
+        manager.cache_user(1, {"id": 1})
+        
+        assert manager.get_cached_user(1) == {"id": 1}
+        assert "l1" not in manager.stats()
+
+
+class AsyncDictRedis(DictRedis):
+    """Async stand-in for the AsyncRedisClient calls used by the cache"""
+    
+    async def set(self, key, value, ex=None):
+        return DictRedis.set(self, key, value, ex)
+    
+    async def get(self, key, raw=False):
+        return DictRedis.get(self, key, raw)
+    
+    async def delete(self, *keys):
+        return DictRedis.delete(self, *keys)
+    
+    async def publish(self, channel, message):
+        return DictRedis.publish(self, channel, message)
+    
+    async def mget(self, keys, raw=False):
+        return DictRedis.mget(self, keys, raw)
+    
+    async def mset(self, mapping, ex=None):
+        return DictRedis.mset(self, mapping, ex)
+    
+    async def set_if_unchanged(self, key, value, ex, guard, expected):
+        return DictRedis.set_if_unchanged(self, key, value, ex, guard, expected)
+    
+    async def delete_and_publish(self, keys, channel, counters=(), counter_ttl=None):
+        return DictRedis.delete_and_publish(self, keys, channel, counters, counter_ttl)
+    
+    async def get_with_ttl(self, key):
+        return DictRedis.get_with_ttl(self, key)
+    
+    async def set_nx(self, key, value, px):
+        if key in self.data:
+            return False
+        return DictRedis.set(self, key, value)
+    
+    async def eval_script(self, script, keys, args):
+        if self.data.get(keys[0]) == args[0]:
+            return DictRedis.delete(self, keys[0])
+        return 0
+
+
+class TestAsyncCache:
+    """Async client and cache manager tests"""
+    
+    async def test_async_cache_manager(self):
+        """Test the async manager shares the L1 tier and broadcasts invalidations"""
+        from app.utils.redis_client import AsyncCacheManager
+        redis = AsyncDictRedis()
+        local = LocalCache(1024, 60)
+        manager = AsyncCacheManager(redis, local, channel="inval")
+        
+        await manager.cache_user(1, {"id": 1})
+        assert local.get("user:1") == {"id": 1}
+        assert await manager.get_cached_user(1) == {"id": 1}
+        
+        await manager.invalidate_user(1)
+        assert await manager.get_cached_user(1) is None
+        assert redis.published == [("inval", "user:1")]
+    
+    async def test_concurrent_misses_coalesce(self):
+        """Test concurrent misses on one event loop await a single loader call"""
+        from app.utils.redis_client import AsyncCacheManager
+        manager = AsyncCacheManager(AsyncDictRedis())
+        calls = []
+        
+        async def loader():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return {"id": 1}
+        
+        results = await asyncio.gather(*(manager.get_or_load("post:1", loader, ttl=60) for _ in range(8)))
+        
+        assert results == [{"id": 1}] * 8
+        assert len(calls) == 1
+        assert manager.stats()["coalesced"] == 7
+        assert manager.flights == {}
+    
+    async def test_missing_value_cached_as_negative(self):
+        """Test a None load is cached as a negative entry and returned as None"""
+        from app.utils.redis_client import AsyncCacheManager
+        redis = AsyncDictRedis()
+        manager = AsyncCacheManager(redis, negative_ttl=30)
+        calls = []
+        
+        async def loader():
+            calls.append(1)
+        
+        assert await manager.get_or_load("user:9", loader) is None
+        assert await manager.get_or_load("user:9", loader) is None
+        assert len(calls) == 1
+        assert redis.ttls["user:9"] == 30
+        assert manager.stats()["negative_hits"] == 1
+    
+    async def test_stale_fill_is_dropped(self):
+        """Test an async load overtaken by an invalidation is not cached"""
+        from app.utils.redis_client import AsyncCacheManager
+        redis = AsyncDictRedis()
+        manager = AsyncCacheManager(redis)
+        
+        async def loader():
+            await manager.invalidate_post(1)
+            return {"id": 1}
+        
+        assert await manager.get_or_load("post:1", loader) == {"id": 1}
+        assert "post:1" not in redis.data
+        assert manager.stats()["stale_fills"] == 1
+    
+    async def test_wait_does_not_block_loop(self):
+        """Test waiting for another process's fill leaves the event loop running"""
+        from app.utils.redis_client import AsyncCacheManager
+        redis = AsyncDictRedis()
+        redis.is_enabled = lambda: True
+        redis.data["lock:post:1"] = "elsewhere"
+        manager = AsyncCacheManager(redis, lock_wait=2.0)
+        ticks = []
+        
+        async def other_process():
+            for _ in range(5):
+                ticks.append(1)
+                await asyncio.sleep(0.02)
+            redis.data["post:1"] = manager.codec.encode({"id": 1})
+        
+        async def loader():
+            return {"id": 0}
+        
+        filler = asyncio.ensure_future(other_process())
+        assert await manager.get_or_load("post:1", loader) == {"id": 1}
+        await filler
+        
+        assert len(ticks) == 5
+        assert manager.stats()["loads"] == 0
+    
+    async def test_early_refresh_in_background(self, monkeypatch):
+        """Test a key close to expiry is served at once and reloaded by a background task"""
+        from app.utils.redis_client import AsyncCacheManager
+        monkeypatch.setattr("app.utils.redis_client.random.random", lambda: 0.5)
+        redis = AsyncDictRedis()
+        manager = AsyncCacheManager(redis)
+        await manager.cache_post(1, {"id": 1, "view_count": 1}, ttl=3600)
+        redis.ttls["post:1"] = 1
+        manager.load_times["post:1"] = 100
+        
+        async def loader():
+            return {"id": 1, "view_count": 2}
+        
+        assert (await manager.get_or_load("post:1", loader, ttl=3600))["view_count"] == 1
+        assert manager.stats()["early_refreshes"] == 1
+        await manager.flights["post:1"]
+        assert (await manager.get_cached_post(1))["view_count"] == 2
+    
+    async def test_bloom_filter_skips_loader(self):
+        """Test IDs ruled out by the shared Bloom filter are answered without Redis or the loader"""
+        from app.utils.redis_client import AsyncCacheManager
+        bloom = BloomFilter(1000)
+        bloom.add("user:1")
+        bloom.ready = True
+        redis = AsyncDictRedis()
+        manager = AsyncCacheManager(redis, blooms={"user": bloom})
+        
+        async def loader():
+            raise AssertionError("loader called")
+        
+        assert await manager.get_or_load("user:2", loader) is None
+        assert redis.data == {}
+        assert manager.stats()["negative_hits"] == 1
+    
+    async def test_disabled_client_is_noop(self):
+        """Test the async client answers neutrally while disconnected"""
+        from app.utils.redis_client import AsyncRedisClient
+        client = AsyncRedisClient()
+        
+        assert await client.connect() is True
+        assert client.is_enabled() is False
+        assert await client.get("k") is None
+        assert await client.set("k", "v") is False
+        assert client.stats() == {"enabled": False}
+        await client.close()
+
+
+class TestCodec:
+    """Cached value codec tests"""
+    
+    @pytest.mark.parametrize("serializer", ["json", "orjson", "msgpack"])
+    @pytest.mark.parametrize("compression", ["none", "zstd", "lz4"])
+    def test_round_trip(self, serializer, compression):
+        """Test every serializer and compression round-trips small and large values"""
+        codec = CacheCodec(serializer, compression, compress_threshold=256)
+        small = {"id": 1, "name": "alice", "tags": [1, 2], "avatar": None}
+        large = {"id": 2, "content": "lorem ipsum " * 500}
+        
+        assert codec.decode(codec.encode(small)) == small
+        assert codec.decode(codec.encode(large)) == large
+    
+    def test_compress_threshold(self):
+        """Test only payloads over the threshold are compressed"""
+        codec = CacheCodec("json", "zstd", compress_threshold=256)
+        small = codec.encode({"id": 1})
+        large = codec.encode({"content": "x" * 1000})
+        
+        assert small[1] >> 4 == codec_module.NONE
+        assert large[1] >> 4 == codec_module.ZSTD
+        assert len(large) < 1000
+    
+    def test_reads_other_formats(self):
+        """Test a codec decodes entries written with another configuration"""
+        value = {"content": "y" * 2000}
+        written = CacheCodec("msgpack", "lz4", compress_threshold=0).encode(value)
+        
+        assert CacheCodec("orjson", "zstd").decode(written) == value
+    
+    def test_legacy_json(self):
+        """Test headerless JSON written before the codec still decodes"""
+        codec = CacheCodec("msgpack")
+        
+        assert codec.decode(b'{"id": 1}') == {"id": 1}
+        assert codec.decode('{"id": 1}') == {"id": 1}
+    
+    def test_unknown_format_raises(self):
+        """Test an unknown serializer id or corrupt payload raises CodecError"""
+        codec = CacheCodec()
+        
+        with pytest.raises(CodecError):
+            codec.decode(bytes((codec_module.FORMAT_VERSION, 0x0F)) + b"{}")
+        with pytest.raises(CodecError):
+            codec.decode(b"not json")
+    
+    def test_manager_stores_encoded_bytes(self):
+        """Test the manager writes codec bytes to Redis and skips corrupt entries"""
+        redis = DictRedis()
+        manager = CacheManager(redis, codec=CacheCodec("msgpack", "zstd", compress_threshold=64))
+        post = {"id": 1, "content": "z" * 500}
+        manager.cache_post(1, post)
+        
+        assert isinstance(redis.data["post:1"], bytes)
+        assert manager.get_cached_post(1) == post
+        
+        redis.data["post:2"] = b"\x01\x0f garbage"
+        assert manager.get_cached_posts([1, 2]) == {1: post}
+
+
+class TestGetOrLoad:
+    """Cache stampede protection tests"""
+    
+    def test_concurrent_misses_coalesce(self):
+        """Test concurrent misses for one key share a single loader call"""
+        manager = CacheManager(DictRedis())
+        calls = []
+        
+        def loader():
+            calls.append(1)
+            time.sleep(0.1)
+            return {"id": 1}
+        
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(lambda _: manager.get_or_load("post:1", loader, ttl=60), range(8)))
+        
+        assert results == [{"id": 1}] * 8
+        assert len(calls) == 1
+        assert manager.stats()["coalesced"] == 7
+        assert manager.get_or_load("post:1", loader, ttl=60) == {"id": 1}
+        assert len(calls) == 1
+    
+    def test_loader_error_reaches_waiters(self):
+        """Test a failing load raises in every coalesced caller and is not cached"""
+        manager = CacheManager(DictRedis())
+        
+        def loader():
+            time.sleep(0.05)
+            raise RuntimeError("db down")
+        
+        def call(_):
+            try:
+                manager.get_or_load("post:1", loader)
+            except RuntimeError as e:
+                return str(e)
+        
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            assert list(pool.map(call, range(4))) == ["db down"] * 4
+        assert manager.flights == {}
+    
+    def test_missing_value_cached_as_negative(self):
+        """Test a None load is cached as a short-lived negative entry"""
+        redis = DictRedis()
+        manager = CacheManager(redis, LocalCache(1024, 60), negative_ttl=30)
+        calls = []
+        
+        def loader():
+            calls.append(1)
+        
+        assert manager.get_or_load("user:9", loader, ttl=3600) is None
+        assert manager.get_or_load("user:9", loader, ttl=3600) is None
+        manager.local.clear()
+        assert manager.get_or_load("user:9", loader, ttl=3600) is None
+        
+        assert len(calls) == 1
+        assert redis.ttls["user:9"] == 30
+        assert manager.get_cached_user(9) is None
+        assert manager.get_cached_users([9]) == {}
+        assert manager.stats()["negative_hits"] == 3
+    
+    def test_early_refresh_near_expiry(self, monkeypatch):
+        """Test a key close to expiry is reloaded while the cached value is served"""
+        # XFetch draws at random; fix the draw so the outcome depends on the TTL only
+        monkeypatch.setattr("app.utils.redis_client.random.random", lambda: 0.5)
+        redis = DictRedis()
+        manager = CacheManager(redis)
+        manager.cache_post(1, {"id": 1, "view_count": 1}, ttl=3600)
+        
+        # Far from expiry a short load never triggers a refresh
+        manager.load_times["post:1"] = 0.01
+        assert manager.get_or_load("post:1", lambda: {"id": 1, "view_count": 2}, ttl=3600)["view_count"] == 1
+        assert manager.stats()["early_refreshes"] == 0
+        
+        # A load taking longer than the remaining TTL always refreshes
+        redis.ttls["post:1"] = 1
+        manager.load_times["post:1"] = 100
+        assert manager.get_or_load("post:1", lambda: {"id": 1, "view_count": 2}, ttl=3600)["view_count"] == 1
+        assert manager.stats()["early_refreshes"] == 1
+        assert manager.get_cached_post(1)["view_count"] == 2
+    
+    def test_stale_fill_is_dropped(self):
+        """Test a load that read before another process's invalidation is not cached"""
+        redis = DictRedis()
+        manager = CacheManager(redis, LocalCache(1024, 60))
+        other = CacheManager(redis)
+        
+        def loader():
+            # Another process writes and invalidates while this load runs
+            other.invalidate_post(1)
+            return {"id": 1, "view_count": 1}
+        
+        assert manager.get_or_load("post:1", loader)["view_count"] == 1
+        assert "post:1" not in redis.data
+        assert manager.local.get("post:1") is None
+        assert manager.stats()["stale_fills"] == 1
+        
+        assert manager.get_or_load("post:1", lambda: {"id": 1, "view_count": 2})["view_count"] == 2
+        assert manager.get_cached_post(1)["view_count"] == 2
+    
+    def test_lock_error_loads_at_once(self):
+        """Test a miss loads without waiting when Redis fails to take the lock"""
+        class FailingClient:
+            def set(self, *args, **kwargs):
+                raise redis_lib.exceptions.ConnectionError("down")
+            
+            def eval(self, *args):
+                raise redis_lib.exceptions.ConnectionError("down")
+        
+        redis = DictRedis()
+        redis.is_enabled = lambda: True
+        manager = CacheManager(redis, lock_wait=2.0)
+        manager.redlock = Redlock([FailingClient()])
+        
+        start = time.monotonic()
+        assert manager.get_or_load("post:1", lambda: {"id": 1}) == {"id": 1}
+        assert time.monotonic() - start < 0.5
+    
+    def test_waits_for_other_process(self):
+        """Test a miss whose Redis lock is held elsewhere waits for the fill"""
+        redis = DictRedis()
+        redis.is_enabled = lambda: True
+        manager = CacheManager(redis, lock_wait=2.0)
+        manager.redlock = SimpleNamespace(lock=lambda *args, **kwargs: SimpleNamespace(locked=False, unreachable=False))
+        other = CacheManager(redis)
+        
+        timer = threading.Timer(0.1, lambda: other.cache_post(1, {"id": 1}))
+        timer.start()
+        loader_calls = []
+        value = manager.get_or_load("post:1", lambda: loader_calls.append(1) or {"id": 0})
+        timer.join()
+        
+        assert value == {"id": 1}
+        assert loader_calls == []
+
+
+class OutageRedis(SharedRedis):
+    """SharedRedis whose invalidations fail while ``down``, as with an open breaker"""
+    
+    down = False
+    
+    def delete_and_publish(self, keys, channel, counters=(), counter_ttl=None):
+        return False if self.down else super().delete_and_publish(keys, channel, counters, counter_ttl)
+    
+    def delete_matching(self, pattern):
+        return False if self.down else super().delete_matching(pattern)
+
+
+class TestInvalidationReplay:
+    """Invalidations made during a Redis outage"""
+    
+    def test_replayed_after_outage(self):
+        """Test a write during an outage evicts the Redis entry once Redis is back"""
+        redis = OutageRedis()
+        manager = CacheManager(redis)
+        manager.cache_user(1, {"id": 1, "name": "old"})
+        
+        redis.down = True
+        assert manager.invalidate_user(1) is False
+        assert "user:1" in redis.data
+        assert manager.stats()["invalidation_backlog"] == 1
+        
+        manager.replay_invalidations()
+        assert manager.stats()["invalidation_backlog"] == 1
+        
+        redis.down = False
+        manager.replay_invalidations()
+        assert "user:1" not in redis.data
+        assert redis.published[-1] == ("cache:invalidate", "user:1")
+        assert manager.stats()["invalidation_backlog"] == 0
+        assert manager.stats()["invalidations_replayed"] == 1
+    
+    def test_next_invalidation_replays(self):
+        """Test a successful invalidation also replays earlier failures"""
+        redis = OutageRedis()
+        manager = CacheManager(redis)
+        manager.cache_posts({1: {"id": 1}, 2: {"id": 2}})
+        
+        redis.down = True
+        manager.invalidate_post(1)
+        redis.down = False
+        manager.invalidate_post(2)
+        
+        assert redis.data == {"gen:post:1": "1", "gen:post:2": "1"}
+    
+    def test_overflow_drops_prefix(self):
+        """Test an overflowing backlog drops and announces the whole prefix"""
+        redis = OutageRedis()
+        manager = CacheManager(redis)
+        manager.backlog = InvalidationBacklog(max_keys=2)
+        manager.cache_users({1: {"id": 1}, 2: {"id": 2}, 3: {"id": 3}})
+        manager.cache_posts({1: {"id": 1}, 2: {"id": 2}})
+        
+        redis.down = True
+        manager.invalidate_post(1)
+        manager.invalidate_users([1, 2, 3])
+        redis.down = False
+        manager.replay_invalidations()
+        
+        assert set(redis.data) == {"post:2", "gen:post:1"}
+        assert redis.published == [("cache:invalidate", "user:*"), ("cache:invalidate", "post:1")]
+    
+    def test_disabled_redis_keeps_no_backlog(self):
+        """Test nothing is kept when Redis is turned off"""
+        manager = CacheManager(DictRedis())
+        manager.invalidate_user(1)
+        assert manager.stats()["invalidation_backlog"] == 0
+    
+    def test_prefix_message_clears_l1(self):
+        """Test a ``prefix:*`` announcement clears the L1 and rebuilds the Bloom filters"""
+        local = LocalCache(1024, 60)
+        local.set("user:1", {"id": 1}, 10)
+        rebuilt = []
+        listener = InvalidationListener(SharedRedis(), "cache:invalidate", local, None, lambda: rebuilt.append(1))
+        
+        listener.handle({"type": "message", "data": b"user:*"})
+        
+        assert local.get("user:1") is None
+        assert rebuilt == [1]
+    
+    async def test_async_failures_share_backlog(self):
+        """Test async invalidations during an outage land in the shared backlog"""
+        from app.utils.redis_client import AsyncCacheManager
+        redis = AsyncDictRedis()
+        redis.enabled = True
+        
+        async def down(keys, channel, counters=(), counter_ttl=None):
+            return False
+        
+        redis.delete_and_publish = down
+        manager = CacheManager(OutageRedis())
+        async_manager = AsyncCacheManager(redis, backlog=manager.backlog)
+        
+        await async_manager.invalidate_post(7)
+        manager.replay_invalidations()
+        
+        assert ("cache:invalidate", "post:7") in manager.redis.published
+
+
+class TestNegativeCache:
+    """Negative entry and Bloom filter tests"""
+    
+    def test_write_evicts_negative_entry(self):
+        """Test invalidating a key lets the next read load it"""
+        redis = DictRedis()
+        manager = CacheManager(redis, LocalCache(1024, 60))
+        assert manager.get_or_load("post:5", lambda: None) is None
+        assert manager.get_or_load("post:5", lambda: {"id": 5}) is None
+        
+        manager.invalidate_post(5)
+        assert "post:5" not in redis.data
+        assert manager.get_or_load("post:5", lambda: {"id": 5}) == {"id": 5}
+    
+    def test_negative_ttl_zero_disables(self):
+        """Test negative entries can be turned off"""
+        redis = DictRedis()
+        manager = CacheManager(redis, negative_ttl=0)
+        
+        assert manager.get_or_load("post:5", lambda: None) is None
+        assert redis.data == {}
+    
+    def test_bloom_filter(self):
+        """Test IDs absent from the filter skip the loader, and invalidated keys are added"""
+        manager = CacheManager(DictRedis(), bloom_capacity=1000)
+        manager.enable_bloom("user", lambda: range(1, 101))
+        loaded = []
+        
+        def loader():
+            loaded.append(1)
+            return {"id": 1}
+        
+        assert manager.might_exist("user:50")
+        assert manager.get_or_load("user:500", loader) is None
+        assert manager.stats()["negative_hits"] == 1
+        assert loaded == []
+        
+        manager.invalidate_user(500)
+        assert manager.might_exist("user:500")
+        assert not manager.might_exist("user:501")
+        # Keys without a filter are never ruled out
+        assert manager.might_exist("post:501")
+        assert manager.stats()["bloom_user"]["ready"] is True
+    
+    def test_bloom_filter_needs_redis(self, db, monkeypatch):
+        """Test startup leaves the Bloom filters off while Redis is disabled"""
+        from fastapi.testclient import TestClient
+        from app.config import get_config
+        from app.main import app
+        from app.utils.redis_client import get_cache_manager
+        monkeypatch.setattr(get_config().redis, "bloom_filter", True)
+        
+        with TestClient(app):
+            assert get_cache_manager().blooms == {}
+    
+    def test_failed_bloom_build_is_ignored(self):
+        """Test a filter that could not be filled never rules anything out"""
+        manager = CacheManager(DictRedis())
+        
+        def load_ids():
+            raise RuntimeError("db down")
+        
+        manager.enable_bloom("post", load_ids)
+        assert manager.might_exist("post:1")
+    
+    def test_listener_adds_remote_creations(self):
+        """Test a broadcast invalidation adds the key to the filter"""
+        manager = CacheManager(DictRedis())
+        manager.enable_bloom("post", lambda: [])
+        listener = InvalidationListener(manager.redis, manager.channel, None, manager._note_key)
+        
+        assert not manager.might_exist("post:7")
+        listener.handle({"type": "message", "data": b"post:7 user:1"})
+        assert manager.might_exist("post:7")
+
+
+class TestBloomFilter:
+    """Bloom filter tests"""
+    
+    def test_no_false_negatives(self):
+        """Test every added item is found and the false positive rate is bounded"""
+        bloom = BloomFilter(10000, 0.01)
+        for i in range(10000):
+            bloom.add(f"user:{i}")
+        
+        assert all(f"user:{i}" in bloom for i in range(10000))
+        false_positives = sum(f"user:{i}" in bloom for i in range(10000, 20000))
+        assert false_positives < 300
@@ -0,0 +1,173 @@
+"""Tests for the circuit breaker and its use in the Redis client"""
+
+import time
+import pytest
+import redis
+from app.config import AppConfig, RedisConfig, ServerConfig, get_config, set_config
+from app.utils.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+from app.utils.redis_client import OUTAGE_ERRORS, RedisClient, _GuardedRedis
+
+
+def breaker(probe=lambda: True, **kwargs):
+    options = dict(window=10, min_calls=4, error_rate=0.5, slow_call=0.05, slow_rate=0.5,
+                   retry_interval=0.01, half_open_calls=2, failures=OUTAGE_ERRORS)
+    options.update(kwargs)
+    return CircuitBreaker("test", probe, **options)
+
+
+def fail():
+    raise redis.exceptions.ConnectionError("down")
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return condition()
+
+
+class TestCircuitBreaker:
+    """Circuit breaker state machine tests"""
+    
+    def test_opens_on_error_rate(self):
+        """Test the breaker opens once failures reach the error rate"""
+        cb = breaker(retry_interval=60)
+        cb.call(lambda: 1)
+        cb.call(lambda: 1)
+        for _ in range(2):
+            with pytest.raises(redis.exceptions.ConnectionError):
+                cb.call(fail)
+        
+        assert cb.state == OPEN
+        assert cb.allow() is False
+        assert cb.stats() == {"state": 2, "open": True, "trips": 1, "rejected": 1}
+        cb.stop()
+    
+    def test_ignores_command_errors(self):
+        """Test errors that are not outages do not count"""
+        cb = breaker()
+        for _ in range(10):
+            with pytest.raises(redis.exceptions.ResponseError):
+                cb.call(lambda: (_ for _ in ()).throw(redis.exceptions.ResponseError("WRONGTYPE")))
+        
+        assert cb.state == CLOSED
+    
+    def test_opens_on_slow_calls(self):
+        """Test the breaker opens once slow calls reach the slow rate"""
+        cb = breaker(retry_interval=60)
+        for elapsed in (0.0, 0.0, 0.1, 0.1):
+            cb.record(True, elapsed)
+        
+        assert cb.state == OPEN
+        cb.stop()
+    
+    def test_probe_half_opens_then_closes(self):
+        """Test a successful probe half-opens and enough successes close"""
+        cb = breaker()
+        cb.trip("test")
+        
+        assert wait_for(lambda: cb.state == HALF_OPEN)
+        assert cb.allow() is True
+        cb.call(lambda: 1)
+        assert cb.state == HALF_OPEN
+        cb.call(lambda: 1)
+        assert cb.state == CLOSED
+    
+    def test_close_callbacks(self):
+        """Test callbacks registered with on_close run once the breaker closes"""
+        closed = []
+        cb = breaker()
+        cb.on_close(lambda: closed.append(cb.state))
+        cb.trip("test")
+        assert wait_for(lambda: cb.state == HALF_OPEN)
+        
+        cb.call(lambda: 1)
+        assert closed == []
+        cb.call(lambda: 1)
+        assert wait_for(lambda: closed == [CLOSED])
+    
+    def test_half_open_failure_reopens(self):
+        """Test a failure while half-open reopens and probing resumes"""
+        probes = []
+        cb = breaker(probe=lambda: probes.append(1))
+        cb.trip("test")
+        assert wait_for(lambda: cb.state == HALF_OPEN)
+        
+        with pytest.raises(redis.exceptions.ConnectionError):
+            cb.call(fail)
+        assert cb.state == OPEN
+        assert wait_for(lambda: cb.state == HALF_OPEN)
+        assert len(probes) == 2
+        assert cb.trips == 2
+    
+    def test_failing_probe_keeps_open(self):
+        """Test the breaker stays open while the probe fails"""
+        cb = breaker(probe=fail)
+        cb.trip("test")
+        time.sleep(0.05)
+        
+        assert cb.state == OPEN
+        cb.stop()
+
+
+class RawRedis:
+    """Raw client stand-in whose commands fail while ``down``"""
+    
+    def __init__(self):
+        self.down = False
+        self.calls = 0
+    
+    def get(self, key):
+        self.calls += 1
+        if self.down:
+            raise redis.exceptions.TimeoutError("timed out")
+        return b"value"
+    
+    def ping(self):
+        if self.down:
+            raise redis.exceptions.ConnectionError("down")
+        return True
+
+
+class TestRedisClientBreaker:
+    """Redis client fast-fail tests"""
+    
+    def test_fast_fails_while_open(self):
+        """Test commands stop reaching Redis once the breaker opens and resume after"""
+        raw = RawRedis()
+        client = RedisClient()
+        client.breaker = breaker(probe=raw.ping)
+        client.client = _GuardedRedis(raw, client.breaker)
+        client.enabled = True
+        
+        assert client.get("k") == "value"
+        raw.down = True
+        for _ in range(4):
+            assert client.get("k") is None
+        calls = raw.calls
+        
+        assert client.is_enabled() is False
+        start = time.perf_counter()
+        assert client.get("k") is None
+        assert time.perf_counter() - start < 0.001
+        assert raw.calls == calls
+        
+        raw.down = False
+        assert wait_for(client.is_enabled)
+        assert client.get("k") == "value"
+    
+    def test_unreachable_at_startup_reconnects_later(self):
+        """Test a failed first connection opens the breaker instead of disabling Redis"""
+        original = get_config()
+        set_config(AppConfig(server=ServerConfig(env="test"),
+                             redis=RedisConfig(host="127.0.0.1", port=1, breaker_retry_interval=60)))
+        try:
+            client = RedisClient(socket_timeout=0.2)
+            assert client.connect() is False
+            assert client.enabled is True
+            assert client.is_enabled() is False
+            assert client.get("k") is None
+            assert client.breaker.stats()["rejected"] == 1
+            client.close()
+        finally:
+            set_config(original)
@@ -0,0 +1,227 @@
+"""Tests for database engine configuration"""
+
+import pytest
+from datetime import datetime
+from sqlalchemy import create_engine, text
+from app.config import DBConfig
+from app.database import PoolStats, TimedQueuePool, pool_options
+
+
+class TestPoolOptions:
+    """Connection pool configuration tests"""
+    
+    def test_pool_settings_from_config(self):
+        """Test DBConfig pool settings are passed to the engine"""
+        options = pool_options(
+            "sqlite:///./test.db",
+            DBConfig(pool_size=3, max_overflow=1, pool_timeout=2, pool_pre_ping=False)
+        )
+        
+        assert options["poolclass"] is TimedQueuePool
+        assert options["pool_size"] == 3
+        assert options["max_overflow"] == 1
+        assert options["pool_timeout"] == 2
+        assert options["pool_pre_ping"] is False
+    
+    def test_memory_sqlite_has_no_queue_pool(self):
+        """Test in-memory SQLite keeps its default single-connection pool"""
+        options = pool_options("sqlite://", DBConfig())
+        
+        assert "poolclass" not in options
+        assert "pool_size" not in options
+    
+    def test_pool_stats(self):
+        """Test pool events feed the gauges"""
+        engine = create_engine("sqlite:///./test.db", **pool_options("sqlite:///./test.db", DBConfig(pool_size=2)))
+        stats = PoolStats()
+        stats.attach(engine)
+        
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            assert stats.stats()["checked_out"] == 1
+        
+        result = stats.stats()
+        assert result["checked_out"] == 0
+        assert result["checkouts"] == 1
+        assert result["connects"] == 1
+        assert result["size"] == 2
+        assert result["checkout_seconds_total"] > 0
+        engine.dispose()
+
+
+@pytest.fixture
+def replica_manager(tmp_path):
+    """Create a database manager with one read replica"""
+    from app.database import Base, DatabaseManager
+    from app.models import User
+    
+    replica_url = f"sqlite:///{tmp_path}/replica.db"
+    manager = DatabaseManager()
+    manager.init_db(DBConfig(
+        file=f"{tmp_path}/primary.db",
+        replicas=[replica_url],
+        replica_check_interval=3600
+    ))
+    
+    # Give each database a differently named user 1 to tell them apart
+    for engine, name in ((manager.engine, "primary"), (manager.replicas.engines[0], "replica")):
+        Base.metadata.create_all(bind=engine)
+        with engine.begin() as conn:
+            conn.execute(User.__table__.insert().values(
+                id=1, name=name, created_at=datetime.utcnow(), updated_at=datetime.utcnow()
+            ))
+    
+    yield manager
+    manager.close()
+
+
+class TestReplicaRouting:
+    """Read replica routing tests"""
+    
+    def read_name(self, manager, use_replica):
+        from app.models import User
+        session = next(manager.get_session(use_replica=use_replica))
+        try:
+            return session.query(User).filter(User.id == 1).first().name
+        finally:
+            session.close()
+    
+    def test_reads_use_replica(self, replica_manager):
+        """Test replica sessions read from the replica"""
+        assert self.read_name(replica_manager, use_replica=True) == "replica"
+        assert self.read_name(replica_manager, use_replica=False) == "primary"
+    
+    def test_read_your_writes(self, replica_manager):
+        """Test reads after a write stay on the primary"""
+        from app.models import User
+        session = next(replica_manager.get_session(use_replica=True))
+        try:
+            session.add(User(name="writer"))
+            session.commit()
+            
+            assert session.query(User).filter(User.name == "writer").first() is not None
+            assert session.query(User).filter(User.id == 1).first().name == "primary"
+        finally:
+            session.close()
+    
+    def test_uncommitted_writes_stay_on_primary(self, replica_manager):
+        """Test reads stay on the primary until the writing transaction ends"""
+        from app.models import User
+        replica_manager.db_config.read_your_writes_seconds = 0
+        session = next(replica_manager.get_session(use_replica=True))
+        try:
+            query = session.query(User).statement
+            session.add(User(name="pending"))
+            assert session.get_bind(clause=query) is replica_manager.engine
+            
+            # Flushed but uncommitted, past the read-your-writes window
+            session.flush()
+            assert session.query(User).filter(User.name == "pending").first() is not None
+            assert session.get_bind(clause=query) is replica_manager.engine
+            
+            session.rollback()
+            assert session.get_bind(clause=query) is replica_manager.replicas.engines[0]
+        finally:
+            session.close()
+    
+    def test_dead_replica_skipped(self, replica_manager):
+        """Test reads fall back to the primary when replicas are down"""
+        replica_manager.replicas.mark_down(0)
+        
+        assert self.read_name(replica_manager, use_replica=True) == "primary"
+        
+        replica_manager.replicas.check()
+        assert self.read_name(replica_manager, use_replica=True) == "replica"
+
+
+@pytest.fixture
+def sqlite_manager(tmp_path):
+    """Create a database manager using the SQLite performance profile"""
+    from app.database import Base, DatabaseManager
+    
+    manager = DatabaseManager()
+    manager.init_db(DBConfig(file=f"{tmp_path}/app.db", sqlite_performance=True, sqlite_busy_timeout=1234))
+    Base.metadata.create_all(bind=manager.engine)
+    yield manager
+    manager.close()
+
+
+class TestSQLiteProfile:
+    """SQLite performance profile tests"""
+    
+    def test_pragmas_applied(self, sqlite_manager):
+        """Test every connection runs the profile PRAGMAs"""
+        for engine in (sqlite_manager.engine, sqlite_manager.read_engine):
+            with engine.connect() as conn:
+                assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+                assert conn.execute(text("PRAGMA synchronous")).scalar() == 1
+                assert conn.execute(text("PRAGMA busy_timeout")).scalar() == 1234
+    
+    def test_single_writer_connection(self, sqlite_manager):
+        """Test writes go through a one-connection pool"""
+        assert sqlite_manager.engine.pool.size() == 1
+        assert sqlite_manager.engine.pool._max_overflow == 0
+        assert sqlite_manager.read_engine is not sqlite_manager.engine
+    
+    def test_reads_use_reader_pool(self, sqlite_manager):
+        """Test reads use the reader pool until the session writes"""
+        from app.models import User
+        session = next(sqlite_manager.get_session())
+        try:
+            query = session.query(User).statement
+            assert session.get_bind(clause=query) is sqlite_manager.read_engine
+            
+            session.add(User(name="writer"))
+            session.commit()
+            
+            assert session.get_bind(clause=query) is sqlite_manager.engine
+            assert session.query(User).filter(User.name == "writer").first() is not None
+        finally:
+            session.close()
+    
+    def test_flushed_writes_stay_on_writer(self, sqlite_manager):
+        """Test reads see uncommitted writes of the writer connection"""
+        from app.models import User
+        sqlite_manager.db_config.read_your_writes_seconds = 0
+        session = next(sqlite_manager.get_session())
+        try:
+            session.add(User(name="writer"))
+            session.flush()
+            
+            assert session.get_bind(clause=session.query(User).statement) is sqlite_manager.engine
+            assert session.query(User).filter(User.name == "writer").first() is not None
+            
+            session.commit()
+            assert session.get_bind(clause=session.query(User).statement) is sqlite_manager.read_engine
+        finally:
+            session.close()
+    
+    async def test_async_writes_use_single_connection(self, sqlite_manager):
+        """Test async sessions write through one connection and read from a pool"""
+        from sqlalchemy import select
+        from app.models import User
+        sqlite_manager.init_async_db()
+        try:
+            assert sqlite_manager.async_engine.pool.size() == 1
+            assert sqlite_manager.async_engine.pool._max_overflow == 0
+            
+            async with sqlite_manager.AsyncSessionLocal() as session:
+                query = select(User)
+                assert session.sync_session.get_bind(clause=query) is sqlite_manager.async_read_engine.sync_engine
+                
+                session.add(User(name="async_writer"))
+                await session.flush()
+                assert session.sync_session.get_bind(clause=query) is sqlite_manager.async_engine.sync_engine
+                assert (await session.execute(select(User).filter(User.name == "async_writer"))).scalar() is not None
+                await session.commit()
+        finally:
+            await sqlite_manager.close_async()
+    
+    def test_memory_database_unchanged(self):
+        """Test in-memory databases ignore the profile"""
+        from app.database import DatabaseManager
+        
+        manager = DatabaseManager()
+        manager.init_db(DBConfig(file=":memory:", sqlite_performance=True))
+        assert manager.read_engine is None
+        manager.close()
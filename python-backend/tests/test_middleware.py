@@ -0,0 +1,83 @@
+"""Tests for the ASGI middleware stack"""
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+from app.middleware import (
+    RequestIDMiddleware,
+    AuthenticationMiddleware,
+    ErrorHandlingMiddleware
+)
+from app.utils.errors import ForbiddenException, NotFoundException
+
+
+@pytest.fixture
+def middleware_client():
+    """Create a client for a small app wrapped in the middleware stack"""
+    app = FastAPI()
+    app.add_middleware(ErrorHandlingMiddleware)
+    app.add_middleware(AuthenticationMiddleware)
+    app.add_middleware(RequestIDMiddleware)
+
+    @app.get("/healthz")
+    async def health_check():
+        return {"status": "healthy"}
+
+    @app.get("/stream")
+    async def stream():
+        async def chunks():
+            for i in range(3):
+                yield f"chunk{i};"
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    @app.get("/forbidden")
+    async def forbidden():
+        raise ForbiddenException("nope")
+
+    @app.get("/missing")
+    async def missing():
+        raise NotFoundException("gone")
+
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+class TestMiddleware:
+    """Middleware tests"""
+
+    def test_request_id_header(self, middleware_client):
+        """Test every response carries a request ID"""
+        response = middleware_client.get("/healthz")
+
+        assert response.status_code == 200
+        assert len(response.headers["X-Request-ID"]) == 36
+
+    def test_missing_token(self, middleware_client):
+        """Test protected paths reject requests without a token"""
+        response = middleware_client.get("/stream")
+
+        assert response.status_code == 401
+        assert response.json()["success"] is False
+        assert "X-Request-ID" in response.headers
+
+    def test_streaming_response(self, middleware_client, auth_headers):
+        """Test streaming responses pass through the stack"""
+        response = middleware_client.get("/stream", headers=auth_headers)
+
+        assert response.status_code == 200
+        assert response.text == "chunk0;chunk1;chunk2;"
+
+    def test_forbidden_exception(self, middleware_client, auth_headers):
+        """Test application exceptions are turned into JSON errors"""
+        response = middleware_client.get("/forbidden", headers=auth_headers)
+
+        assert response.status_code == 403
+        assert response.json() == {"success": False, "message": "nope"}
+
+    def test_app_exception_status(self, middleware_client, auth_headers):
+        """Test other application exceptions keep their own status code"""
+        response = middleware_client.get("/missing", headers=auth_headers)
+
+        assert response.status_code == 404
+        assert response.json() == {"success": False, "message": "gone"}
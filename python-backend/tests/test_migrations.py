@@ -0,0 +1,103 @@
+"""Tests for the Alembic migrations and the indexes they create"""
+
+import re
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.orm import sessionmaker
+from app.database import Base
+from app.models import Comment, Like, Post
+from app.repositories import PostRepository, UserRepository
+from app.services.auth_service import AuthService
+from app.utils.pagination import encode_cursor
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# A plan step reading every row of a table, or sorting rows the index should
+# have returned in order
+FULL_SCAN = re.compile(r"^SCAN \w+$|USE TEMP B-TREE FOR ORDER BY")
+
+
+@pytest.fixture
+def migrated_engine(tmp_path):
+    """Create a SQLite database upgraded to the latest migration"""
+    url = f"sqlite:///{tmp_path}/migrated.db"
+    alembic_config = Config(str(BACKEND_DIR / "alembic.ini"))
+    alembic_config.set_main_option("script_location", str(BACKEND_DIR / "migrations"))
+    alembic_config.set_main_option("sqlalchemy.url", url)
+    command.upgrade(alembic_config, "head")
+    
+    engine = create_engine(url)
+    yield engine
+    engine.dispose()
+
+
+def capture_statements(engine, func):
+    """Run ``func`` with a session and return the SQL statements it executed"""
+    statements = []
+    
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+    
+    event.listen(engine, "before_cursor_execute", before_execute)
+    session = sessionmaker(bind=engine)()
+    try:
+        func(session)
+    finally:
+        session.close()
+        event.remove(engine, "before_cursor_execute", before_execute)
+    return statements
+
+
+HOT_QUERIES = {
+    "posts by author": lambda db: PostRepository(db).list_by_author(1),
+    "latest posts": lambda db: PostRepository(db).list(limit=10),
+    "post page": lambda db: PostRepository(db).list_page(cursor=encode_cursor([datetime(2024, 1, 1), 10]), limit=10),
+    "user by email": lambda db: UserRepository(db).get_by_email("user@example.com"),
+    "user by oauth": lambda db: AuthService(db).get_user_by_oauth("github", "42"),
+    "comments of post": lambda db: db.query(Comment).filter(Comment.post_id == 1).all(),
+    "likes of post": lambda db: db.query(Like).filter(Like.post_id == 1).all(),
+    "like by user": lambda db: db.query(Like).filter(Like.user_id == 1, Like.post_id == 1).first(),
+    "purgeable posts": lambda db: db.query(Post).filter(Post.deleted_at < datetime(2024, 1, 1)).all(),
+}
+
+
+class TestMigrations:
+    """Migration and query plan tests"""
+    
+    def test_migrations_match_models(self, migrated_engine):
+        """Test the migrated schema has every index the models declare"""
+        inspector = inspect(migrated_engine)
+        for table in Base.metadata.sorted_tables:
+            declared = {index.name for index in table.indexes}
+            migrated = {index["name"] for index in inspector.get_indexes(table.name)}
+            assert declared <= migrated, f"{table.name} is missing {declared - migrated}"
+    
+    def test_likes_unique_per_user(self, migrated_engine):
+        """Test a user cannot like the same post twice"""
+        from sqlalchemy.exc import IntegrityError
+        
+        with pytest.raises(IntegrityError):
+            with migrated_engine.begin() as conn:
+                for _ in range(2):
+                    conn.execute(text(
+                        "INSERT INTO likes (user_id, post_id, created_at, updated_at) "
+                        "VALUES (1, 1, '2024-01-01', '2024-01-01')"
+                    ))
+    
+    @pytest.mark.parametrize("name", sorted(HOT_QUERIES))
+    def test_hot_query_uses_index(self, migrated_engine, name):
+        """Test each hot query is answered from an index, not a full scan"""
+        statements = capture_statements(migrated_engine, HOT_QUERIES[name])
+        assert statements
+        
+        with migrated_engine.connect() as conn:
+            for statement, parameters in statements:
+                plan = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+                details = [row[-1] for row in plan]
+                assert not any(FULL_SCAN.search(d) for d in details), f"{name}: {statement}\n{details}"
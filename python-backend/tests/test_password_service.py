@@ -0,0 +1,40 @@
+"""Tests for the password hashing service"""
+
+import asyncio
+import pytest
+from app.services.password_service import PasswordHashingService
+
+
+@pytest.fixture
+def password_service():
+    """Create a password hashing service with a small pool"""
+    service = PasswordHashingService(workers=1, max_concurrency=2)
+    yield service
+    service.shutdown()
+
+
+class TestPasswordHashingService:
+    """Password hashing service tests"""
+    
+    async def test_hash_and_verify(self, password_service):
+        """Test hashing and verifying through the process pool"""
+        hashed = await password_service.hash("testpassword123")
+        
+        assert hashed != "testpassword123"
+        assert await password_service.verify("testpassword123", hashed) is True
+        assert await password_service.verify("wrongpassword", hashed) is False
+    
+    async def test_concurrency_cap(self, password_service):
+        """Test callers beyond the cap queue instead of running"""
+        hashes = [password_service.hash(f"password{i}") for i in range(4)]
+        tasks = [asyncio.ensure_future(h) for h in hashes]
+        await asyncio.sleep(0)
+        
+        assert password_service.in_flight == 2
+        assert password_service.queue_depth == 2
+        
+        await asyncio.gather(*tasks)
+        stats = password_service.stats()
+        assert stats["completed"] == 4
+        assert stats["queue_depth"] == 0
+        assert stats["in_flight"] == 0
@@ -0,0 +1,264 @@
+"""Tests for compiled RBAC permission sets"""
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from app.models import Group, Role, Rule, User
+from app.middleware import AuthenticationMiddleware, ErrorHandlingMiddleware
+from app.repositories import UserRepository
+from app.services.permission_index import PermissionIndex, PermissionSet, get_permission_index, resource_patterns
+from app.services.rbac_service import RBACService, require_permission
+from app.utils.auth import create_access_token
+from tests.conftest import DictRedis, SharedRedis
+
+
+@pytest.fixture
+def user(db):
+    """Create a user with no roles"""
+    user = User(name="member", email="member@example.com")
+    db.add(user)
+    db.commit()
+    return user
+
+
+def grant(db, resource, operation):
+    """Create a role holding one rule"""
+    rule = Rule(name=f"{resource}_{operation}", resource=resource, operation=operation)
+    role = Role(name=f"role_{resource}_{operation}", rules=[rule])
+    db.add(role)
+    db.commit()
+    return role
+
+
+class TestPermissionIndex:
+    """Compiled permission set tests"""
+    
+    def test_roles_and_group_roles(self, db, user):
+        """Test permissions come from direct roles and group roles"""
+        direct = grant(db, "posts", "read")
+        group = Group(name="editors", roles=[grant(db, "posts", "write")])
+        db.add(group)
+        db.commit()
+        service = RBACService(db)
+        service.assign_role_to_user(user.id, direct.id)
+        UserRepository(db).add_to_group(user.id, group)
+        
+        assert service.get_permission_set(user.id) == {("posts", "read"), ("posts", "write")}
+        assert service.check_permission(user.id, "posts", "write")
+        assert not service.check_permission(user.id, "posts", "delete")
+    
+    def test_checks_do_not_query(self, db, user, count_queries):
+        """Test a compiled set answers later checks without SQL"""
+        service = RBACService(db)
+        service.assign_role_to_user(user.id, grant(db, "posts", "read").id)
+        assert service.check_permission(user.id, "posts", "read")
+        statements = count_queries["statements"]
+        
+        for _ in range(10):
+            assert service.check_permission(user.id, "posts", "read")
+        assert count_queries["statements"] == statements
+    
+    def test_mutations_bump_version(self, db, user):
+        """Test role, rule and membership changes recompile the set"""
+        service = RBACService(db)
+        role = grant(db, "posts", "read")
+        group = Group(name="writers", roles=[grant(db, "posts", "write")])
+        db.add(group)
+        db.commit()
+        assert not service.check_permission(user.id, "posts", "read")
+        
+        service.assign_role_to_user(user.id, role.id)
+        assert service.check_permission(user.id, "posts", "read")
+        
+        rule = Rule(name="posts_delete", resource="posts", operation="delete")
+        db.add(rule)
+        db.commit()
+        service.assign_rule_to_role(role.id, rule.id)
+        assert service.check_permission(user.id, "posts", "delete")
+        
+        repo = UserRepository(db)
+        repo.add_to_group(user.id, group)
+        assert service.check_permission(user.id, "posts", "write")
+        repo.remove_from_group(user.id, group)
+        assert not service.check_permission(user.id, "posts", "write")
+        
+        service.remove_role_from_user(user.id, role.id)
+        assert not service.check_permission(user.id, "posts", "read")
+    
+    def test_replica_session_compiles_from_primary(self, db, user, monkeypatch):
+        """Test a service reading a replica loads the shared set from the primary"""
+        primary_loads = []
+        monkeypatch.setattr("app.services.rbac_service.load_permissions",
+                            lambda user_id: primary_loads.append(user_id) or [("posts", "read")])
+        db.use_replica = True
+        
+        assert RBACService(db).check_permission(user.id, "posts", "read")
+        assert primary_loads == [user.id]
+    
+    def test_shared_between_workers(self):
+        """Test a set compiled by one worker is reused by another until a bump"""
+        redis = SharedRedis()
+        first, second = PermissionIndex(redis), PermissionIndex(redis)
+        loads = []
+        
+        def loader(user_id):
+            loads.append(user_id)
+            return [("posts", "read")]
+        
+        assert first.get(1, loader) == {("posts", "read")}
+        assert second.get(1, loader) == {("posts", "read")}
+        assert loads == [1]
+        
+        first.bump()
+        assert redis.published[-1] == ("rbac:invalidate", "1")
+        second._on_message("1")
+        second.get(1, loader)
+        assert loads == [1, 1]
+    
+    def test_bump_without_redis(self):
+        """Test bumps stay local when Redis is off"""
+        index = PermissionIndex(DictRedis())
+        index.get(1, lambda user_id: [])
+        index.bump()
+        
+        assert index.version == 1
+        assert index.stats()["size"] == 0
+
+
+class TestPermissionQueries:
+    """Single-query permission resolution tests"""
+    
+    @pytest.fixture
+    def member(self, db):
+        """ID of a user in 20 groups that share 50 roles, 2 rules each"""
+        roles = [
+            Role(name=f"role{i}", rules=[
+                Rule(name=f"rule{i}_read", resource=f"resource{i}", operation="read"),
+                Rule(name=f"rule{i}_write", resource=f"resource{i}", operation="write"),
+            ])
+            for i in range(50)
+        ]
+        groups = [Group(name=f"group{g}", roles=roles[g * 2:g * 2 + 10]) for g in range(20)]
+        user = User(name="member", email="member@example.com", groups=groups, roles=roles[45:])
+        db.add(user)
+        db.commit()
+        return user.id
+    
+    def test_permissions_in_one_statement(self, db, member, count_queries):
+        """Test every permission of the user is resolved with one query"""
+        service = RBACService(db)
+        statements = count_queries["statements"]
+        
+        permissions = service.get_user_permissions(member)
+        
+        assert count_queries["statements"] == statements + 1
+        # Groups cover roles 0-47 and direct roles 45-49
+        assert len(permissions) == 100
+        assert ("resource49", "write") in permissions
+    
+    def test_exists_check_in_one_statement(self, db, member, count_queries, monkeypatch):
+        """Test a check without the in-process index is one EXISTS query"""
+        service = RBACService(db)
+        monkeypatch.setattr(service.permissions, "max_size", 0)
+        statements = count_queries["statements"]
+        
+        assert service.check_permission(member, "resource30", "read")
+        assert not service.check_permission(member, "resource30", "delete")
+        assert service.check_permission(member, "resource49", "write")
+        
+        assert count_queries["statements"] == statements + 3
+
+
+class TestWildcards:
+    """Wildcard and hierarchical matching tests"""
+    
+    def test_subtree_wildcard(self):
+        """Test a ``/*`` resource grants every path below it"""
+        permissions = PermissionSet([("docker/containers/*", "read")])
+        
+        assert permissions.allows("docker/containers/web", "read")
+        assert permissions.allows("docker/containers/web/logs", "read")
+        assert not permissions.allows("docker/containers", "read")
+        assert not permissions.allows("docker/images/web", "read")
+        assert not permissions.allows("docker/containers/web", "delete")
+    
+    def test_operation_and_resource_wildcards(self):
+        """Test ``*`` operations and the ``*`` resource"""
+        permissions = PermissionSet([("posts", "*"), ("*", "read")])
+        
+        assert permissions.allows("posts", "delete")
+        assert not permissions.allows("posts/1", "delete")
+        assert permissions.allows("kubernetes/pods/api", "read")
+        assert not permissions.allows("kubernetes/pods/api", "write")
+    
+    def test_exact_pairs(self):
+        """Test sets without wildcards match exactly and build no trie"""
+        permissions = PermissionSet([("posts", "read"), ("posts/*", "write")])
+        
+        assert permissions.allows("posts", "read")
+        assert not permissions.allows("posts/1", "read")
+        assert permissions.allows("posts/1", "write")
+        assert PermissionSet([("posts", "read")]).root is None
+        assert permissions == {("posts", "read"), ("posts/*", "write")}
+    
+    def test_resource_patterns(self):
+        """Test the rule resources that can grant a path"""
+        assert resource_patterns("posts") == ["posts", "*"]
+        assert resource_patterns("docker/containers/web") == [
+            "docker/containers/web", "*", "docker/*", "docker/containers/*"
+        ]
+    
+    def test_wildcards_in_database_check(self, db, user, monkeypatch):
+        """Test the EXISTS query honours wildcard rules like the compiled set"""
+        service = RBACService(db)
+        service.assign_role_to_user(user.id, grant(db, "docker/containers/*", "*").id)
+        
+        for max_size in (10000, 0):
+            monkeypatch.setattr(service.permissions, "max_size", max_size)
+            assert service.check_permission(user.id, "docker/containers/web", "restart")
+            assert not service.check_permission(user.id, "docker/images/web", "restart")
+
+
+class TestRequirePermission:
+    """Route-level permission dependency tests"""
+    
+    @pytest.fixture
+    def guarded(self, db):
+        """Client of an app with one route per permission outcome"""
+        app = FastAPI()
+        app.add_middleware(ErrorHandlingMiddleware)
+        app.add_middleware(AuthenticationMiddleware)
+        
+        @app.post("/containers/{container_id}/start",
+                  dependencies=[Depends(require_permission("docker/containers/{container_id}", "start"))])
+        async def start(container_id: str):
+            return {"started": container_id}
+        
+        return TestClient(app)
+    
+    def test_allows_and_denies(self, db, user, guarded):
+        """Test path parameters are matched against the user's rules"""
+        RBACService(db).assign_role_to_user(user.id, grant(db, "docker/containers/*", "start").id)
+        headers = {"Authorization": f"Bearer {create_access_token(user.id, user.name)}"}
+        
+        assert guarded.post("/containers/web/start", headers=headers).json() == {"started": "web"}
+        
+        RBACService(db).remove_role_from_user(user.id, db.query(Role).one().id)
+        response = guarded.post("/containers/web/start", headers=headers)
+        assert response.status_code == 403
+    
+    def test_requires_authentication(self, guarded):
+        """Test requests without a user are rejected before any check"""
+        assert guarded.post("/containers/web/start").status_code == 401
+    
+    def test_snapshot_serves_repeat_requests(self, db, user, guarded):
+        """Test only the first request compiles the user's permissions"""
+        RBACService(db).assign_role_to_user(user.id, grant(db, "docker/containers/*", "start").id)
+        headers = {"Authorization": f"Bearer {create_access_token(user.id, user.name)}"}
+        index = get_permission_index()
+        compiled, misses = index.compiled, index.misses
+        
+        for _ in range(5):
+            assert guarded.post("/containers/web/start", headers=headers).status_code == 200
+        assert index.compiled == compiled + 1
+        assert index.misses == misses + 1
@@ -0,0 +1,143 @@
+"""Tests for token-bucket rate limiting"""
+
+import pytest
+from app.config import RateLimitConfig
+from app.utils.ratelimit import TokenBucket, RateLimiter, RedisRateLimiter, validate_limit_config
+from app.utils.redis_client import AsyncRedisClient
+
+
+class StubRedisClient(AsyncRedisClient):
+    """Async Redis client returning canned script results"""
+    
+    def __init__(self, results):
+        super().__init__()
+        self.enabled = True
+        self.results = list(results)
+        self.calls = 0
+    
+    async def eval_script(self, script, keys, args):
+        self.calls += 1
+        return self.results.pop(0)
+
+
+class TestTokenBucket:
+    """Token bucket tests"""
+    
+    def test_burst_then_reject(self):
+        """Test the bucket allows a full burst and then rejects"""
+        bucket = TokenBucket(rate=1, burst=3, now=0.0)
+        
+        assert [bucket.allow(now=0.0) for _ in range(4)] == [True, True, True, False]
+    
+    def test_refill(self):
+        """Test tokens refill at the configured rate, capped at burst"""
+        bucket = TokenBucket(rate=2, burst=2, now=0.0)
+        bucket.allow(now=0.0)
+        bucket.allow(now=0.0)
+        
+        assert bucket.allow(now=0.1) is False
+        assert bucket.allow(now=0.5) is True
+        assert bucket.allow(now=100.0) is True
+        assert bucket.tokens == 1
+
+
+class TestRateLimiter:
+    """Rate limiter tests"""
+    
+    def test_server_limit_is_shared(self):
+        """Test server limits share a single bucket across clients"""
+        limiter = RateLimiter(RateLimitConfig(limit_type="server", burst=2, qps=1, cache_size=1))
+        
+        assert limiter.allow("1.1.1.1", now=0.0) is True
+        assert limiter.allow("2.2.2.2", now=0.0) is True
+        assert limiter.allow("3.3.3.3", now=0.0) is False
+    
+    def test_ip_limit_per_client(self):
+        """Test ip limits keep a bucket per client"""
+        limiter = RateLimiter(RateLimitConfig(limit_type="ip", burst=1, qps=1, cache_size=10))
+        
+        assert limiter.allow("1.1.1.1", now=0.0) is True
+        assert limiter.allow("1.1.1.1", now=0.0) is False
+        assert limiter.allow("2.2.2.2", now=0.0) is True
+    
+    def test_lru_is_bounded(self):
+        """Test the bucket cache never grows past cache_size"""
+        limiter = RateLimiter(RateLimitConfig(limit_type="ip", burst=1, qps=1, cache_size=2))
+        
+        for i in range(100):
+            limiter.allow(f"10.0.0.{i}", now=0.0)
+        
+        assert len(limiter.buckets) == 2
+        assert list(limiter.buckets) == ["10.0.0.98", "10.0.0.99"]
+    
+    def test_invalid_config(self):
+        """Test invalid configs are rejected"""
+        with pytest.raises(ValueError):
+            validate_limit_config(RateLimitConfig(limit_type="ip", burst=1, qps=10, cache_size=1))
+        with pytest.raises(ValueError):
+            validate_limit_config(RateLimitConfig(limit_type="user", burst=10, qps=1, cache_size=1))
+        # A burst of exactly qps is allowed
+        validate_limit_config(RateLimitConfig(limit_type="ip", burst=10, qps=10, cache_size=1))
+    
+    def test_default_cache_size(self):
+        """Test a zero cache size falls back to the default"""
+        config = RateLimitConfig(limit_type="ip", burst=10, qps=1, cache_size=0)
+        validate_limit_config(config)
+        
+        assert config.cache_size == 2048
+
+
+class TestRedisRateLimiter:
+    """Distributed rate limiter tests"""
+    
+    def config(self):
+        return RateLimitConfig(limit_type="ip", burst=1, qps=1, cache_size=10, distributed=True)
+    
+    async def test_uses_redis_result(self):
+        """Test the Redis script decides when available"""
+        redis_client = StubRedisClient([1, 0])
+        limiter = RedisRateLimiter(self.config(), redis_client)
+        
+        assert await limiter.allow("1.1.1.1") is True
+        assert await limiter.allow("1.1.1.1") is False
+        assert redis_client.calls == 2
+    
+    async def test_falls_back_when_redis_fails(self):
+        """Test a Redis failure falls back to the local limiter and backs off"""
+        redis_client = StubRedisClient([None])
+        limiter = RedisRateLimiter(self.config(), redis_client)
+        
+        assert await limiter.allow("1.1.1.1", now=0.0) is True
+        assert await limiter.allow("1.1.1.1", now=0.0) is False
+        assert redis_client.calls == 1
+    
+    async def test_disabled_redis_uses_local(self):
+        """Test a disabled Redis client never gets called"""
+        redis_client = StubRedisClient([])
+        redis_client.enabled = False
+        limiter = RedisRateLimiter(self.config(), redis_client)
+        
+        assert await limiter.allow("1.1.1.1", now=0.0) is True
+        assert redis_client.calls == 0
+    
+    async def test_middleware_awaits_redis(self):
+        """Test the middleware answers 429 from the awaited Redis check"""
+        from app.middleware import RateLimitMiddleware
+        redis_client = StubRedisClient([1, 0])
+        sent = []
+        
+        async def app(scope, receive, send):
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b""})
+        
+        async def send(message):
+            if message["type"] == "http.response.start":
+                sent.append(message["status"])
+        
+        middleware = RateLimitMiddleware(app, [self.config()], redis_client)
+        scope = {"type": "http", "client": ("1.1.1.1", 1), "headers": []}
+        await middleware(scope, None, send)
+        await middleware(scope, None, send)
+        
+        assert sent == [200, 429]
+        assert redis_client.calls == 2
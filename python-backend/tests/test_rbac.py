@@ -3,19 +3,67 @@
 import pytest
 
 
+@pytest.fixture
+def rbac_admin(db, test_user):
+    """Let the test user manage roles and rules"""
+    from app.models import Role, Rule
+    
+    rule = Rule(name="rbac_all", resource="rbac/*", operation="*")
+    db.add(Role(name="rbac_admin", rules=[rule], users=[test_user]))
+    db.commit()
+
+
+@pytest.mark.usefixtures("rbac_admin")
 class TestRBAC:
     """RBAC endpoint tests"""
     
     def test_create_role(self, client, auth_headers):
         """Test creating a role"""
         response = client.post("/api/rbac/roles", json={
-            "name": "admin",
-            "description": "Administrator role"
+            "name": "editor",
+            "description": "Editor role"
         }, headers=auth_headers)
         
         assert response.status_code == 201
         data = response.json()
-        assert data["name"] == "admin"
+        assert data["name"] == "editor"
+    
+    def test_mutations_require_permission(self, client, db):
+        """Test users without an rbac rule cannot change roles or rules"""
+        from app.models import Role, User
+        from app.utils.auth import create_access_token
+        
+        user = User(name="plain", email="plain@example.com")
+        db.add(user)
+        db.commit()
+        role = db.query(Role).filter(Role.name == "rbac_admin").one()
+        headers = {"Authorization": f"Bearer {create_access_token(user.id, user.name)}"}
+        
+        assert client.post("/api/rbac/roles", json={"name": "mine"}, headers=headers).status_code == 403
+        assert client.post("/api/rbac/rules", json={
+            "name": "all", "resource": "*", "operation": "*"
+        }, headers=headers).status_code == 403
+        assert client.post(f"/api/rbac/users/{user.id}/roles/{role.id}", headers=headers).status_code == 403
+        assert client.delete(f"/api/rbac/users/{user.id}/roles/{role.id}", headers=headers).status_code == 403
+        assert client.post(f"/api/rbac/roles/{role.id}/rules/1", headers=headers).status_code == 403
+    
+    def test_permission_reads_require_permission(self, client, test_user, db):
+        """Test users without an rbac rule cannot list or probe permissions"""
+        from app.models import User
+        from app.utils.auth import create_access_token
+        
+        user = User(name="plain", email="plain@example.com")
+        db.add(user)
+        db.commit()
+        headers = {"Authorization": f"Bearer {create_access_token(user.id, user.name)}"}
+        
+        assert client.get(f"/api/rbac/users/{test_user.id}/permissions", headers=headers).status_code == 403
+        assert client.post("/api/rbac/check", params={
+            "user_id": test_user.id, "resource": "rbac/roles", "operation": "create"
+        }, headers=headers).status_code == 403
+        assert client.post("/api/rbac/check/batch", json={
+            "user_id": test_user.id, "checks": [{"resource": "rbac/roles", "operation": "create"}]
+        }, headers=headers).status_code == 403
     
     def test_create_rule(self, client, auth_headers):
         """Test creating a rule"""
@@ -45,6 +93,24 @@ class TestRBAC:
         data = response.json()
         assert "data" in data
     
+    def test_list_roles_by_cursor(self, client, auth_headers, db):
+        """Test paging through roles with a cursor"""
+        from app.models import Role
+        
+        db.add_all(Role(name=f"pagerole{i}") for i in range(3))
+        db.commit()
+        total = db.query(Role).count()
+        
+        pages, cursor = [], ""
+        while cursor is not None:
+            page = client.get(f"/api/rbac/roles?limit=2&cursor={cursor}", headers=auth_headers).json()
+            pages.append(page["data"])
+            cursor = page["next_cursor"]
+        
+        ids = [role["id"] for page in pages for role in page]
+        assert [len(page) for page in pages] == [2] * (total // 2) + [total % 2] * (total % 2)
+        assert ids == sorted(ids) and len(ids) == total
+    
     def test_assign_role_to_user(self, client, test_user, auth_headers, db):
         """Test assigning role to user"""
         from app.models import Role
@@ -71,3 +137,50 @@ class TestRBAC:
         assert response.status_code == 200
         data = response.json()
         assert "data" in data
+    
+    def test_check_permissions_batch(self, client, test_user, auth_headers, db):
+        """Test checking several permissions in one request"""
+        from app.models import Role, Rule
+        
+        role = Role(name="viewer", rules=[
+            Rule(name="posts_read", resource="posts", operation="read"),
+            Rule(name="containers_all", resource="docker/containers/*", operation="*"),
+        ])
+        db.add(role)
+        db.commit()
+        client.post(f"/api/rbac/users/{test_user.id}/roles/{role.id}", headers=auth_headers)
+        
+        response = client.post("/api/rbac/check/batch", json={
+            "user_id": test_user.id,
+            "checks": [
+                {"resource": "posts", "operation": "read"},
+                {"resource": "posts", "operation": "delete"},
+                {"resource": "docker/containers/web", "operation": "restart"},
+                {"resource": "users", "operation": "read"},
+            ]
+        }, headers=auth_headers)
+        
+        assert response.status_code == 200
+        assert response.json()["data"] == {
+            "posts": {"read": True, "delete": False},
+            "docker/containers/web": {"restart": True},
+            "users": {"read": False},
+        }
+    
+    def test_check_permissions_batch_reads_primary(self, client, test_user, auth_headers, db):
+        """Test the batch check never compiles the shared set from a replica session"""
+        from app.database import get_read_db
+        from app.main import app
+        
+        def no_replica():
+            raise AssertionError("batch check used a replica session")
+            yield
+        
+        app.dependency_overrides[get_read_db] = no_replica
+        response = client.post("/api/rbac/check/batch", json={
+            "user_id": test_user.id,
+            "checks": [{"resource": "posts", "operation": "read"}]
+        }, headers=auth_headers)
+        
+        assert response.status_code == 200
+        assert response.json()["data"] == {"posts": {"read": False}}
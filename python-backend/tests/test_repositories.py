@@ -0,0 +1,122 @@
+"""Tests for the repository cache paths"""
+
+import pytest
+from app.models import Post, User
+from app.repositories import PostRepository, UserRepository
+from app.utils.redis_client import CacheManager
+from tests.conftest import DictRedis
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    """Route the repositories' cache manager to an in-memory store"""
+    manager = CacheManager(DictRedis())
+    monkeypatch.setattr("app.repositories.get_cache_manager", lambda: manager)
+    return manager
+
+
+class TestReadThrough:
+    """Read-through cache tests"""
+    
+    def test_user_hit_skips_database(self, db, cache, count_queries):
+        """Test a cached user is served without a query"""
+        repo = UserRepository(db)
+        user = repo.create(User(name="cached", email="cached@example.com"))
+        cache.invalidate_user(user.id)
+        
+        first = repo.get_view(user.id)
+        selects = count_queries["selects"]
+        second = repo.get_view(user.id)
+        
+        assert first == second
+        assert second.name == "cached"
+        assert count_queries["selects"] == selects
+    
+    def test_user_update_invalidates(self, db, cache):
+        """Test writes evict the cached view"""
+        repo = UserRepository(db)
+        user = repo.create(User(name="stale", email="old@example.com"))
+        assert repo.get_view(user.id).email == "old@example.com"
+        
+        user.email = "new@example.com"
+        repo.update(user)
+        
+        assert cache.get_cached_user(user.id) is None
+        assert repo.get_view(user.id).email == "new@example.com"
+    
+    def test_missing_user(self, db, cache, count_queries):
+        """Test a missing user is negatively cached until it is created"""
+        repo = UserRepository(db)
+        assert repo.get_view(12345) is None
+        selects = count_queries["selects"]
+        assert repo.get_view(12345) is None
+        assert cache.get_cached_user(12345) is None
+        assert count_queries["selects"] == selects
+        
+        repo.create(User(id=12345, name="late", email="late@example.com"))
+        assert repo.get_view(12345).name == "late"
+    
+    def test_missing_post_skips_database(self, db, cache, count_queries):
+        """Test a post lookup known to be missing does not query"""
+        repo = PostRepository(db)
+        assert repo.get_view(54321) is None
+        selects = count_queries["selects"]
+        assert repo.get_view(54321) is None
+        assert count_queries["selects"] == selects
+    
+    def test_post_hit_skips_database(self, db, cache, count_queries):
+        """Test a cached post is served without a query"""
+        author = UserRepository(db).create(User(name="author"))
+        repo = PostRepository(db)
+        post = Post(title="hello", content="world", author_id=author.id)
+        repo.create(post)
+        
+        selects = count_queries["selects"]
+        view = repo.get_view(post.id)
+        
+        assert view.title == "hello"
+        assert count_queries["selects"] == selects
+
+
+class TestBatchedViews:
+    """Batched list view tests"""
+    
+    def test_list_views_fill_misses_once(self, db, cache, count_queries):
+        """Test a cold list costs one id query and one IN query, a warm list only the ids"""
+        repo = UserRepository(db)
+        for i in range(5):
+            db.add(User(name=f"batch{i}"))
+        db.commit()
+        
+        selects = count_queries["selects"]
+        cold = repo.list_views()
+        assert count_queries["selects"] - selects == 2
+        
+        selects = count_queries["selects"]
+        round_trips = cache.redis.round_trips
+        warm = repo.list_views()
+        assert count_queries["selects"] - selects == 1
+        assert cache.redis.round_trips - round_trips == 1
+        
+        assert [u.name for u in warm] == [u.name for u in cold] == [f"batch{i}" for i in range(5)]
+    
+    def test_page_views_match_rows(self, db, cache):
+        """Test keyset pages of views match the ORM pages"""
+        author = UserRepository(db).create(User(name="writer"))
+        repo = PostRepository(db)
+        for i in range(5):
+            repo.create(Post(title=f"t{i}", content="x", author_id=author.id))
+        
+        views, view_cursor = repo.list_page_views(limit=3)
+        rows, row_cursor = repo.list_page(limit=3)
+        
+        assert [v.id for v in views] == [r.id for r in rows]
+        assert view_cursor == row_cursor
+    
+    def test_invalidate_many(self, cache):
+        """Test batched invalidation is one broadcast"""
+        cache.cache_users({1: {"id": 1}, 2: {"id": 2}})
+        cache.invalidate_users([1, 2])
+        
+        assert cache.get_cached_users([1, 2]) == {}
+        assert cache.redis.published[-1] == ("cache:invalidate", "user:1 user:2")
@@ -42,6 +42,26 @@ class TestUsers:
         assert isinstance(data, list)
         assert len(data) >= 1
     
+    def test_list_users_by_cursor(self, client, test_user, auth_headers, db):
+        """Test walking the user list with keyset cursors"""
+        from app.models import User
+        
+        db.add_all(User(name=f"page{i}") for i in range(5))
+        db.commit()
+        
+        names = []
+        cursor = ""
+        while cursor is not None:
+            response = client.get(f"/api/users?limit=2&cursor={cursor}", headers=auth_headers)
+            assert response.status_code == 200
+            data = response.json()
+            assert len(data["data"]) <= 2
+            names.extend(u["name"] for u in data["data"])
+            cursor = data["next_cursor"]
+        
+        expected = client.get("/api/users", headers=auth_headers).json()
+        assert names == [u["name"] for u in expected]
+    
     def test_update_user(self, client, test_user, auth_headers):
         """Test updating a user"""
         response = client.put(f"/api/users/{test_user.id}", json={
@@ -66,3 +86,27 @@ class TestUsers:
         response = client.delete(f"/api/users/{user.id}", headers=auth_headers)
         
         assert response.status_code == 204
+    
+    def test_group_membership_requires_permission(self, client, test_user, auth_headers, db):
+        """Test only users allowed to manage a group's members can join it"""
+        from app.models import Group, Role, Rule
+        from app.services.permission_index import get_permission_index
+        
+        group = Group(name="admins", roles=[Role(name="group_admin", rules=[
+            Rule(name="everything", resource="*", operation="*")
+        ])])
+        db.add(group)
+        db.commit()
+        path = f"/api/users/{test_user.id}/groups/{group.id}"
+        
+        assert client.post(path, headers=auth_headers).status_code == 403
+        assert client.delete(path, headers=auth_headers).status_code == 403
+        
+        db.add(Role(name="group_manager", users=[test_user], rules=[
+            Rule(name="group_members", resource="groups/*", operation="*")
+        ]))
+        db.commit()
+        get_permission_index().bump()
+        
+        assert client.post(path, headers=auth_headers).status_code == 200
+        assert client.delete(path, headers=auth_headers).status_code == 204
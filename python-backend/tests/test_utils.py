@@ -1,12 +1,14 @@
 """Tests for utility functions"""
 
 import pytest
+from datetime import timedelta
 from app.utils.auth import (
     hash_password,
     verify_password,
     create_access_token,
     verify_token,
-    extract_token_from_header
+    extract_token_from_header,
+    TokenCache
 )
 
 
@@ -80,3 +82,102 @@ class TestJWT:
         token = extract_token_from_header(None)
         
         assert token is None
+
+
+class TestTokenCache:
+    """Verified-token cache tests"""
+    
+    def test_hit_after_put(self):
+        """Test verified claims are served from the cache"""
+        cache = TokenCache(max_size=10)
+        token = create_access_token(1, "testuser")
+        
+        assert cache.get(token) is None
+        cache.put(token, verify_token(token))
+        cached = cache.get(token)
+        
+        assert cached.user_id == 1
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+    
+    def test_expired_entry(self):
+        """Test entries expire with the token"""
+        cache = TokenCache(max_size=10)
+        token = create_access_token(1, "testuser")
+        token_data = verify_token(token)
+        token_data.exp = token_data.exp - timedelta(days=8)
+        cache.put(token, token_data)
+        
+        assert cache.get(token) is None
+        assert cache.stats()["size"] == 0
+    
+    def test_bounded_size(self):
+        """Test the cache evicts least recently used entries"""
+        cache = TokenCache(max_size=2)
+        tokens = [create_access_token(i, f"user{i}") for i in range(3)]
+        for token in tokens:
+            cache.put(token, verify_token(token))
+        
+        assert cache.stats()["size"] == 2
+        assert cache.get(tokens[0]) is None
+        assert cache.get(tokens[2]).user_id == 2
+
+
+class TestMetrics:
+    """Metrics registry tests"""
+    
+    def test_render_prometheus(self):
+        """Test registered stats are flattened into Prometheus samples"""
+        from app.utils.metrics import register_stats, unregister_stats, render_prometheus
+        
+        register_stats("test", lambda: {"hits": 3, "pool": {"ratio": 0.5}, "up": True, "name": "x"})
+        try:
+            output = render_prometheus()
+        finally:
+            unregister_stats("test")
+        
+        assert "weave_test_hits 3\n" in output
+        assert "weave_test_pool_ratio 0.5\n" in output
+        assert "weave_test_up 1\n" in output
+        assert "weave_test_name" not in output
+    
+    def test_endpoint_requires_permission(self, client, db, test_user, auth_headers):
+        """Test /metrics is served only to users allowed to read metrics"""
+        from app.models import Role, Rule
+        from app.services.permission_index import get_permission_index
+        
+        assert client.get("/metrics").status_code == 401
+        assert client.get("/metrics", headers=auth_headers).status_code == 403
+        
+        db.add(Role(name="scraper", rules=[Rule(name="metrics_read", resource="metrics", operation="read")],
+                    users=[test_user]))
+        db.commit()
+        get_permission_index().bump()
+        response = client.get("/metrics", headers=auth_headers)
+        assert response.status_code == 200
+        assert "weave_" in response.text
+
+
+class TestPagination:
+    """Keyset pagination helper tests"""
+    
+    def test_cursor_round_trip(self):
+        """Test cursors preserve strings, ints and datetimes"""
+        from datetime import datetime
+        from app.utils.pagination import encode_cursor, decode_cursor
+        
+        values = [datetime(2024, 1, 2, 3, 4, 5, 678), 42, "name"]
+        cursor = encode_cursor(values)
+        
+        assert "=" not in cursor
+        assert decode_cursor(cursor, 3) == values
+    
+    def test_invalid_cursor(self):
+        """Test malformed cursors are rejected"""
+        from app.utils.errors import BadRequestException
+        from app.utils.pagination import encode_cursor, decode_cursor
+        
+        with pytest.raises(BadRequestException):
+            decode_cursor("not a cursor!", 2)
+        with pytest.raises(BadRequestException):
+            decode_cursor(encode_cursor([1]), 2)
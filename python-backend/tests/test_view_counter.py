@@ -0,0 +1,150 @@
+"""Tests for the write-behind post view counter"""
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.models import Post, User
+from app.schemas import PostResponse
+from app.services.view_counter import ViewCounter
+from app.utils.redis_client import CacheManager
+from tests.conftest import DictRedis, TestSessionLocal
+
+
+@pytest.fixture
+def post(db):
+    """Create a post with no views"""
+    author = User(name="author", email="author@example.com")
+    db.add(author)
+    db.commit()
+    post = Post(title="hello", content="world", author_id=author.id, view_count=0)
+    db.add(post)
+    db.commit()
+    return post
+
+
+@pytest.fixture
+def counter(db):
+    """View counter with Redis off, writing to the test database"""
+    return ViewCounter(TestSessionLocal, DictRedis(), CacheManager(DictRedis()), interval=60)
+
+
+def stored_views(post_id):
+    """View count as written in the database"""
+    session = TestSessionLocal()
+    try:
+        return session.get(Post, post_id).view_count
+    finally:
+        session.close()
+
+
+class TestViewCounter:
+    """Write-behind view counter tests"""
+    
+    def test_views_are_buffered(self, counter, post):
+        """Test views are counted without writing to the database"""
+        assert counter.incr(post.id) == 1
+        assert counter.incr(post.id) == 2
+        assert stored_views(post.id) == 0
+        assert counter.pending([post.id, 999]) == {post.id: 2, 999: 0}
+    
+    def test_flush_writes_batch(self, counter, post, db):
+        """Test a flush adds every buffered view in one batch"""
+        other = Post(title="other", content="post", author_id=post.author_id, view_count=5)
+        db.add(other)
+        db.commit()
+        for post_id in (post.id, post.id, other.id):
+            counter.incr(post_id)
+        
+        assert counter.flush() == 3
+        assert stored_views(post.id) == 2
+        assert stored_views(other.id) == 6
+        assert counter.pending([post.id, other.id]) == {post.id: 0, other.id: 0}
+        assert counter.stats()["flushes"] == 1
+    
+    def test_reads_include_pending(self, counter, post):
+        """Test unflushed views are added to the served counts"""
+        counter.incr(post.id)
+        view = PostResponse.model_validate(post)
+        
+        assert counter.add_pending([view])[0].view_count == 1
+    
+    def test_failed_flush_is_retried(self, counter, post, monkeypatch):
+        """Test views of a failed write stay buffered and are written later"""
+        counter.incr(post.id)
+        
+        unreachable = create_engine("sqlite:////nonexistent/views.db")
+        monkeypatch.setattr(counter, "session_factory", sessionmaker(bind=unreachable))
+        assert counter.flush() == 0
+        assert counter.stats()["failed_flushes"] == 1
+        counter.incr(post.id)
+        assert counter.pending([post.id]) == {post.id: 2}
+        
+        monkeypatch.setattr(counter, "session_factory", TestSessionLocal)
+        assert counter.flush() == 1
+        assert counter.flush() == 1
+        assert stored_views(post.id) == 2
+    
+    def test_replayed_batch_is_skipped(self, counter, post):
+        """Test a shared batch written before a crash is not counted again"""
+        assert counter._write({post.id: 3}, "batch-1") is True
+        # The flusher died before dropping the batch from Redis
+        assert counter._write({post.id: 3}, "batch-1") is True
+        assert counter._write({post.id: 2}, "batch-2") is True
+        
+        assert stored_views(post.id) == 5
+        assert counter.stats()["flushes"] == 2
+    
+    def test_read_during_flush(self, counter, post, monkeypatch):
+        """Test a read racing a flush neither counts the batch twice nor caches the old count"""
+        counter.incr(post.id)
+        seen = []
+        invalidate_posts = counter.cache.invalidate_posts
+        
+        def invalidate(post_ids):
+            seen.append(counter.pending(post_ids))
+            return invalidate_posts(post_ids)
+        
+        def load():
+            data = {"id": post.id, "view_count": stored_views(post.id)}
+            # The flush commits between the read and the fill
+            counter.flush()
+            return data
+        
+        monkeypatch.setattr(counter.cache, "invalidate_posts", invalidate)
+        assert counter.cache.get_or_load(f"post:{post.id}", load)["view_count"] == 0
+        assert seen == [{post.id: 0}]
+        assert counter.cache.get_cached_post(post.id) is None
+        
+        reloaded = counter.cache.get_or_load(f"post:{post.id}", lambda: {"id": post.id, "view_count": stored_views(post.id)})
+        assert reloaded["view_count"] == 1
+        assert counter.pending([post.id]) == {post.id: 0}
+    
+    def test_close_flushes(self, counter, post):
+        """Test stopping the counter writes out buffered views"""
+        counter.start()
+        counter.incr(post.id)
+        counter.close()
+        
+        assert counter.thread is None
+        assert stored_views(post.id) == 1
+    
+    async def test_async_incr(self, counter, post):
+        """Test async handlers count views on the async client, or locally without it"""
+        from app.utils.redis_client import AsyncRedisClient
+        
+        class SharedCount(AsyncRedisClient):
+            async def eval_script(self, script, keys, args):
+                return 5
+        
+        assert await counter.incr_async(post.id) == 1
+        counter.async_redis = SharedCount()
+        counter.async_redis.enabled = True
+        assert await counter.incr_async(post.id) == 6
+    
+    def test_get_post_counts_view(self, client, post, auth_headers):
+        """Test each read of a post adds a buffered view to the served count"""
+        first = client.get(f"/api/posts/{post.id}", headers=auth_headers).json()
+        second = client.get(f"/api/posts/{post.id}", headers=auth_headers).json()
+        
+        assert first["title"] == "hello"
+        assert second["view_count"] == first["view_count"] + 1